@@ -1,13 +1,33 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, session
+from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, session, g, Response
 import os
+import hmac
 from helpers.lookups import *
-from services.file_service import save_file
+from services.file_service import save_file, local_upload_path
 from services.azure_service import *
 from services.excel_service import *
+from services.batch_store import DuplicateSkuError, get_batch_store, new_batch_id
+from services.job_queue import SQLiteJobQueue, ensure_job_workers, new_job_id
+from services.submission_service import build_submission_handlers
+from services.submission_index import get_submission_index
+from services.import_service import allowed_import_file, import_products
+from services.pricing_timeline import approved_pricing_conflicts, get_approved_timeline
+from services.tracing import finish_trace, render_metrics, span, start_trace
+from services.profiling import (
+    PROFILE_SORT_KEYS,
+    PROFILE_TOKEN,
+    list_profiles,
+    load_profile_metadata,
+    profile_section,
+    profile_trigger,
+    save_profile,
+    top_functions,
+)
+from helpers.pricing_levels import parse_pricing_levels, build_price_rows, add_pricing_totals
 from validators.pricing_validator import validate_single_product_new
+from validators.opticat_xml_validator import OpticatXmlValidator
 from services.azure_service import generate_upload_sas
 from datetime import datetime
-import hashlib
+from functools import partial, wraps
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -16,7 +36,6 @@ load_dotenv()
 # ---------------------------------------
 app = Flask(__name__)
 app.secret_key = "fgi_vendor_portal_secret"   #change later
-app.config['SESSION_TYPE'] = 'filesystem'
 
 # Local upload path (Phase 1 temp before Azure)
 UPLOAD_FOLDER = os.path.join(os.getcwd(), "uploads")
@@ -25,6 +44,10 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
+# Single-product batches live server-side; the session only keeps the batch id
+BATCH_STORE_BACKEND = os.getenv("BATCH_STORE_BACKEND", "sqlite")
+batch_store = get_batch_store(BATCH_STORE_BACKEND, os.path.join(UPLOAD_FOLDER, "_batches"))
+
 # Azure Storage
 AZURE_CONNECTION_STRING = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
 AZURE_CONTAINER_NAME = "bronze"
@@ -33,6 +56,25 @@ if not AZURE_CONNECTION_STRING:
     print("⚠ WARNING: AZURE_STORAGE_CONNECTION_STRING is not set. "
           "Azure uploads will fail until you configure it.")
 
+# Submissions are processed by background workers fed from a local job queue
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Running jobs are requeued once their process misses heartbeats for this long
+JOB_STALE_AFTER_SECONDS = int(os.getenv("JOB_STALE_AFTER_SECONDS", "300"))
+job_queue = SQLiteJobQueue(os.path.join(UPLOAD_FOLDER, "_jobs", "jobs.db"))
+job_handlers = build_submission_handlers(AZURE_CONNECTION_STRING, UPLOAD_FOLDER)
+
+# Local catalog of published manifests (rebuild: scripts/rebuild_submission_index.py)
+submission_index = get_submission_index(UPLOAD_FOLDER)
+
+# Streaming mode: tee request files straight to Azure (hash + blocks + optional local archive)
+STREAM_UPLOADS = os.getenv("STREAM_UPLOADS", "0") == "1"
+# Keep local copies of streamed files; files the job must check (unified XLSX,
+# OptiCat pricing) are copied anyway and deleted once the job is done
+STREAM_KEEP_ARCHIVE = os.getenv("STREAM_KEEP_ARCHIVE", "1") == "1"
+
+# Opt-in cProfile captures of slow handlers (PROFILE_TOKEN / PROFILE_SAMPLE_RATE)
+PROFILE_FOLDER = os.path.join(UPLOAD_FOLDER, "_profiles")
+
 
 # def upload_single_product_excel_to_azure(vendor_name, local_path):
 #     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -41,6 +83,107 @@ if not AZURE_CONNECTION_STRING:
 #     return upload_blob(local_path, blob_path)
 
 
+def current_batch_id(create=False):
+    """
+    Return the batch id stored in the session, optionally starting a new batch.
+
+    Starting a batch also deletes batches abandoned for BATCH_TTL_SECONDS.
+    """
+    batch_id = session.get("batch_id")
+    if not batch_id and create:
+        expired = batch_store.expire()
+        if expired:
+            print(f"🧹 Deleted {expired} abandoned single-product batch(es)")
+        batch_id = new_batch_id()
+        session["batch_id"] = batch_id
+    return batch_id
+
+
+def clear_current_batch():
+    """
+    Drop the session's batch and delete its rows from the batch store.
+    """
+    batch_id = session.pop("batch_id", None)
+    if batch_id:
+        batch_store.clear(batch_id)
+
+
+def request_profile_token():
+    return request.headers.get("X-Profile") or request.args.get("profile")
+
+
+def profiled(view):
+    """
+    Profile a view with cProfile when the request carries PROFILE_TOKEN (as
+    X-Profile header or ?profile= query flag) or is sampled by
+    PROFILE_SAMPLE_RATE; the profile and request metadata go to
+    uploads/_profiles (see /profiles).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        trigger = profile_trigger(request_profile_token())
+        if trigger is None:
+            return view(*args, **kwargs)
+
+        started_at = datetime.now().isoformat(timespec="seconds")
+        error = None
+        with profile_section() as capture:
+            try:
+                response = app.make_response(view(*args, **kwargs))
+            except Exception as e:
+                error = e
+
+        if capture["profiler"] is None:
+            print(f"⚠ Profiling skipped for {request.endpoint}: another request is being profiled")
+        else:
+            payload = request.get_json(silent=True) if request.is_json else None
+            try:
+                save_profile(PROFILE_FOLDER, capture["profiler"], {
+                    "endpoint": request.endpoint,
+                    "method": request.method,
+                    "path": request.path,
+                    "vendor": request.form.get("vendor_name") or (payload or {}).get("vendor"),
+                    "trigger": trigger,
+                    "status": getattr(error, "code", 500) if error else response.status_code,
+                    "error": repr(error) if error else None,
+                    "duration_ms": round(capture["seconds"] * 1000, 3),
+                    "content_length": request.content_length,
+                    "started_at": started_at,
+                })
+            except Exception as e:
+                print(f"⚠ Could not save profile for {request.endpoint}: {e}")
+
+        if error is not None:
+            raise error
+        return response
+    return wrapper
+
+
+@app.before_request
+def start_job_workers():
+    ensure_job_workers(job_queue, job_handlers, num_workers=JOB_WORKERS,
+                       stale_after_seconds=JOB_STALE_AFTER_SECONDS)
+
+
+# Every request is traced when TRACING_ENABLED=1 (see services/tracing.py)
+@app.before_request
+def start_request_trace():
+    # Unrouted paths share one name so they cannot blow up the metric labels
+    g.trace_token = start_trace("request", request.endpoint or "unmatched", method=request.method)
+
+
+@app.after_request
+def finish_request_trace(response):
+    finish_trace(g.pop("trace_token", None), response.status_code)
+    return response
+
+
+@app.teardown_request
+def abort_request_trace(error):
+    # Only still open when the view raised before after_request ran
+    finish_trace(g.pop("trace_token", None), 500)
+
+
 # ---------------------------------------
 # ROUTES
 # ---------------------------------------
@@ -54,7 +197,84 @@ def index():
 def upload_page():
     return render_template('uploads.html')
 
+def submission_queued_response(job_id, message):
+    """
+    Respond to a queued submission: JSON for API clients, flash + redirect for the form.
+    """
+    status_url = url_for("job_status", job_id=job_id)
+
+    if request.accept_mimetypes.best == "application/json":
+        return {"job_id": job_id, "status_url": status_url}, 202
+
+    flash(f"{message} Job ID: {job_id}", "success")
+    return redirect(url_for("upload_page", job_id=job_id))
+
+
+def stream_request_file(file, vendor_name, subfolder, blob_path, on_chunk=None, checked=False):
+    """
+    Stream an uploaded file to Bronze, keeping a local archive copy if configured.
+
+    on_chunk, if given, sees every chunk as it is uploaded (e.g. a validator's feed).
+    A checked file (validated by the job from its local copy) always gets a
+    copy; without STREAM_KEEP_ARCHIVE the job deletes it when it finishes.
+    """
+    archive_path = None
+    if STREAM_KEEP_ARCHIVE or checked:
+        archive_path = local_upload_path(file, vendor_name, subfolder, app.config['UPLOAD_FOLDER'])
+
+    return upload_stream(
+        file.stream,
+        blob_path,
+        AZURE_CONNECTION_STRING,
+        AZURE_CONTAINER_NAME,
+        archive_path=archive_path,
+        on_chunk=on_chunk,
+    )
+
+
+def enqueue_streamed_submission(job_id, vendor_name, vendor_type, timestamp, blob_timestamp,
+                                uploads, uploaded_files, xml_validation=None):
+    """
+    Queue the manifest + marker job for files already streamed to Bronze.
+
+    Args:
+        job_id (str): Id from new_job_id(), also naming the archive folder
+        uploads (dict): Manifest key -> upload_stream result
+        xml_validation (dict, optional): Summary of the product XML validated
+            while it streamed
+    """
+    payload = {
+        "vendor_name": vendor_name,
+        "vendor_type": vendor_type,
+        "timestamp": timestamp,
+        "blob_timestamp": blob_timestamp,
+        "container_name": AZURE_CONTAINER_NAME,
+        "blobs": {key: upload["blob"] for key, upload in uploads.items()},
+        "files": {key: {"sha256": upload["sha256"], "size": upload["size"]} for key, upload in uploads.items()},
+        "archives": {key: upload["archive_path"] for key, upload in uploads.items()},
+        "uploaded_files": uploaded_files,
+        "xml_validation": xml_validation,
+    }
+    if not STREAM_KEEP_ARCHIVE:
+        # Local copies were only made for the job's checks
+        copies = [upload["archive_path"] for upload in uploads.values() if upload["archive_path"]]
+        if copies:
+            payload["job_folder"] = os.path.dirname(copies[0])
+    return job_queue.enqueue("streamed_submission", payload, job_id=job_id)
+
+
+def save_job_file(file, vendor_name, subfolder, job_id):
+    """
+    Save an uploaded file for a queued job in its own folder,
+    uploads/<vendor>/<subfolder>/<job id>/, so a later submission with the
+    same filename cannot replace it before the worker picks the job up.
+    The job handler deletes the folder when it finishes (payload job_folder).
+    """
+    return save_file(file, vendor_name, f"{subfolder}/{job_id}", app.config['UPLOAD_FOLDER'])
+
+
 @app.route('/upload', methods=['POST'])
+@profiled
 def upload_files():
     vendor_name = request.form.get('vendor_name')
     vendor_type = request.form.get('vendor_type')
@@ -72,60 +292,25 @@ def upload_files():
 
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
-        local_path = save_file(
-            approved_file,
-            vendor_name,
-            "pricing_review",
-            app.config["UPLOAD_FOLDER"]
-        )
-
-        try:
-            blob_path = (
-                f"approved/vendor={vendor_name}/pricing/"
-                f"{timestamp}_pricing.xlsx"
-            )
+        job_id = new_job_id()
+        local_path = save_job_file(approved_file, vendor_name, "pricing_review", job_id)
 
-            upload_blob(
-                local_path=local_path,
-                blob_path=blob_path,
-                connection_string=AZURE_CONNECTION_STRING,
-                container_name="silver"
-            )
-
-            # ---------------------------------------
-            # CREATE NOTIFY MARKER (Bronze)
-            # ---------------------------------------
-            marker_payload = {
-                "submission_type": "pricing_review",
-                "vendor": vendor_name,
-                "uploaded_file": approved_file.filename,
-                "reviewed_pricing_path": f"silver/approved/vendor={vendor_name}/pricing",
-                "uploaded_at": datetime.utcnow().isoformat() + "Z",
-                "action_required": "Run pricing pipeline"
-            }
-
-            marker_name = (
-                f"raw/notifymarker/"
-                f"{vendor_name}_{timestamp}.json"
-            )
+        job_queue.enqueue("pricing_review", {
+            "vendor_name": vendor_name,
+            "timestamp": timestamp,
+            "local_path": local_path,
+            "job_folder": os.path.dirname(local_path),
+            "uploaded_file": approved_file.filename,
+        }, job_id=job_id)
 
-            upload_json_blob(
-                data=marker_payload,
-                blob_path=marker_name,
-                connection_string=AZURE_CONNECTION_STRING,
-                container_name="bronze"
-            )
-
-
-            flash(f"Pricing review submitted for {vendor_name}.", "success")
-        except Exception as e:
-            flash(f"Pricing upload failed: {e}", "danger")
-
-        return redirect(url_for("upload_page"))
+        return submission_queued_response(
+            job_id, f"Pricing review for {vendor_name} received and queued for upload."
+        )
 
 
     # Shared
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    job_id = new_job_id()
 
     # -------------------------------
     # PROCESS OPTICAT VENDORS
@@ -138,61 +323,56 @@ def upload_files():
             flash('XML and Pricing XLSX are required for OptiCat vendors.', 'danger')
             return redirect(url_for('upload_page'))
 
-        # Save locally first
-        product_path = save_file(product_file, vendor_name, "opticat", app.config['UPLOAD_FOLDER'])
-        pricing_path = save_file(pricing_file, vendor_name, "opticat", app.config['UPLOAD_FOLDER'])
+        if STREAM_UPLOADS:
+            blob_timestamp = utc_timestamp()
+            xml_blob_path, pricing_blob_path = opticat_blob_paths(vendor_name, blob_timestamp)
+            xml_validator = OpticatXmlValidator()
 
-        try:
-            upload_to_azure_bronze_opticat(
-                vendor=vendor_name,
-                xml_local_path=product_path,
-                pricing_local_path=pricing_path,
-                connection_string=AZURE_CONNECTION_STRING,
-                container_name=AZURE_CONTAINER_NAME,
-                upload_folder=app.config['UPLOAD_FOLDER']
-            )
-            asset_blob_paths = request.form.getlist("asset_blob_path[]")
-
-            if asset_blob_paths:
-                latest_asset = asset_blob_paths[-1]
-
-                blob_service_client = BlobServiceClient.from_connection_string(AZURE_CONNECTION_STRING)
-                container_client = blob_service_client.get_container_client(AZURE_CONTAINER_NAME)
-
-            # ---------------------------------------
-            # CREATE NOTIFY MARKER (Vendor Submission)
-            # ---------------------------------------
-            marker_payload = {
-                "submission_type": "vendor_submission",
-                "vendor": vendor_name,
-                "vendor_type": "opticat",
-                "uploaded_files": [
-                    product_file.filename,
-                    pricing_file.filename
-                ],
-                "raw_vendor_path": f"raw/vendor={vendor_name}",
-                "uploaded_at": datetime.utcnow().isoformat() + "Z",
-                "next_step": "Data team to run vendor ingestion pipeline"
-            }
-
-            marker_name = (
-                f"raw/notifymarker/"
-                f"{vendor_name}_{timestamp}.json"
+            try:
+                xml_upload, pricing_upload = run_uploads_parallel([
+                    partial(stream_request_file, product_file, vendor_name, f"opticat/{job_id}", xml_blob_path,
+                            on_chunk=xml_validator.feed),
+                    partial(stream_request_file, pricing_file, vendor_name, f"opticat/{job_id}", pricing_blob_path,
+                            checked=True),
+                ])
+            except Exception as e:
+                flash(f'Azure upload failed: {e}', 'danger')
+                return redirect(url_for('upload_page'))
+
+            enqueue_streamed_submission(
+                job_id,
+                vendor_name,
+                "opticat",
+                timestamp,
+                blob_timestamp,
+                {"azure_xml_blob": xml_upload, "azure_pricing_blob": pricing_upload},
+                [product_file.filename, pricing_file.filename],
+                xml_validation=xml_validator.close(),
             )
-
-            upload_json_blob(
-                data=marker_payload,
-                blob_path=marker_name,
-                connection_string=AZURE_CONNECTION_STRING,
-                container_name="bronze"
+            return submission_queued_response(
+                job_id, f"OptiCat files for {vendor_name} uploaded to Azure."
             )
 
-
-            flash(f'OptiCat files for {vendor_name} uploaded successfully.', 'success')
-        except Exception as e:
-            flash(f'Azure upload failed: {e}', 'danger')
-
-        return redirect(url_for('upload_page'))
+        # Save locally first; the job worker uploads to Azure
+        product_path = save_job_file(product_file, vendor_name, "opticat", job_id)
+        pricing_path = save_job_file(pricing_file, vendor_name, "opticat", job_id)
+
+        job_queue.enqueue("opticat", {
+            "vendor_name": vendor_name,
+            "timestamp": timestamp,
+            "container_name": AZURE_CONTAINER_NAME,
+            "product_path": product_path,
+            "pricing_path": pricing_path,
+            "job_folder": os.path.dirname(product_path),
+            "uploaded_files": [
+                product_file.filename,
+                pricing_file.filename
+            ],
+        }, job_id=job_id)
+
+        return submission_queued_response(
+            job_id, f"OptiCat files for {vendor_name} received and queued for upload."
+        )
 
     # -------------------------------
     # PROCESS NON-OPTICAT VENDORS
@@ -204,82 +384,164 @@ def upload_files():
             flash('A unified XLSX file is required for Non-OptiCat vendors.', 'danger')
             return redirect(url_for('upload_page'))
 
-        # Save unified vendor file
-        unified_path = save_file(unified_file, vendor_name, "non_opticat", app.config['UPLOAD_FOLDER'])
+        if STREAM_UPLOADS:
+            blob_timestamp = utc_timestamp()
 
-        try:
-            upload_to_azure_bronze_non_opticat(
-                vendor=vendor_name,
-                unified_local_path=unified_path,
-                connection_string=AZURE_CONNECTION_STRING,
-                container_name=AZURE_CONTAINER_NAME,
-                upload_folder=app.config['UPLOAD_FOLDER']
+            try:
+                unified_upload = stream_request_file(
+                    unified_file,
+                    vendor_name,
+                    f"non_opticat/{job_id}",
+                    non_opticat_blob_path(vendor_name, blob_timestamp),
+                    checked=True,
+                )
+            except Exception as e:
+                flash(f'Azure upload failed: {e}', 'danger')
+                return redirect(url_for('upload_page'))
+
+            enqueue_streamed_submission(
+                job_id,
+                vendor_name,
+                "non-opticat",
+                timestamp,
+                blob_timestamp,
+                {"azure_unified_blob": unified_upload},
+                [unified_file.filename],
             )
-            asset_blob_paths = request.form.getlist("asset_blob_path[]")
-
-            if asset_blob_paths:
-                latest_asset = asset_blob_paths[-1]
-
-                blob_service_client = BlobServiceClient.from_connection_string(AZURE_CONNECTION_STRING)
-                container_client = blob_service_client.get_container_client(AZURE_CONTAINER_NAME)
-
-            # ---------------------------------------
-            # CREATE NOTIFY MARKER (Vendor Submission)
-            # ---------------------------------------
-            marker_payload = {
-                "submission_type": "vendor_submission",
-                "vendor": vendor_name,
-                "vendor_type": "non-opticat",
-                "uploaded_files": [
-                    unified_file.filename
-                ],
-                "raw_vendor_path": f"raw/vendor={vendor_name}",
-                "uploaded_at": datetime.utcnow().isoformat() + "Z",
-                "next_step": "Data team to run vendor ingestion pipeline"
-            }
-
-            marker_name = (
-                f"raw/notifymarker/"
-                f"{vendor_name}_{timestamp}.json"
+            return submission_queued_response(
+                job_id, f"Unified file for {vendor_name} uploaded to Azure."
             )
 
-            upload_json_blob(
-                data=marker_payload,
-                blob_path=marker_name,
-                connection_string=AZURE_CONNECTION_STRING,
-                container_name="bronze"
-            )
-
-
-            flash(f'Unified file for {vendor_name} uploaded successfully.', 'success')
-        except Exception as e:
-            flash(f'Azure upload failed: {e}', 'danger')
-
-        return redirect(url_for('upload_page'))
+        # Save unified vendor file; the job worker uploads to Azure
+        unified_path = save_job_file(unified_file, vendor_name, "non_opticat", job_id)
+
+        job_queue.enqueue("non_opticat", {
+            "vendor_name": vendor_name,
+            "timestamp": timestamp,
+            "container_name": AZURE_CONTAINER_NAME,
+            "unified_path": unified_path,
+            "job_folder": os.path.dirname(unified_path),
+            "uploaded_files": [
+                unified_file.filename
+            ],
+        }, job_id=job_id)
+
+        return submission_queued_response(
+            job_id, f"Unified file for {vendor_name} received and queued for upload."
+        )
 
     else:
         flash("Unknown vendor type.", "danger")
         return redirect(url_for("upload_page"))
 
-@app.route("/api/get-asset-upload-sas", methods=["POST"])
-def get_asset_upload_sas():
-    data = request.json
 
-    vendor = data.get("vendor")
-    sku = data.get("sku")
-    filename = data.get("filename")
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """
+    Span, byte and Azure call metrics in Prometheus text format (empty unless
+    TRACING_ENABLED=1).
+    """
+    return Response(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
-    if not vendor or not filename:
-        return {"error": "Missing vendor or filename"}, 400
 
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+def profile_viewer_denied():
+    """
+    Return an error response unless the request carries PROFILE_TOKEN.
+
+    Without a PROFILE_TOKEN the viewer does not exist (404), even when
+    sampled profiles are being saved.
+    """
+    if not PROFILE_TOKEN:
+        return {"error": "Not found"}, 404
+    if not hmac.compare_digest(request_profile_token() or "", PROFILE_TOKEN):
+        return {"error": "Profile token required"}, 403
+    return None
+
+
+@app.route("/profiles", methods=["GET"])
+def profile_list():
+    denied = profile_viewer_denied()
+    if denied:
+        return denied
+    return {"profiles": list_profiles(PROFILE_FOLDER)}
+
+
+@app.route("/profiles/<profile_id>", methods=["GET"])
+def profile_detail(profile_id):
+    """
+    Top functions of one profile: ?sort=cumulative|tottime|calls, ?limit=N.
+    """
+    denied = profile_viewer_denied()
+    if denied:
+        return denied
+
+    sort = request.args.get("sort", "cumulative")
+    if sort not in PROFILE_SORT_KEYS:
+        return {"error": f"sort must be one of {', '.join(PROFILE_SORT_KEYS)}"}, 400
+    limit = request.args.get("limit", 30, type=int)
+
+    functions = top_functions(PROFILE_FOLDER, profile_id, limit=max(limit, 1), sort=sort)
+    if functions is None:
+        return {"error": "Unknown profile id"}, 404
+
+    return {
+        "profile": load_profile_metadata(PROFILE_FOLDER, profile_id),
+        "sort": sort,
+        "functions": functions,
+    }
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return {"error": "Unknown job id"}, 404
+    return job
+
+@app.route("/api/submissions", methods=["GET"])
+def submission_history():
+    vendor = request.args.get("vendor")
+    if not vendor:
+        return {"error": "Missing vendor"}, 400
+
+    if request.args.get("latest") == "1":
+        return {"submission": submission_index.latest(vendor, request.args.get("vendor_type"))}
+
+    return {
+        "submissions": submission_index.history(
+            vendor,
+            since=request.args.get("since"),
+            limit=request.args.get("limit", 100, type=int),
+        )
+    }
+
+@app.route("/api/submissions/pending-markers", methods=["GET"])
+def pending_notify_markers():
+    return {"submissions": submission_index.pending_markers()}
+
+@app.route("/api/azure-cache-stats", methods=["GET"])
+def azure_cache_stats():
+    return {
+        "client_pool": get_client_pool_stats(),
+        "blob_listing": get_listing_cache_stats(),
+    }
+
+# Max files per /api/get-asset-upload-sas-batch call
+MAX_SAS_BATCH = 100
 
+def asset_upload_target(vendor, filename, timestamp):
+    """
+    Return the blob path and write SAS URL for one browser asset upload.
+    """
     blob_path = (
         f"raw/vendor={vendor}/assets/"
         f"{timestamp}_{filename}"
     )
     print("🔐 Generating SAS for:", blob_path)
 
+    # The browser is about to add a blob under this vendor's assets prefix
+    invalidate_blob_listing(AZURE_CONTAINER_NAME, blob_path)
+
     sas_url = generate_upload_sas(
         container=AZURE_CONTAINER_NAME,
         blob_path=blob_path
@@ -290,6 +552,47 @@ def get_asset_upload_sas():
         "blob_path": blob_path
     }
 
+@app.route("/api/get-asset-upload-sas", methods=["POST"])
+def get_asset_upload_sas():
+    data = request.json
+
+    vendor = data.get("vendor")
+    sku = data.get("sku")
+    filename = data.get("filename")
+
+    if not vendor or not filename:
+        return {"error": "Missing vendor or filename"}, 400
+
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+
+    return asset_upload_target(vendor, filename, timestamp)
+
+@app.route("/api/get-asset-upload-sas-batch", methods=["POST"])
+def get_asset_upload_sas_batch():
+    data = request.json
+
+    vendor = data.get("vendor")
+    filenames = data.get("filenames")
+
+    if not vendor or not isinstance(filenames, list) or not filenames:
+        return {"error": "Missing vendor or filenames"}, 400
+    if len(filenames) > MAX_SAS_BATCH:
+        return {"error": f"At most {MAX_SAS_BATCH} files per batch"}, 400
+    if not all(isinstance(name, str) and name for name in filenames):
+        return {"error": "Filenames must be non-empty strings"}, 400
+    if len(set(filenames)) != len(filenames):
+        # Same timestamp for the whole batch: duplicate names would share a blob
+        return {"error": "Duplicate filenames in batch"}, 400
+
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+
+    return {
+        "uploads": [
+            {"filename": filename, **asset_upload_target(vendor, filename, timestamp)}
+            for filename in filenames
+        ]
+    }
+
 @app.route('/download-template')
 def download_template():
     try:
@@ -306,24 +609,13 @@ def form_submission_help():
 @app.route('/single-product', methods=['GET'])
 def single_product_page():
     if request.args.get("reset") == "1":
-        for k in [
-            "pending_products",
-            "batch_item_rows",
-            "batch_desc_rows",
-            "batch_ext_rows",
-            "batch_attr_rows",
-            "batch_interchange_rows",
-            "batch_package_rows",
-            "batch_asset_rows",
-            "batch_price_rows",
-            "latest_single_products_excel_path",
-        ]:
-            session.pop(k, None)
-
+        clear_current_batch()
+        session.pop("latest_single_products_excel_path", None)
         session.pop("single_vendor_name", None)
         session.modified = True
 
-    pending = session.get("pending_products", [])
+    batch_id = current_batch_id()
+    pending = batch_store.get(batch_id, "pending_products") if batch_id else []
     vendor_prefill = session.get("single_vendor_name", "")
 
     excel_path = session.get("latest_single_products_excel_path")
@@ -347,57 +639,42 @@ def single_product_page():
 
 
 @app.route('/single-product', methods=['POST'])
+@profiled
 def submit_single_product():
     action = request.form.get("action")
 
-    # ---- Pull batch lists from session (single source of truth) ----
-    item_rows        = session.get("batch_item_rows", [])
-    desc_rows        = session.get("batch_desc_rows", [])
-    ext_rows         = session.get("batch_ext_rows", [])
-    attr_rows        = session.get("batch_attr_rows", [])
-    interchange_rows = session.get("batch_interchange_rows", [])
-    package_rows     = session.get("batch_package_rows", [])
-    asset_rows       = session.get("batch_asset_rows", [])
-    price_rows       = session.get("batch_price_rows", [])
-    pending          = session.get("pending_products", [])
+    batch_id = current_batch_id(create=True)
 
     # ==========================================================
     # GENERATE (READ-ONLY): do NOT parse request.form product data
     # ==========================================================
     if action == "generate":
-        if not price_rows:
+        batch = batch_store.get_all(batch_id)
+        if not batch["batch_price_rows"]:
             flash("At least one pricing row is required to generate Excel.", "danger")
             return redirect(url_for('single_product_page'))
 
         output_dir = os.path.join(app.config['UPLOAD_FOLDER'], "single_product_batches")
 
+        # EHC totals and tier coverage in one pass over the whole batch
+        with span("add_pricing_totals", rows=len(batch["batch_price_rows"])):
+            add_pricing_totals(batch["batch_price_rows"])
+
         excel_path = create_multi_product_excel(
-            item_rows,
-            desc_rows,
-            ext_rows,
-            attr_rows,
-            interchange_rows,
-            package_rows,
-            asset_rows,
-            price_rows,
+            batch["batch_item_rows"],
+            batch["batch_desc_rows"],
+            batch["batch_ext_rows"],
+            batch["batch_attr_rows"],
+            batch["batch_interchange_rows"],
+            batch["batch_package_rows"],
+            batch["batch_asset_rows"],
+            batch["batch_price_rows"],
             output_dir,
         )
         session['latest_single_products_excel_path'] = excel_path
 
         # Clear batch after generation
-        for k in [
-            "batch_item_rows",
-            "batch_desc_rows",
-            "batch_ext_rows",
-            "batch_attr_rows",
-            "batch_interchange_rows",
-            "batch_package_rows",
-            "batch_asset_rows",
-            "batch_price_rows",
-            "pending_products",
-        ]:
-            session[k] = []
-
+        clear_current_batch()
         session.pop("single_vendor_name", None)
 
         session.modified = True
@@ -412,7 +689,10 @@ def submit_single_product():
         flash("Unknown action.", "danger")
         return redirect(url_for('single_product_page'))
 
-    ok, errors = validate_single_product_new(request.form)
+    # Pricing levels are parsed once and shared by validation and row building
+    with span("validate_single_product"):
+        pricing_levels = parse_pricing_levels(request.form)
+        ok, errors = validate_single_product_new(request.form, pricing_levels)
     if not ok:
         for e in errors:
             flash(e, "danger")
@@ -433,6 +713,16 @@ def submit_single_product():
     product_status = request.form.get("product_status", "").strip()
     session['single_vendor_name'] = vendor_name
 
+    # ---- Rows for this product only; appended to the server-side batch ----
+    item_rows        = []
+    desc_rows        = []
+    ext_rows         = []
+    attr_rows        = []
+    interchange_rows = []
+    package_rows     = []
+    asset_rows       = []
+    pending          = []
+
     # --------- SECTION 1: Item Master row ----------
     unspsc = request.form.get("unspsc_code", "").strip()
     hazmat = request.form.get("hazmat_flag", "").strip()
@@ -442,8 +732,7 @@ def submit_single_product():
     quantity_size = request.form.get("quantity_size", "").strip()
     vmrs = request.form.get("vmrs_code", "").strip()
 
-    existing_skus = {r["Part Number"] for r in item_rows}
-    if sku in existing_skus:
+    if batch_store.has_sku(batch_id, sku):
         flash(f"SKU '{sku}' is already in the batch.", "danger")
         return redirect(url_for("single_product_page"))
 
@@ -606,265 +895,22 @@ def submit_single_product():
 
 
     # --------- SECTION 8: Pricing (multi-level) ----------
-    level_types = request.form.getlist("level_type[]")
-    level_price_change_types = request.form.getlist("level_price_change_type[]")
-    level_moq_uoms = request.form.getlist("level_moq_uom[]")
-    level_moq_qtys = request.form.getlist("level_moq_qty[]")
-    level_currencies = request.form.getlist("level_currency[]")
-    level_methods = request.form.getlist("level_pricing_method[]")
-    level_tier_min_qtys = request.form.getlist("level_tier_min_qty[]")
-    level_tier_max_qtys = request.form.getlist("level_tier_max_qty[]")
-
-    net_list = request.form.getlist("level_net_list_price[]")
-    net_costs = request.form.getlist("level_net_net_cost[]")
-    net_effective_dates = request.form.getlist("level_net_effective_date[]")
-
-    pl_list = request.form.getlist("level_pl_list_price[]")
-    pl_jobber = request.form.getlist("level_pl_jobber_price[]")
-    pl_net = request.form.getlist("level_pl_net_cost[]")
-    pl_effective_dates = request.form.getlist("level_pl_effective_date[]")
-
-    db_base = request.form.getlist("level_db_base_price[]")
-    db_discount = request.form.getlist("level_db_discount_pct[]")
-    db_list_opt = request.form.getlist("level_db_list_price_opt[]")
-    db_effective_dates = request.form.getlist("level_db_effective_date[]")
-
-    ehc_base = request.form.getlist("level_ehc_base_price[]")
-    ehc_cb = request.form.getlist("level_ehc_canadian_blue[]")
-    ehc_qty_case = request.form.getlist("level_ehc_qty_case[]")
-    ehc_upc_each = request.form.getlist("level_ehc_upc_each[]")
-    ehc_upc_case = request.form.getlist("level_ehc_upc_case[]")
-    ehc_moq = request.form.getlist("level_ehc_moq[]")
-
-    ehc_abmbsk_each = request.form.getlist("level_ehc_abmbsk_each[]")
-    ehc_abmbsk_case = request.form.getlist("level_ehc_abmbsk_case[]")
-    ehc_bc_each = request.form.getlist("level_ehc_bc_each[]")
-    ehc_bc_case = request.form.getlist("level_ehc_bc_case[]")
-    ehc_nl_each = request.form.getlist("level_ehc_nl_each[]")
-    ehc_nl_case = request.form.getlist("level_ehc_nl_case[]")
-    ehc_ns_each = request.form.getlist("level_ehc_ns_each[]")
-    ehc_ns_case = request.form.getlist("level_ehc_ns_case[]")
-    ehc_nbqc_each = request.form.getlist("level_ehc_nbqc_each[]")
-    ehc_nbqc_case = request.form.getlist("level_ehc_nbqc_case[]")
-    ehc_pei_each = request.form.getlist("level_ehc_pei_each[]")
-    ehc_pei_case = request.form.getlist("level_ehc_pei_case[]")
-    ehc_yk_each = request.form.getlist("level_ehc_yk_each[]")
-    ehc_yk_case = request.form.getlist("level_ehc_yk_case[]")
-
-    pr_price = request.form.getlist("level_pr_promo_price[]")
-    pr_start = request.form.getlist("level_pr_start_date[]")
-    pr_end = request.form.getlist("level_pr_end_date[]")
-
-    qt_price = request.form.getlist("level_qt_price[]")
-    qt_number = request.form.getlist("level_qt_number[]")
-    qt_start = request.form.getlist("level_qt_start_date[]")
-    qt_end = request.form.getlist("level_qt_end_date[]")
-
-    td_price = request.form.getlist("level_td_price[]")
-    td_number = request.form.getlist("level_td_number[]")
-    td_start = request.form.getlist("level_td_start_date[]")
-    td_end = request.form.getlist("level_td_end_date[]")
-
-    cp_price = request.form.getlist("level_core_list_price[]")
-    cp_part_number = request.form.getlist("level_core_part_number[]")
-
-    n_levels = len(level_types)
-
-    def pad(lst):
-        return lst + [""] * (n_levels - len(lst))
-
-    level_price_change_types = pad(level_price_change_types)
-    level_moq_uoms = pad(level_moq_uoms)
-    level_moq_qtys = pad(level_moq_qtys)
-    level_currencies = pad(level_currencies)
-    level_methods = pad(level_methods)
-    level_tier_min_qtys = pad(level_tier_min_qtys)
-    level_tier_max_qtys = pad(level_tier_max_qtys)
-
-    net_list = pad(net_list)
-    net_costs = pad(net_costs)
-    net_effective_dates = pad(net_effective_dates)
-    pl_list = pad(pl_list)
-    pl_jobber = pad(pl_jobber)
-    pl_net = pad(pl_net)
-    pl_effective_dates = pad(pl_effective_dates)
-    db_base = pad(db_base)
-    db_discount = pad(db_discount)
-    db_list_opt = pad(db_list_opt)
-    db_effective_dates = pad(db_effective_dates)
-    ehc_base = pad(ehc_base)
-    ehc_cb = pad(ehc_cb)
-    ehc_qty_case = pad(ehc_qty_case)
-    ehc_upc_each = pad(ehc_upc_each)
-    ehc_upc_case = pad(ehc_upc_case)
-    ehc_moq = pad(ehc_moq)
-    ehc_abmbsk_each = pad(ehc_abmbsk_each)
-    ehc_abmbsk_case = pad(ehc_abmbsk_case)
-    ehc_bc_each = pad(ehc_bc_each)
-    ehc_bc_case = pad(ehc_bc_case)
-    ehc_nl_each = pad(ehc_nl_each)
-    ehc_nl_case = pad(ehc_nl_case)
-    ehc_ns_each = pad(ehc_ns_each)
-    ehc_ns_case = pad(ehc_ns_case)
-    ehc_nbqc_each = pad(ehc_nbqc_each)
-    ehc_nbqc_case = pad(ehc_nbqc_case)
-    ehc_pei_each = pad(ehc_pei_each)
-    ehc_pei_case = pad(ehc_pei_case)
-    ehc_yk_each = pad(ehc_yk_each)
-    ehc_yk_case = pad(ehc_yk_case)
-    pr_price = pad(pr_price)
-    pr_start = pad(pr_start)
-    pr_end = pad(pr_end)
-    qt_price = pad(qt_price)
-    qt_number = pad(qt_number)
-    qt_start = pad(qt_start)
-    qt_end = pad(qt_end)
-    td_price = pad(td_price)
-    td_number = pad(td_number)
-    td_start = pad(td_start)
-    td_end = pad(td_end)
-    cp_price = pad(cp_price)
-    cp_part_number = pad(cp_part_number)
-
-    pricing_method_labels_set = set()
-
-    for i in range(n_levels):
-        lvl_type = (level_types[i] or "").strip()
-        lvl_change = (level_price_change_types[i] or "").strip() or "A"
-        lvl_moq_uom = (level_moq_uoms[i] or "").strip()
-        lvl_moq_qty = (level_moq_qtys[i] or "").strip()
-        lvl_currency = (level_currencies[i] or "").strip()
-        lvl_method = (level_methods[i] or "").strip()
-
-        if not (
-            lvl_type or lvl_method or lvl_currency or lvl_moq_uom or lvl_moq_qty
-            or net_list[i] or net_costs[i] or net_effective_dates[i]
-            or pl_list[i] or pl_jobber[i] or pl_net[i] or pl_effective_dates[i]
-            or db_base[i] or db_discount[i] or db_effective_dates[i]
-            or ehc_base[i] or pr_price[i] or qt_price[i] or td_price[i] or cp_part_number[i] or cp_price[i]
-        ):
-            continue
-
-        method_label = PRICING_METHODS.get(lvl_method, lvl_method)
-        pricing_method_labels_set.add(method_label)
-
-        row = {
-            "Vendor": vendor_name,
-            "Part Number": sku,
-            "Pricing Method": method_label,
-            "Currency": lvl_currency,
-            "MOQ Unit": lvl_moq_uom,
-            "MOQ": lvl_moq_qty,
-            "Pricing Change Type": lvl_change,
-            "Pricing Type": lvl_type,  # Each / Case / Pallet / Bulk
-            "List Price": "",
-            "Jobber Price": "",
-            "Discount %": "",
-            "Multiplier": "",
-            "Pricing Amount": "",
-            "Tier Min Qty": (level_tier_min_qtys[i] or "").strip(),
-            "Tier Max Qty": (level_tier_max_qtys[i] or "").strip(),
-            "Effective Date": "",
-            "Start Date": "",
-            "End Date": "",
-            "Core Part Number": "",
-            "Core Cost": "",
-            # --- EHC FIELDS ---
-            "EHC AB_MB_SK Each": "",
-            "EHC AB_MB_SK Case": "",
-            "EHC BC Each": "",
-            "EHC BC Case": "",
-            "EHC NL Each": "",
-            "EHC NL Case": "",
-            "EHC NS Each": "",
-            "EHC NS Case": "",
-            "EHC NB_QC Each": "",
-            "EHC NB_QC Case": "",
-            "EHC PEI Each": "",
-            "EHC PEI Case": "",
-            "EHC YK Each": "",
-            "EHC YK Case": "",
-            "Notes": "",
-        }
-
-        if lvl_method == "net_cost":
-            row["List Price"] = (net_list[i] or "").strip()
-            row["Pricing Amount"] = row["Net Price"] = (net_costs[i] or "").strip()
-            row["Effective Date"] = (net_effective_dates[i] or "").strip()
-
-        elif lvl_method == "price_levels":
-            row["List Price"] = (pl_list[i] or "").strip()
-            row["Jobber Price"] = (pl_jobber[i] or "").strip()
-            row["Pricing Amount"] = row["Net Price"] = (pl_net[i] or "").strip()
-            row["Effective Date"] = (pl_effective_dates[i] or "").strip()
-
-        elif lvl_method == "discount_based":
-            base_val = (db_base[i] or "").strip()
-            disc_val = (db_discount[i] or "").strip()
-            row["List Price"] = (db_list_opt[i] or "").strip()
-            row["Discount %"] = disc_val
-            try:
-                b = float(base_val)
-                d = float(disc_val) if disc_val else 0.0
-                net_val = b * (1 - d)
-                row["Pricing Amount"] = row["Net Price"] = f"{net_val:.4f}"
-            except ValueError:
-                row["Pricing Amount"] = row["Net Price"] = base_val
-            row["Effective Date"] = (db_effective_dates[i] or "").strip()
-
-        elif lvl_method == "ehc_based":
-            base = (ehc_base[i] or "").strip()
-            row["Pricing Amount"] = base
-
-            row["EHC AB_MB_SK Each"] = (ehc_abmbsk_each[i] or "").strip()
-            row["EHC AB_MB_SK Case"] = (ehc_abmbsk_case[i] or "").strip()
-            row["EHC BC Each"] = (ehc_bc_each[i] or "").strip()
-            row["EHC BC Case"] = (ehc_bc_case[i] or "").strip()
-            row["EHC NL Each"] = (ehc_nl_each[i] or "").strip()
-            row["EHC NL Case"] = (ehc_nl_case[i] or "").strip()
-            row["EHC NS Each"] = (ehc_ns_each[i] or "").strip()
-            row["EHC NS Case"] = (ehc_ns_case[i] or "").strip()
-            row["EHC NB_QC Each"] = (ehc_nbqc_each[i] or "").strip()
-            row["EHC NB_QC Case"] = (ehc_nbqc_case[i] or "").strip()
-            row["EHC PEI Each"] = (ehc_pei_each[i] or "").strip()
-            row["EHC PEI Case"] = (ehc_pei_case[i] or "").strip()
-            row["EHC YK Each"] = (ehc_yk_each[i] or "").strip()
-            row["EHC YK Case"] = (ehc_yk_case[i] or "").strip()
-
-            row["Notes"] = "EHC fees provided by region."
-
-
-        elif lvl_method == "promo_pricing":
-            row["Pricing Amount"] = (pr_price[i] or "").strip()
-            row["Start Date"] = (pr_start[i] or "").strip()
-            row["End Date"] = (pr_end[i] or "").strip()
-
-        elif lvl_method == "quote_pricing":
-            row["Pricing Amount"] = (qt_price[i] or "").strip()
-            row["Start Date"] = (qt_start[i] or "").strip()
-            row["End Date"] = (qt_end[i] or "").strip()
-            qn = (qt_number[i] or "").strip()
-            if qn:
-                row["Notes"] = f"Quote #: {qn}"
-
-        elif lvl_method == "tender_pricing":
-            row["Pricing Amount"] = (td_price[i] or "").strip()
-            row["Start Date"] = (td_start[i] or "").strip()
-            row["End Date"] = (td_end[i] or "").strip()
-            tn = (td_number[i] or "").strip()
-            if tn:
-                row["Notes"] = f"Tender #: {tn}"
-        
-        elif lvl_method == "core_pricing":
-            row["Core Cost"] = (cp_price[i] or "").strip()
-            row["Core Part Number"] = (cp_part_number[i] or "").strip()
-
-        price_rows.append(row)
+    with span("build_price_rows", levels=pricing_levels["count"]):
+        price_rows, pricing_method_labels_set = build_price_rows(pricing_levels, vendor_name, sku)
 
     pricing_method_label_summary = (
         ", ".join(sorted(pricing_method_labels_set)) if pricing_method_labels_set else ""
     )
 
+    # Dates colliding with the vendor's last approved pricing are flagged, not rejected
+    with span("approved_pricing_conflicts"):
+        approved_timeline = get_approved_timeline(UPLOAD_FOLDER, vendor_name)
+        if approved_timeline is not None:
+            used_levels = [i for i in range(pricing_levels["count"]) if pricing_levels["used"][i]]
+            for conflict in approved_pricing_conflicts(
+                price_rows, used_levels, approved_timeline, describe=lambda i: f"Pricing Level {i + 1}"
+            ):
+                flash(f"Pricing Level {conflict['ref'] + 1}: {conflict['message']}", "warning")
 
     # --------- Update pending products summary (for UI table) ----------
     pending.append({
@@ -874,24 +920,100 @@ def submit_single_product():
         "pricing_method": pricing_method_label_summary,
     })
 
-# -------- SAVE batch back to session (single write) --------
-    session.update({
-        "batch_item_rows": item_rows,
-        "batch_desc_rows": desc_rows,
-        "batch_ext_rows": ext_rows,
-        "batch_attr_rows": attr_rows,
-        "batch_interchange_rows": interchange_rows,
-        "batch_package_rows": package_rows,
-        "batch_asset_rows": asset_rows,
-        "batch_price_rows": price_rows,
-        "pending_products": pending,
-    })
+    # -------- APPEND to batch store (single write) --------
+    # The same SKU may have been added by another tab since the check above
+    try:
+        with span("batch_store_append"):
+            batch_store.append(batch_id, {
+                "batch_item_rows": item_rows,
+                "batch_desc_rows": desc_rows,
+                "batch_ext_rows": ext_rows,
+                "batch_attr_rows": attr_rows,
+                "batch_interchange_rows": interchange_rows,
+                "batch_package_rows": package_rows,
+                "batch_asset_rows": asset_rows,
+                "batch_price_rows": price_rows,
+                "pending_products": pending,
+            })
+    except DuplicateSkuError as e:
+        flash(str(e), "danger")
+        return redirect(url_for("single_product_page"))
     session.modified = True
 
     flash(f"Product {sku} added to batch. You can add more or Generate Excel.", "success")
     return redirect(url_for('single_product_page', generated=1))
 
 
+# Row errors shown as flash messages after a bulk import (full list via JSON)
+IMPORT_ERRORS_SHOWN = 20
+
+
+def remove_import_file(local_path):
+    """
+    Delete an uploaded import file and its timestamp folder once empty.
+    """
+    try:
+        os.remove(local_path)
+        os.rmdir(os.path.dirname(local_path))
+    except OSError:
+        pass  # folder shared with another import of the same second
+
+
+@app.route('/single-product/import', methods=['POST'])
+def import_single_products():
+    """
+    Bulk-add products to the current batch from a CSV / XLSX file.
+
+    Valid products are appended; invalid ones are reported per row.
+    """
+    file = request.files.get("import_file")
+    if not file or not file.filename:
+        flash("Please choose a CSV or XLSX file to import.", "danger")
+        return redirect(url_for("single_product_page"))
+
+    if not allowed_import_file(file.filename):
+        flash("Import file must be .csv or .xlsx", "danger")
+        return redirect(url_for("single_product_page"))
+
+    batch_id = current_batch_id(create=True)
+    vendor_name = session.get("single_vendor_name", "")
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    local_path = save_file(file, vendor_name or "_unassigned", f"single_product_imports/{timestamp}", UPLOAD_FOLDER)
+
+    # The rows end up in the batch store; the uploaded file is not kept
+    try:
+        report = import_products(
+            local_path, batch_store, batch_id, batch_store.skus(batch_id), vendor=vendor_name,
+            approved_timeline=partial(get_approved_timeline, UPLOAD_FOLDER),
+        )
+    finally:
+        remove_import_file(local_path)
+
+    if report["vendor"]:
+        session["single_vendor_name"] = report["vendor"]
+    session.modified = True
+
+    print(f"📥 Bulk import {file.filename}: {report['imported']} imported, {report['failed']} failed")
+
+    if request.accept_mimetypes.best == "application/json":
+        return report, 200
+
+    if report["imported"]:
+        flash(f"{report['imported']} product(s) added to batch from {file.filename}.", "success")
+    if report["failed"]:
+        flash(f"{report['failed']} product(s) were not imported:", "danger")
+        for error in report["errors"][:IMPORT_ERRORS_SHOWN]:
+            flash(f"{error['sheet']} row {error['row']} ({error['sku']}): {error['message']}", "danger")
+        if len(report["errors"]) > IMPORT_ERRORS_SHOWN:
+            flash(f"... and {len(report['errors']) - IMPORT_ERRORS_SHOWN} more error(s).", "danger")
+    for warning in report["warnings"][:IMPORT_ERRORS_SHOWN]:
+        flash(f"{warning['sheet']} row {warning['row']} ({warning['sku']}): {warning['message']}", "warning")
+    if not report["imported"] and not report["failed"]:
+        flash("No products found in the import file.", "warning")
+
+    return redirect(url_for("single_product_page", generated=1))
+
+
 @app.route('/download-single-products-excel')
 def download_single_products_excel():
     excel_path = session.get('latest_single_products_excel_path')
@@ -906,20 +1028,8 @@ def download_single_products_excel():
     response = send_from_directory(directory, filename, as_attachment=True)
 
     # ---- CLEAR SINGLE PRODUCT SESSION STATE (AFTER response prepared) ----
-    for k in [
-        "batch_item_rows",
-        "batch_desc_rows",
-        "batch_ext_rows",
-        "batch_attr_rows",
-        "batch_interchange_rows",
-        "batch_package_rows",
-        "batch_asset_rows",
-        "batch_price_rows",
-        "pending_products",
-        "latest_single_products_excel_path",
-    ]:
-        session.pop(k, None)
-
+    clear_current_batch()
+    session.pop("latest_single_products_excel_path", None)
     session.pop("single_vendor_name", None)
     session.modified = True
 
@@ -928,40 +1038,74 @@ def download_single_products_excel():
     
 
 @app.route("/api/check-asset-hash", methods=["POST"])
+@profiled
 def check_asset_hash():
+    """
+    Tell the browser whether an asset ZIP is already in Bronze.
+
+    Request (block hash scheme, used by uploads.html):
+        vendor, filename, hash_scheme ("sha256-blocks-v1"), block_size,
+        block_hashes (hex SHA-256 of every block_size block)
+    Request (legacy): vendor, filename, file_hash (SHA-256 of the whole file)
+
+    Response: skip, existing_blob_path if skipped and, for the block scheme,
+    root plus reusable_blocks (source_blob_path, source_url and
+    [block index, source block index] pairs) if a previous upload shares blocks.
+    """
     data = request.json
 
     vendor = data.get("vendor")
     client_hash = data.get("file_hash")
     filename = data.get("filename")  # 👈 NEW
+    hash_scheme = data.get("hash_scheme")
 
-    if not vendor or not client_hash or not filename:
+    if not vendor or not filename or not (client_hash or hash_scheme):
         return {"skip": False}
 
-    blob_service = BlobServiceClient.from_connection_string(
-        os.getenv("AZURE_STORAGE_CONNECTION_STRING")
-    )
-    container_client = blob_service.get_container_client(AZURE_CONTAINER_NAME)
+    container_client = get_container_client(AZURE_CONNECTION_STRING, AZURE_CONTAINER_NAME)
+    vendor_folder = f"vendor={vendor}"
 
-    prefix = f"raw/vendor={vendor}/assets/"
+    if hash_scheme:
+        block_hashes = data.get("block_hashes")
+        block_size = data.get("block_size")
+        if (hash_scheme != ASSET_HASH_SCHEME or not isinstance(block_hashes, list)
+                or not isinstance(block_size, int) or block_size <= 0):
+            return {"error": f"Unsupported hash scheme; expected {ASSET_HASH_SCHEME}"}, 400
 
-    blobs = list(container_client.list_blobs(name_starts_with=prefix))
-    if not blobs:
-        return {"skip": False}
+        try:
+            if not all(isinstance(h, str) and len(h) == 64 for h in block_hashes):
+                raise ValueError
+            root = block_hash_root(block_hashes)
+        except ValueError:
+            return {"error": "block_hashes must be hex SHA-256 digests"}, 400
+
+        existing_blob_path = find_asset_by_block_hashes(
+            container_client, vendor_folder, filename, block_hashes, block_size
+        )
+        if existing_blob_path:
+            return {"skip": True, "existing_blob_path": existing_blob_path,
+                    "hash_scheme": hash_scheme, "root": root}
 
-    # 🔍 Check only blobs matching THIS filename
-    for blob in blobs:
-        if not blob.name.endswith(filename):
-            continue
+        reusable = reusable_asset_blocks(
+            container_client, vendor_folder, filename, block_hashes, block_size
+        )
+        if reusable:
+            reusable["source_url"] = generate_read_sas(AZURE_CONTAINER_NAME, reusable["source_blob_path"])
 
-        blob_data = container_client.download_blob(blob.name).readall()
-        server_hash = hashlib.sha256(blob_data).hexdigest()
+        return {"skip": False, "hash_scheme": hash_scheme, "root": root, "reusable_blocks": reusable}
 
-        if server_hash == client_hash:
-            return {
-                "skip": True,
-                "existing_blob_path": blob.name
-            }
+    existing_blob_path = find_asset_by_hash(
+        container_client,
+        vendor_folder,
+        filename,
+        client_hash,
+    )
+
+    if existing_blob_path:
+        return {
+            "skip": True,
+            "existing_blob_path": existing_blob_path
+        }
 
     return {"skip": False}
 
@@ -971,23 +1115,21 @@ def cleanup_old_assets():
 
     vendor = data.get("vendor")
     keep_blob_paths = set(data.get("keep_blob_paths", []))  # 👈 NEW
+    dry_run = bool(data.get("dry_run"))
 
     if not vendor:
         return {"status": "no_vendor_provided"}
 
-    blob_service = BlobServiceClient.from_connection_string(
-        os.getenv("AZURE_STORAGE_CONNECTION_STRING")
-    )
-    container_client = blob_service.get_container_client(AZURE_CONTAINER_NAME)
-
-    prefix = f"raw/vendor={vendor}/assets/"
+    container_client = get_container_client(AZURE_CONNECTION_STRING, AZURE_CONTAINER_NAME)
 
-    for blob in container_client.list_blobs(name_starts_with=prefix):
-        if blob.name not in keep_blob_paths:
-            container_client.delete_blob(blob.name)
-            print(f"🧹 Deleted old asset: {blob.name}")
+    report = cleanup_old_assets_except(
+        container_client,
+        f"vendor={vendor}",
+        keep_blob_paths,
+        dry_run=dry_run,
+    )
 
-    return {"status": "cleanup_complete"}
+    return {"status": "dry_run" if dry_run else "cleanup_complete", **report}
 
 
 
@@ -74,4 +74,203 @@ PRICING_METHODS = {
     "quote_pricing": "Quote Pricing",
     "tender_pricing": "Tender Pricing",
     "core_pricing" : "Core Pricing"
-}
\ No newline at end of file
+}
+
+# Pricing level types (Each / Case / Pallet / Bulk)
+LEVEL_TYPES = ["Each", "Case", "Pallet", "Bulk"]
+
+# Form fields of a pricing level; a level with all of them blank is ignored
+PRICING_LEVEL_PRESENCE_FIELDS = [
+    "level_type[]", "level_pricing_method[]", "level_currency[]",
+    "level_moq_uom[]", "level_moq_qty[]",
+    "level_net_list_price[]", "level_net_net_cost[]", "level_net_effective_date[]",
+    "level_pl_list_price[]", "level_pl_jobber_price[]", "level_pl_net_cost[]",
+    "level_pl_effective_date[]",
+    "level_db_base_price[]", "level_db_discount_pct[]", "level_db_effective_date[]",
+    "level_ehc_base_price[]", "level_pr_promo_price[]", "level_qt_price[]",
+    "level_td_price[]", "level_core_list_price[]", "level_core_part_number[]",
+]
+
+# Declarative validation rules per pricing method.
+#   label:       short name used in error messages
+#   fields:      checked in order; each field may be
+#                required, numeric, range (min, max) and/or date "not_past"
+#   date_window: (start field, end field) that must be in order
+PRICING_METHOD_RULES = {
+    "net_cost": {
+        "label": "Net Cost",
+        "fields": [
+            {"name": "level_net_list_price[]", "label": "List Price", "required": True, "numeric": True},
+            {"name": "level_net_net_cost[]", "label": "Net Cost", "required": True, "numeric": True},
+            {"name": "level_net_effective_date[]", "label": "Effective Date", "required": True, "date": "not_past"},
+        ],
+    },
+    "price_levels": {
+        "label": "Price Levels",
+        "fields": [
+            {"name": "level_pl_list_price[]", "label": "List Price", "required": True, "numeric": True},
+            {"name": "level_pl_jobber_price[]", "label": "Jobber Price", "required": True, "numeric": True},
+            {"name": "level_pl_net_cost[]", "label": "Net Cost", "required": True, "numeric": True},
+            {"name": "level_pl_effective_date[]", "label": "Effective Date", "required": True, "date": "not_past"},
+        ],
+    },
+    "discount_based": {
+        "label": "Discount",
+        "fields": [
+            {"name": "level_db_base_price[]", "label": "Base Price", "required": True, "numeric": True},
+            {"name": "level_db_discount_pct[]", "label": "Discount %", "required": True, "numeric": True,
+             "range": (0.0, 1.0)},
+            {"name": "level_db_effective_date[]", "label": "Effective Date", "required": True, "date": "not_past"},
+        ],
+    },
+    "ehc_based": {
+        "label": "EHC",
+        "fields": [
+            {"name": "level_ehc_base_price[]", "label": "Base Price", "required": True, "numeric": True},
+            {"name": "level_ehc_canadian_blue[]", "label": "Canadian Blue", "numeric": True},
+            {"name": "level_ehc_qty_case[]", "label": "Qty/Case", "numeric": True},
+            {"name": "level_ehc_moq[]", "label": "Packaging MOQ", "numeric": True},
+            {"name": "level_ehc_abmbsk_each[]", "label": "AB/MB/SK Each", "numeric": True},
+            {"name": "level_ehc_abmbsk_case[]", "label": "AB/MB/SK Case", "numeric": True},
+            {"name": "level_ehc_bc_each[]", "label": "BC Each", "numeric": True},
+            {"name": "level_ehc_bc_case[]", "label": "BC Case", "numeric": True},
+            {"name": "level_ehc_nl_each[]", "label": "NL Each", "numeric": True},
+            {"name": "level_ehc_nl_case[]", "label": "NL Case", "numeric": True},
+            {"name": "level_ehc_ns_each[]", "label": "NS Each", "numeric": True},
+            {"name": "level_ehc_ns_case[]", "label": "NS Case", "numeric": True},
+            {"name": "level_ehc_nbqc_each[]", "label": "NB/QC Each", "numeric": True},
+            {"name": "level_ehc_nbqc_case[]", "label": "NB/QC Case", "numeric": True},
+            {"name": "level_ehc_pei_each[]", "label": "PEI Each", "numeric": True},
+            {"name": "level_ehc_pei_case[]", "label": "PEI Case", "numeric": True},
+            {"name": "level_ehc_yk_each[]", "label": "YK Each", "numeric": True},
+            {"name": "level_ehc_yk_case[]", "label": "YK Case", "numeric": True},
+        ],
+    },
+    "promo_pricing": {
+        "label": "Promo",
+        "fields": [
+            {"name": "level_pr_promo_price[]", "label": "Promo Price", "required": True, "numeric": True},
+            {"name": "level_pr_start_date[]", "label": "Start Date", "required": True},
+            {"name": "level_pr_end_date[]", "label": "End Date", "required": True},
+        ],
+        "date_window": ("level_pr_start_date[]", "level_pr_end_date[]"),
+    },
+    "quote_pricing": {
+        "label": "Quote",
+        "fields": [
+            {"name": "level_qt_price[]", "label": "Quote Price", "required": True, "numeric": True},
+            {"name": "level_qt_start_date[]", "label": "Start Date", "required": True},
+            {"name": "level_qt_end_date[]", "label": "End Date", "required": True},
+        ],
+        "date_window": ("level_qt_start_date[]", "level_qt_end_date[]"),
+    },
+    "tender_pricing": {
+        "label": "Tender",
+        "fields": [
+            {"name": "level_td_price[]", "label": "Tender Price", "required": True, "numeric": True},
+            {"name": "level_td_start_date[]", "label": "Start Date", "required": True},
+            {"name": "level_td_end_date[]", "label": "End Date", "required": True},
+        ],
+        "date_window": ("level_td_start_date[]", "level_td_end_date[]"),
+    },
+    "core_pricing": {
+        "label": "Core",
+        "fields": [
+            {"name": "level_core_list_price[]", "label": "Core Price", "required": True, "numeric": True},
+            {"name": "level_core_part_number[]", "label": "Core Part Number", "required": True},
+        ],
+    },
+}
+
+
+# ---------------------------------------
+# Standard template (Non-OptiCat unified workbook)
+# Mirrors the dropdowns of data/templates/standard_template.xlsx;
+# values are compared case-insensitively.
+# ---------------------------------------
+TEMPLATE_CHANGE_TYPES = ["Add", "Modify", "Delete"] + CHANGE_TYPES
+TEMPLATE_YES_NO = ["Yes", "No"] + HAZMAT_OPTIONS
+TEMPLATE_BARCODE_TYPES = GTIN_TYPES + ["EN"]  # template dropdown lists "EN"
+TEMPLATE_DESCRIPTION_TYPES = ["Standard", "Short", "Marketing", "Long"]
+TEMPLATE_EXTENDED_INFO_TYPES = ["COO", "HSB", "LIF", "LIS", "MSR", "PLC", "PLM", "TAX"]
+TEMPLATE_INTERCHANGE_QUALITY = ["Exact", "Good", "Compatible", "Superseded"]
+TEMPLATE_MEDIA_TYPES = ["Primary", "Additional", "LinArt", "PDFs"]
+TEMPLATE_PRICING_METHODS = list(PRICING_METHODS.values()) + [
+    "Discount Based Pricing", "EHC-based pricing"
+]
+
+# Sheet -> column -> allowed values
+TEMPLATE_VOCABULARIES = {
+    "Item_Master": {
+        "Hazardous Item?": TEMPLATE_YES_NO,
+        "Product Status": PRODUCT_STATUS,
+        "Barcode Type": TEMPLATE_BARCODE_TYPES,
+        "Quantity UOM": QUANTITY_UOM,
+    },
+    "Descriptions": {
+        "Description Change Type": TEMPLATE_CHANGE_TYPES,
+        "Description Type": TEMPLATE_DESCRIPTION_TYPES,
+        "Order of Occurrence": ["1", "2", "3", "4", "5"],
+    },
+    "Extended_Info": {
+        "Extended Info Change Type": TEMPLATE_CHANGE_TYPES,
+        "Extended Info Type": TEMPLATE_EXTENDED_INFO_TYPES,
+    },
+    "Attributes": {
+        "Attribute Change Type": TEMPLATE_CHANGE_TYPES,
+    },
+    "Part_Interchange": {
+        "Part Interchange Change Type": TEMPLATE_CHANGE_TYPES,
+        "Interchange Quality": TEMPLATE_INTERCHANGE_QUALITY,
+    },
+    "Packages": {
+        "Package Change Type": TEMPLATE_CHANGE_TYPES,
+        "Package UOM": PACKAGE_UOM,
+        "Weight UOM": WEIGHT_UOM,
+        "Dimension UOM": DIMENSION_UOM,
+    },
+    "Digital_Assets": {
+        "Digital Change Type": TEMPLATE_CHANGE_TYPES,
+    },
+    "Digital Assets": {
+        "Digital Change Type": TEMPLATE_CHANGE_TYPES,
+        "Media Type": TEMPLATE_MEDIA_TYPES,
+    },
+    "Pricing": {
+        "Pricing Method": TEMPLATE_PRICING_METHODS,
+        "Currency": CURRENCIES,
+        "MOQ Unit": QUANTITY_UOM,
+        "Pricing Change Type": TEMPLATE_CHANGE_TYPES,
+        "Pricing Type": LEVEL_TYPES,
+    },
+}
+
+# Sheet -> columns that must be numeric when filled in
+TEMPLATE_NUMERIC_COLUMNS = {
+    "Item_Master": ["Quantity Size"],
+    "Packages": [
+        "Package Quantity of Eaches", "Weight",
+        "Merch Length", "Merch Width", "Merch Height",
+        "Ship Length", "Ship Width", "Ship Height",
+    ],
+    "Pricing": [
+        "MOQ", "List Price", "Jobber Price", "Discount %", "Net Cost",
+        "Pricing Amount", "Tier Min Qty", "Tier Max Qty", "Core Cost",
+    ],
+    "EHC": [
+        "EHC AB_MB_SK Each", "EHC AB_MB_SK Case", "EHC BC Each", "EHC BC Case",
+        "EHC NL Each", "EHC NL Case", "EHC NS Each", "EHC NS Case",
+        "EHC NB_QC Each", "EHC NB_QC Case", "EHC PEI Each", "EHC PEI Case",
+        "EHC YK Each", "EHC YK Case",
+    ],
+}
+
+# Sheet -> column -> (min, max) for numeric columns
+TEMPLATE_NUMERIC_RANGES = {
+    "Pricing": {"Discount %": (0.0, 1.0)},
+}
+
+# Sheet -> columns that must be dates (Excel date or YYYY-MM-DD)
+TEMPLATE_DATE_COLUMNS = {
+    "Pricing": ["Effective Date", "Start Date", "End Date"],
+}
@@ -0,0 +1,280 @@
+"""
+Columnar pricing computations for FGI Vendor Portal
+
+Works on pricing level columns (lists of stripped strings, as in the
+"values" of parse_pricing_levels), so one call covers every level of a
+product. Derived amounts are computed with Decimal from the submitted text
+and rounded half-up, so 0.125 becomes 0.13 at two places whatever binary
+floats would make of it.
+
+Each function makes one pass per output column; numpy is not used so the
+portal keeps its pure-Python dependencies.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP, localcontext
+
+
+# Decimal places of computed amounts on the Pricing sheet
+PRICE_QUANTUM = Decimal("0.0001")
+
+_ONE = Decimal(1)
+_UNPARSED = object()
+
+# Regional EHC fee columns of the Pricing sheet
+EHC_FEE_COLUMNS = (
+    ("EHC AB_MB_SK Each", "level_ehc_abmbsk_each[]"),
+    ("EHC AB_MB_SK Case", "level_ehc_abmbsk_case[]"),
+    ("EHC BC Each", "level_ehc_bc_each[]"),
+    ("EHC BC Case", "level_ehc_bc_case[]"),
+    ("EHC NL Each", "level_ehc_nl_each[]"),
+    ("EHC NL Case", "level_ehc_nl_case[]"),
+    ("EHC NS Each", "level_ehc_ns_each[]"),
+    ("EHC NS Case", "level_ehc_ns_case[]"),
+    ("EHC NB_QC Each", "level_ehc_nbqc_each[]"),
+    ("EHC NB_QC Case", "level_ehc_nbqc_case[]"),
+    ("EHC PEI Each", "level_ehc_pei_each[]"),
+    ("EHC PEI Case", "level_ehc_pei_case[]"),
+    ("EHC YK Each", "level_ehc_yk_each[]"),
+    ("EHC YK Case", "level_ehc_yk_case[]"),
+)
+
+# (region, each field, case field) per EHC region
+EHC_REGIONS = tuple(
+    (each_column[:-len(" Each")], each_field, case_field)
+    for (each_column, each_field), (_, case_field) in zip(EHC_FEE_COLUMNS[::2], EHC_FEE_COLUMNS[1::2])
+)
+
+
+def decimal_column(column):
+    """
+    Convert a column of strings to Decimal.
+
+    Blank, non-numeric and non-finite values become None. Repeated strings
+    (discounts, fees) are only parsed once.
+
+    Args:
+        column (list): Stripped strings
+
+    Returns:
+        list: Decimal or None per value
+    """
+    if not any(column):
+        return [None] * len(column)
+
+    parsed = {"": None}
+    out = []
+    append = out.append
+    for value in column:
+        number = parsed.get(value, _UNPARSED)
+        if number is _UNPARSED:
+            try:
+                number = Decimal(value)
+                if not number.is_finite():
+                    number = None
+            except InvalidOperation:
+                number = None
+            parsed[value] = number
+        append(number)
+    return out
+
+
+def discount_multipliers(discounts):
+    """
+    Return 1 - discount per level (a blank discount means no discount).
+
+    Args:
+        discounts (list): Discount fractions as strings (e.g. "0.25")
+
+    Returns:
+        list: Decimal multiplier, or None if the discount is not numeric
+    """
+    return [
+        _ONE if not text else (None if discount is None else _ONE - discount)
+        for text, discount in zip(discounts, decimal_column(discounts))
+    ]
+
+
+def net_prices(base_prices, discounts, quantum=PRICE_QUANTUM, multipliers=None):
+    """
+    Compute discount-based net prices, base * (1 - discount), rounded half-up.
+
+    Args:
+        base_prices (list): Base prices as strings
+        discounts (list): Discount fractions as strings
+        quantum (Decimal): Rounding step of the result
+        multipliers (list, optional): discount_multipliers(discounts), if
+            already computed
+
+    Returns:
+        list: Formatted net price per level, or None when the base price or
+            discount is not numeric or the result is too large to round to
+            quantum
+    """
+    if multipliers is None:
+        multipliers = discount_multipliers(discounts)
+
+    with localcontext() as ctx:
+        ctx.prec = 28
+        ctx.rounding = ROUND_HALF_UP
+
+        def net_price(base, multiplier):
+            if base is None or multiplier is None:
+                return None
+            try:
+                return str((base * multiplier).quantize(quantum))
+            except InvalidOperation:
+                return None  # more digits than the context precision
+
+        return [
+            net_price(base, multiplier)
+            for base, multiplier in zip(decimal_column(base_prices), multipliers)
+        ]
+
+
+def base_prices(net_prices, multipliers):
+    """
+    Recover discount-based base prices from net prices, net / multiplier.
+
+    The Pricing sheet carries the net price (Pricing Amount) of a
+    discount-based level but not the base it was computed from; dividing
+    at the context precision gives a base whose net_prices rounds back to
+    the same net price.
+
+    Args:
+        net_prices (list): Net prices as strings
+        multipliers (list): discount_multipliers of the levels
+
+    Returns:
+        list: Base price string per level, or None when the net price is
+            not numeric or the multiplier is None or 0
+    """
+    with localcontext() as ctx:
+        ctx.prec = 28
+        ctx.rounding = ROUND_HALF_UP
+        return [
+            None if net is None or not multiplier else str(net / multiplier)
+            for net, multiplier in zip(decimal_column(net_prices), multipliers)
+        ]
+
+
+def ehc_fee_totals(values, quantum=PRICE_QUANTUM):
+    """
+    Resolve the EHC fees of every level per each and per case.
+
+    For every region a missing side is derived from the other one and
+    Qty/Case (case = each x Qty/Case, each = case / Qty/Case); fees entered
+    by the vendor are kept as entered. The totals add up all regions.
+
+    Args:
+        values (dict): Level columns (field name -> list of strings)
+        quantum (Decimal): Rounding step of derived amounts
+
+    Returns:
+        dict: "<region> Each" / "<region> Case" columns and the "Each Total" /
+            "Case Total" columns, each a list of Decimal or None per level (a
+            derived fee too large to round to quantum is None)
+    """
+    qty_case = [
+        qty if qty is not None and qty > 0 else None
+        for qty in decimal_column(values["level_ehc_qty_case[]"])
+    ]
+    n_levels = len(qty_case)
+    each_total = [None] * n_levels
+    case_total = [None] * n_levels
+    result = {}
+
+    def derive(fees, others, per_case):
+        # Fill the missing side of a region from the other side and Qty/Case;
+        # fees and pack sizes repeat, so each pair is only computed once
+        derived = {}
+
+        def compute(other, qty):
+            key = (other, qty)
+            if key not in derived:
+                try:
+                    derived[key] = (other * qty if per_case else other / qty).quantize(quantum)
+                except InvalidOperation:
+                    derived[key] = None  # more digits than the context precision
+            return derived[key]
+
+        return [
+            fee if fee is not None or other is None or qty is None else compute(other, qty)
+            for fee, other, qty in zip(fees, others, qty_case)
+        ]
+
+    def add(totals, fees):
+        return [
+            total if fee is None else (fee if total is None else total + fee)
+            for total, fee in zip(totals, fees)
+        ]
+
+    with localcontext() as ctx:
+        ctx.rounding = ROUND_HALF_UP
+
+        for region, each_field, case_field in EHC_REGIONS:
+            each_text = values[each_field]
+            case_text = values[case_field]
+            if not any(each_text) and not any(case_text):
+                result[f"{region} Each"] = result[f"{region} Case"] = [None] * n_levels
+                continue
+
+            each = decimal_column(each_text)
+            case = decimal_column(case_text)
+            each, case = derive(each, case, False), derive(case, each, True)
+
+            each_total = add(each_total, each)
+            case_total = add(case_total, case)
+            result[f"{region} Each"] = each
+            result[f"{region} Case"] = case
+
+    result["Each Total"] = each_total
+    result["Case Total"] = case_total
+    return result
+
+
+def tier_coverage(min_quantities, max_quantities):
+    """
+    Return the number of quantities each tier covers (max - min + 1).
+
+    Args:
+        min_quantities (list): Tier Min Qty as strings
+        max_quantities (list): Tier Max Qty as strings
+
+    Returns:
+        list: Decimal count per level; None when the tier is open-ended,
+            not numeric or has min > max
+    """
+    return [
+        None if low is None or high is None or low > high else high - low + _ONE
+        for low, high in zip(decimal_column(min_quantities), decimal_column(max_quantities))
+    ]
+
+
+# Level fields read by compute_pricing_columns
+PRICING_ENGINE_FIELDS = (
+    "level_db_base_price[]",
+    "level_db_discount_pct[]",
+    "level_ehc_qty_case[]",
+) + tuple(field for _, field in EHC_FEE_COLUMNS)
+
+
+def compute_pricing_columns(values):
+    """
+    Run the level computations of build_price_rows over a set of level columns.
+
+    Args:
+        values (dict): Level columns (field name -> list of strings) with at
+            least PRICING_ENGINE_FIELDS, e.g. parse_pricing_levels(form)["values"]
+            or the concatenated levels of a bulk import chunk
+
+    Returns:
+        dict: net_price (formatted discount-based net price or None),
+            multiplier (Decimal or None) and ehc (see ehc_fee_totals), one
+            entry per level
+    """
+    discounts = values["level_db_discount_pct[]"]
+    multipliers = discount_multipliers(discounts)
+    return {
+        "net_price": net_prices(values["level_db_base_price[]"], discounts, multipliers=multipliers),
+        "multiplier": multipliers,
+        "ehc": ehc_fee_totals(values),
+    }
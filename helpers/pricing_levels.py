@@ -0,0 +1,307 @@
+"""
+Pricing level parsing for single product submissions in FGI Vendor Portal
+
+request.form carries the pricing levels as parallel level_*[] lists. They are
+read, padded, stripped and converted to numbers once here; the validator and
+the Pricing row builder both work on the resulting columns.
+"""
+import math
+from helpers.lookups import (
+    PRICING_METHODS, PRICING_LEVEL_PRESENCE_FIELDS, PRICING_METHOD_RULES
+)
+from helpers.pricing_engine import (
+    EHC_FEE_COLUMNS, PRICING_ENGINE_FIELDS, compute_pricing_columns, discount_multipliers, ehc_fee_totals,
+    net_prices, tier_coverage,
+)
+
+
+# Fields shared by every pricing method
+PRICING_LEVEL_COMMON_FIELDS = (
+    "level_type[]",
+    "level_price_change_type[]",
+    "level_moq_uom[]",
+    "level_moq_qty[]",
+    "level_currency[]",
+    "level_pricing_method[]",
+    "level_tier_min_qty[]",
+    "level_tier_max_qty[]",
+)
+
+# Written to the Pricing sheet but not validated
+PRICING_LEVEL_EXTRA_FIELDS = (
+    "level_db_list_price_opt[]",
+    "level_ehc_upc_each[]",
+    "level_ehc_upc_case[]",
+    "level_qt_number[]",
+    "level_td_number[]",
+)
+
+# Every level_*[] list, each read from the form exactly once
+PRICING_LEVEL_FIELDS = tuple(dict.fromkeys(
+    PRICING_LEVEL_COMMON_FIELDS
+    + tuple(PRICING_LEVEL_PRESENCE_FIELDS)
+    + tuple(field["name"] for rule in PRICING_METHOD_RULES.values() for field in rule["fields"])
+    + PRICING_LEVEL_EXTRA_FIELDS
+))
+
+# Largest amount or quantity accepted on a pricing level; net prices of
+# larger amounts no longer fit the Decimal precision of pricing_engine
+MAX_LEVEL_NUMBER = 1e12
+
+# Fields converted to float while parsing
+PRICING_LEVEL_NUMERIC_FIELDS = tuple(dict.fromkeys(
+    ("level_moq_qty[]", "level_tier_min_qty[]", "level_tier_max_qty[]")
+    + tuple(
+        field["name"]
+        for rule in PRICING_METHOD_RULES.values()
+        for field in rule["fields"]
+        if field.get("numeric")
+    )
+))
+
+
+def _to_float(value):
+    """
+    Convert a stripped form value to float; None if blank, not numeric or
+    not finite (inf, nan).
+    """
+    if not value:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def parse_pricing_levels(form):
+    """
+    Parse the pricing levels of a single product form into columns.
+
+    Args:
+        form: Flask request.form (MultiDict)
+
+    Returns:
+        dict:
+            count (int): Number of submitted levels (len of level_type[])
+            values (dict): Field name -> stripped string per level ("" if missing)
+            numbers (dict): Numeric field name -> float per level, None if
+                blank or not numeric
+            used (list): Per level, False if the level was left empty
+    """
+    n_levels = len(form.getlist("level_type[]"))
+
+    values = {}
+    for name in PRICING_LEVEL_FIELDS:
+        column = [(value or "").strip() for value in form.getlist(name)[:n_levels]]
+        values[name] = column + [""] * (n_levels - len(column))
+
+    numbers = {}
+    for name in PRICING_LEVEL_NUMERIC_FIELDS:
+        column = values[name]
+        numbers[name] = [_to_float(value) for value in column] if any(column) else [None] * n_levels
+
+    # A level is used when any of its presence fields is filled in
+    used = [any(row) for row in zip(*(values[name] for name in PRICING_LEVEL_PRESENCE_FIELDS))]
+
+    return {"count": n_levels, "values": values, "numbers": numbers, "used": used}
+
+
+def discount_pricing(levels):
+    """
+    Compute the multiplier and net price of the used discount_based levels in
+    one Decimal pass.
+
+    Args:
+        levels (dict): Parsed levels from parse_pricing_levels
+
+    Returns:
+        dict: Level index -> (formatted net price, multiplier as Decimal);
+            either is None when it cannot be computed (see net_prices)
+    """
+    v = levels["values"]
+    indexes = [
+        i for i in range(levels["count"])
+        if levels["used"][i] and v["level_pricing_method[]"][i] == "discount_based"
+    ]
+    discounts = [v["level_db_discount_pct[]"][i] for i in indexes]
+    multipliers = discount_multipliers(discounts)
+    prices = net_prices([v["level_db_base_price[]"][i] for i in indexes], discounts, multipliers=multipliers)
+    return dict(zip(indexes, zip(prices, multipliers)))
+
+
+def concat_level_values(all_levels):
+    """
+    Concatenate the level columns compute_pricing_columns reads across
+    several products, e.g. a bulk import chunk, so it runs once over all of
+    them.
+
+    Args:
+        all_levels (list): Parsed levels from parse_pricing_levels
+
+    Returns:
+        dict: PRICING_ENGINE_FIELDS name -> list of strings, products in the
+            given order
+    """
+    values = {}
+    for name in PRICING_ENGINE_FIELDS:
+        column = values[name] = []
+        extend = column.extend
+        for levels in all_levels:
+            extend(levels["values"][name])
+    return values
+
+
+def build_price_rows(levels, vendor_name, sku, columns=None, offset=0):
+    """
+    Build the Pricing sheet rows of one product from its level records.
+
+    Args:
+        levels (dict): Parsed levels from parse_pricing_levels
+        vendor_name (str): Vendor name
+        sku (str): Product part number
+        columns (dict, optional): compute_pricing_columns over columns that
+            contain this product's levels; computed for this product alone
+            if omitted
+        offset (int): Index of the product's first level in columns
+
+    Returns:
+        tuple: (list of Pricing row dicts, set of pricing method labels used)
+    """
+    price_rows = []
+    method_labels = set()
+
+    v = levels["values"]
+    if columns is None:
+        columns = compute_pricing_columns(v)
+    ehc = columns["ehc"]
+
+    for i in range(levels["count"]):
+        if not levels["used"][i]:
+            continue
+
+        lvl_method = v["level_pricing_method[]"][i]
+        method_label = PRICING_METHODS.get(lvl_method, lvl_method)
+        method_labels.add(method_label)
+
+        row = {
+            "Vendor": vendor_name,
+            "Part Number": sku,
+            "Pricing Method": method_label,
+            "Currency": v["level_currency[]"][i],
+            "MOQ Unit": v["level_moq_uom[]"][i],
+            "MOQ": v["level_moq_qty[]"][i],
+            "Pricing Change Type": v["level_price_change_type[]"][i] or "A",
+            "Pricing Type": v["level_type[]"][i],  # Each / Case / Pallet / Bulk
+            "List Price": "",
+            "Jobber Price": "",
+            "Discount %": "",
+            "Multiplier": "",
+            "Pricing Amount": "",
+            "Tier Min Qty": v["level_tier_min_qty[]"][i],
+            "Tier Max Qty": v["level_tier_max_qty[]"][i],
+            "Effective Date": "",
+            "Start Date": "",
+            "End Date": "",
+            "Core Part Number": "",
+            "Core Cost": "",
+            # --- EHC FIELDS ---
+            "EHC AB_MB_SK Each": "",
+            "EHC AB_MB_SK Case": "",
+            "EHC BC Each": "",
+            "EHC BC Case": "",
+            "EHC NL Each": "",
+            "EHC NL Case": "",
+            "EHC NS Each": "",
+            "EHC NS Case": "",
+            "EHC NB_QC Each": "",
+            "EHC NB_QC Case": "",
+            "EHC PEI Each": "",
+            "EHC PEI Case": "",
+            "EHC YK Each": "",
+            "EHC YK Case": "",
+            "Notes": "",
+        }
+
+        if lvl_method == "net_cost":
+            row["List Price"] = v["level_net_list_price[]"][i]
+            row["Pricing Amount"] = row["Net Price"] = v["level_net_net_cost[]"][i]
+            row["Effective Date"] = v["level_net_effective_date[]"][i]
+
+        elif lvl_method == "price_levels":
+            row["List Price"] = v["level_pl_list_price[]"][i]
+            row["Jobber Price"] = v["level_pl_jobber_price[]"][i]
+            row["Pricing Amount"] = row["Net Price"] = v["level_pl_net_cost[]"][i]
+            row["Effective Date"] = v["level_pl_effective_date[]"][i]
+
+        elif lvl_method == "discount_based":
+            net_price, multiplier = columns["net_price"][offset + i], columns["multiplier"][offset + i]
+            row["List Price"] = v["level_db_list_price_opt[]"][i]
+            row["Discount %"] = v["level_db_discount_pct[]"][i]
+            if multiplier is not None:
+                row["Multiplier"] = str(multiplier)
+            if net_price is not None:
+                row["Pricing Amount"] = row["Net Price"] = net_price
+            else:
+                row["Pricing Amount"] = row["Net Price"] = v["level_db_base_price[]"][i]
+            row["Effective Date"] = v["level_db_effective_date[]"][i]
+
+        elif lvl_method == "ehc_based":
+            row["Pricing Amount"] = v["level_ehc_base_price[]"][i]
+            # A fee left blank is derived from the other side and Qty/Case
+            for column, field in EHC_FEE_COLUMNS:
+                fee = ehc[column][offset + i]
+                row[column] = v[field][i] or ("" if fee is None else str(fee))
+            row["Notes"] = "EHC fees provided by region."
+
+        elif lvl_method == "promo_pricing":
+            row["Pricing Amount"] = v["level_pr_promo_price[]"][i]
+            row["Start Date"] = v["level_pr_start_date[]"][i]
+            row["End Date"] = v["level_pr_end_date[]"][i]
+
+        elif lvl_method == "quote_pricing":
+            row["Pricing Amount"] = v["level_qt_price[]"][i]
+            row["Start Date"] = v["level_qt_start_date[]"][i]
+            row["End Date"] = v["level_qt_end_date[]"][i]
+            if v["level_qt_number[]"][i]:
+                row["Notes"] = f"Quote #: {v['level_qt_number[]'][i]}"
+
+        elif lvl_method == "tender_pricing":
+            row["Pricing Amount"] = v["level_td_price[]"][i]
+            row["Start Date"] = v["level_td_start_date[]"][i]
+            row["End Date"] = v["level_td_end_date[]"][i]
+            if v["level_td_number[]"][i]:
+                row["Notes"] = f"Tender #: {v['level_td_number[]'][i]}"
+
+        elif lvl_method == "core_pricing":
+            row["Core Cost"] = v["level_core_list_price[]"][i]
+            row["Core Part Number"] = v["level_core_part_number[]"][i]
+
+        price_rows.append(row)
+
+    return price_rows, method_labels
+
+
+def add_pricing_totals(price_rows):
+    """
+    Fill the EHC total and tier coverage columns of a batch's Pricing rows.
+
+    Runs one columnar pass over every row of the batch when it is exported
+    (create_multi_product_excel). EHC fees are summed as written to the
+    rows, which build_price_rows has already completed per region.
+
+    Args:
+        price_rows (list): Pricing row dicts; updated in place
+    """
+    values = {field: [row.get(column, "") for row in price_rows] for column, field in EHC_FEE_COLUMNS}
+    values["level_ehc_qty_case[]"] = [""] * len(price_rows)
+    totals = ehc_fee_totals(values)
+    coverage = tier_coverage(
+        [row.get("Tier Min Qty", "") for row in price_rows],
+        [row.get("Tier Max Qty", "") for row in price_rows],
+    )
+
+    for row, each, case, count in zip(price_rows, totals["Each Total"], totals["Case Total"], coverage):
+        row["EHC Each Total"] = "" if each is None else str(each)
+        row["EHC Case Total"] = "" if case is None else str(case)
+        row["Tier Coverage"] = "" if count is None else str(count)
@@ -0,0 +1,317 @@
+"""
+Micro-benchmarks for FGI Vendor Portal hot paths
+
+Usage:
+    python scripts/benchmarks.py excel --rows 20000
+    python scripts/benchmarks.py excel --rows 5000 --memory
+    python scripts/benchmarks.py validator
+    python scripts/benchmarks.py unified --rows 100000
+    python scripts/benchmarks.py xml --rows 100000 --memory
+    python scripts/benchmarks.py hash --size-mb 1024
+    python scripts/benchmarks.py pricing --rows 1000000
+
+Each benchmark prints throughput for the current implementation next to
+the approach it replaced, so regressions are easy to spot.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from functools import partial
+import tracemalloc
+
+# Ensure project root is on PYTHONPATH
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+
+TRACE_MEMORY = False
+
+
+def measure(fn, *args):
+    """
+    Run fn(*args) once and return (seconds, peak traced memory in MB or None).
+
+    Memory is only traced with --memory, since tracemalloc slows the run down
+    by an order of magnitude and would distort the timings.
+    """
+    if TRACE_MEMORY:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+
+    peak_mb = None
+    if TRACE_MEMORY:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_mb = peak / (1024 * 1024)
+
+    return elapsed, peak_mb
+
+
+def report(label, rows, seconds, peak_mb=None):
+    line = f"  {label:<28} {rows / seconds:>12,.0f} rows/s  {seconds:8.3f} s"
+    if peak_mb is not None:
+        line += f"  peak {peak_mb:8.1f} MB"
+    print(line)
+
+
+# -----------------------------
+# EXCEL
+# -----------------------------
+def bench_excel(args):
+    from openpyxl import Workbook
+    from services.excel_service import MULTI_PRODUCT_SHEETS, create_multi_product_excel
+
+    sheet_rows = [
+        [{col: f"{col[:6]}-{i}" for col in columns} for i in range(args.rows)]
+        for _, columns in MULTI_PRODUCT_SHEETS
+    ]
+    total_rows = args.rows * len(MULTI_PRODUCT_SHEETS)
+    output_dir = tempfile.mkdtemp()
+
+    def in_memory_workbook():
+        # Previous implementation: regular Workbook holding every cell until save
+        wb = Workbook()
+        wb.remove(wb.active)
+        for (title, columns), rows in zip(MULTI_PRODUCT_SHEETS, sheet_rows):
+            ws = wb.create_sheet(title)
+            ws.append(columns)
+            for row in rows:
+                ws.append([row.get(col, "") for col in columns])
+        wb.save(os.path.join(output_dir, "in_memory.xlsx"))
+
+    print(f"Excel: {args.rows:,} rows x {len(MULTI_PRODUCT_SHEETS)} sheets")
+    report("in-memory Workbook", total_rows, *measure(in_memory_workbook))
+    report("write-only (current)", total_rows, *measure(create_multi_product_excel, *sheet_rows, output_dir))
+
+
+# -----------------------------
+# SINGLE-PRODUCT VALIDATOR
+# -----------------------------
+def bench_validator(args):
+    from werkzeug.datastructures import MultiDict
+    from helpers.pricing_levels import parse_pricing_levels, build_price_rows
+    from validators.pricing_validator import validate_single_product_new
+
+    level = {
+        "level_type[]": "Each",
+        "level_pricing_method[]": "discount_based",
+        "level_currency[]": "CAD",
+        "level_moq_uom[]": "EA",
+        "level_moq_qty[]": "1",
+        "level_tier_min_qty[]": "1",
+        "level_tier_max_qty[]": "10",
+        "level_db_base_price[]": "100",
+        "level_db_discount_pct[]": "0.25",
+        "level_db_effective_date[]": "2099-01-01",
+    }
+    product = [
+        ("vendor_name", "Example"), ("sku", "SKU-1"), ("part_number", "P-1"),
+        ("product_name", "Widget"), ("quantity_uom", "EA"),
+    ]
+
+    print("Single-product validator")
+    for n_levels in (1, 1000):
+        form = MultiDict(product + [(name, value) for _ in range(n_levels) for name, value in level.items()])
+        repeats = max(1, 20000 // n_levels)
+
+        def run():
+            # One "add": parse once, validate, build the Pricing rows
+            for _ in range(repeats):
+                levels = parse_pricing_levels(form)
+                validate_single_product_new(form, levels)
+                build_price_rows(levels, "Example", "SKU-1")
+
+        seconds, peak_mb = measure(run)
+        report(f"{n_levels} level(s) x {repeats}", n_levels * repeats, seconds, peak_mb)
+
+
+# -----------------------------
+# UNIFIED WORKBOOK VALIDATOR
+# -----------------------------
+def bench_unified(args):
+    from openpyxl import Workbook, load_workbook
+    from validators.unified_workbook_validator import load_template_schema, validate_unified_workbook
+
+    schema = load_template_schema()
+    path = os.path.join(tempfile.mkdtemp(), "unified.xlsx")
+
+    wb = Workbook(write_only=True)
+    for title, header in schema.items():
+        ws = wb.create_sheet(title)
+        ws.append(header)
+        if title == "Pricing":
+            for i in range(args.rows):
+                ws.append([
+                    f"SKU-{i}", "Net Cost Provided", "CAD", "EA", 1, "Add", "Each",
+                    10.5, 9.5, 0.1, 8, 8, 1, 10, "2099-01-01",
+                ])
+    wb.save(path)
+
+    def read_only_scan():
+        # Floor: openpyxl read-only iteration without any checks
+        wb = load_workbook(path, read_only=True, data_only=True)
+        for _ in wb["Pricing"].iter_rows(values_only=True):
+            pass
+        wb.close()
+
+    print(f"Unified workbook: {args.rows:,} Pricing rows")
+    report("openpyxl read-only scan", args.rows, *measure(read_only_scan))
+    report("validate_unified_workbook", args.rows, *measure(validate_unified_workbook, path))
+
+
+# -----------------------------
+# OPTICAT XML VALIDATOR
+# -----------------------------
+def bench_xml(args):
+    from xml.etree.ElementTree import parse
+    from validators.opticat_xml_validator import validate_opticat_xml
+
+    path = os.path.join(tempfile.mkdtemp(), "products.xml")
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0"?><PIES xmlns="http://www.autocare.org"><Items>')
+        for i in range(args.rows):
+            f.write(
+                f'<Item MaintenanceType="A"><PartNumber>SKU-{i}</PartNumber>'
+                f'<BrandAAIAID>ABCD</BrandAAIAID><Descriptions>'
+                f'<Description>Widget {i}</Description></Descriptions></Item>'
+            )
+        f.write(f'</Items><Trailer><ItemCount>{args.rows}</ItemCount></Trailer></PIES>')
+
+    print(f"OptiCat XML: {args.rows:,} items, {os.path.getsize(path) / (1024 * 1024):.1f} MB")
+    report("full ElementTree parse", args.rows, *measure(parse, path))
+    report("validate_opticat_xml", args.rows, *measure(validate_opticat_xml, path))
+
+
+# -----------------------------
+# FILE HASHING
+# -----------------------------
+def bench_hash(args):
+    import hashlib
+    from services.file_service import compute_file_hash, hash_sidecar_path
+
+    path = os.path.join(tempfile.mkdtemp(), "assets.zip")
+    chunk = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        for _ in range(args.size_mb):
+            f.write(chunk)
+    size_gb = args.size_mb / 1024
+
+    def read_8k():
+        # Previous implementation: 8 KB reads
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(8192), b""):
+                sha.update(block)
+        return sha.hexdigest()
+
+    def report_gbs(label, seconds):
+        print(f"  {label:<28} {size_gb / seconds:>8.2f} GB/s  {seconds:8.3f} s")
+
+    print(f"File hash: {args.size_mb:,} MB (page cache warm after the first run)")
+    read_8k()
+    report_gbs("8 KB reads", measure(read_8k)[0])
+    report_gbs("readinto 1 MB (current)", measure(compute_file_hash, path)[0])
+    report_gbs("mmap", measure(partial(compute_file_hash, path, use_mmap=True))[0])
+
+    compute_file_hash(path, use_cache=True)
+    seconds = measure(partial(compute_file_hash, path, use_cache=True))[0]
+    print(f"  {'sidecar cache hit':<28} {seconds * 1000:>8.3f} ms")
+    os.remove(hash_sidecar_path(path))
+
+
+# -----------------------------
+# PRICING ENGINE
+# -----------------------------
+def bench_pricing(args):
+    from helpers.pricing_levels import (
+        PRICING_LEVEL_FIELDS, add_pricing_totals, build_price_rows, concat_level_values
+    )
+    from helpers.pricing_engine import compute_pricing_columns, net_prices
+    from services.import_service import IMPORT_BATCH_SIZE
+
+    # A bulk file of products with 4 levels each, --rows Pricing rows in total
+    n = args.rows
+    per_product = 4
+    methods = ("discount_based", "discount_based", "ehc_based", "net_cost")
+
+    def product_levels(p):
+        values = {name: [""] * per_product for name in PRICING_LEVEL_FIELDS}
+        values["level_pricing_method[]"] = list(methods)
+        values["level_type[]"] = ["Each"] * per_product
+        values["level_currency[]"] = ["CAD"] * per_product
+        values["level_tier_min_qty[]"] = ["1", "50", "1", "1"]
+        values["level_tier_max_qty[]"] = ["49", "", "", ""]
+        values["level_db_base_price[]"] = [f"{10 + (p % 9973) / 100:.2f}"] * 2 + ["", ""]
+        values["level_db_discount_pct[]"] = [("0.25", "0.125", "0.3333", "")[p % 4], "0.3", "", ""]
+        values["level_ehc_base_price[]"] = ["", "", "30", ""]
+        values["level_ehc_qty_case[]"] = ["", "", "12", ""]
+        values["level_ehc_bc_each[]"] = ["", "", "0.35", ""]
+        values["level_ehc_ns_case[]"] = ["", "", "4.20", ""]
+        values["level_net_net_cost[]"] = ["", "", "", "8"]
+        return {"count": per_product, "values": values, "numbers": {}, "used": [True] * per_product}
+
+    products = [product_levels(p) for p in range(max(1, n // per_product))]
+    n = len(products) * per_product
+    values = concat_level_values(products)
+
+    def scalar_float():
+        # Previous implementation: one level at a time, float + f"{:.4f}"
+        out = []
+        for base_val, disc_val in zip(values["level_db_base_price[]"], values["level_db_discount_pct[]"]):
+            base = float(base_val) if base_val else 0.0
+            discount = float(disc_val) if disc_val else 0.0
+            out.append(f"{base * (1 - discount):.4f}")
+        return out
+
+    def price_chunk(chunk, first_sku=0):
+        # import_products.flush: one pricing pass per chunk, then rows per product
+        columns = compute_pricing_columns(concat_level_values(chunk))
+        rows = []
+        offset = 0
+        for p, levels in enumerate(chunk, first_sku):
+            rows.extend(build_price_rows(levels, "Bench Vendor", f"SKU{p}", columns, offset)[0])
+            offset += levels["count"]
+        return rows
+
+    def bulk_import():
+        for start in range(0, len(products), IMPORT_BATCH_SIZE):
+            price_chunk(products[start:start + IMPORT_BATCH_SIZE], start)
+
+    print(f"Pricing engine: {n:,} Pricing rows ({len(products):,} products)")
+    report("scalar float net price", n, *measure(scalar_float))
+    report("net_prices (Decimal)", n, *measure(net_prices, values["level_db_base_price[]"],
+                                                values["level_db_discount_pct[]"]))
+    report("compute_pricing_columns", n, *measure(compute_pricing_columns, values))
+    report("bulk import price rows", n, *measure(bulk_import))
+    price_rows = price_chunk(products)
+    report("add_pricing_totals (export)", n, *measure(add_pricing_totals, price_rows))
+
+
+BENCHMARKS = {
+    "excel": bench_excel,
+    "validator": bench_validator,
+    "unified": bench_unified,
+    "xml": bench_xml,
+    "hash": bench_hash,
+    "pricing": bench_pricing,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run FGI Vendor Portal micro-benchmarks.")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS) + ["all"])
+    parser.add_argument("--rows", type=int, default=20000, help="Rows per sheet / input size")
+    parser.add_argument("--size-mb", type=int, default=512, help="File size for the hash benchmark")
+    parser.add_argument("--memory", action="store_true", help="Also report peak memory (slow)")
+    args = parser.parse_args()
+    TRACE_MEMORY = args.memory
+
+    names = sorted(BENCHMARKS) if args.benchmark == "all" else [args.benchmark]
+    for name in names:
+        BENCHMARKS[name](args)
@@ -0,0 +1,49 @@
+"""
+Rebuild the local submission index from the manifests in Azure Bronze
+
+Usage:
+    python scripts/rebuild_submission_index.py
+    python scripts/rebuild_submission_index.py --upload-folder /data/uploads --workers 16
+
+Behavior:
+- Lists raw/vendor=<v>/logs/ for every vendor and downloads the manifests
+- Marks a notify marker pending if it still exists under raw/notifymarker/
+- Replaces the contents of <UPLOAD_FOLDER>/_index/submissions.db
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Ensure project root is on PYTHONPATH
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services.azure_service import get_container_client
+from services.submission_index import get_submission_index
+
+
+parser = argparse.ArgumentParser(description="Rebuild the local submission index from Bronze.")
+parser.add_argument("--upload-folder", default=os.path.join(PROJECT_ROOT, "uploads"),
+                    help="Portal upload folder (default: ./uploads)")
+parser.add_argument("--workers", type=int, default=8, help="Concurrent manifest downloads (default: 8)")
+args = parser.parse_args()
+
+CONNECTION_STRING = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
+CONTAINER_NAME = "bronze"
+
+if not CONNECTION_STRING:
+    print("❌ AZURE_STORAGE_CONNECTION_STRING not set")
+    sys.exit(1)
+
+print("🔎 Reading manifests from Bronze...")
+start = time.perf_counter()
+counts = get_submission_index(args.upload_folder).rebuild(
+    get_container_client(CONNECTION_STRING, CONTAINER_NAME),
+    max_workers=args.workers,
+)
+print(
+    f"✅ Indexed {counts['manifests']} manifest(s) for {counts['vendors']} vendor(s), "
+    f"{counts['pending_markers']} pending marker(s) in {time.perf_counter() - start:.1f} s"
+)
@@ -3,16 +3,21 @@ Local bulk asset uploader for FGI Vendor Portal
 
 Usage:
     python upload_assets_local.py "Dayton Parts" "C:/FGI/VendorAssets/assets.zip"
+    python upload_assets_local.py "Dayton Parts" assets.zip --block-size-mb 16 --concurrency 8
 
 Behavior:
-- Computes SHA256 hash
+- Computes SHA256 hash (cached in '<ZIP_PATH>.sha256' until the ZIP changes)
 - Skips upload if unchanged
-- Uploads new ZIP
+- Uploads new ZIP in blocks; rerunning after a failure resumes from the
+  blocks already staged (tracked in '<ZIP_PATH>.upload.json')
+- Names the blocks after their SHA-256 (like browser uploads), so the
+  portal can match and reuse them without downloading the ZIP
 - Deletes old assets ONLY after successful upload
 """
 
 import os
 import sys
+import argparse
 from datetime import datetime
 from azure.storage.blob import BlobServiceClient
 
@@ -21,10 +26,11 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, PROJECT_ROOT)
 
 from services.azure_service import (
-    get_blob_service_client,
-    get_latest_asset_hash,
+    get_container_client,
+    find_asset_by_hash,
     delete_old_asset_zips,
-    upload_blob,
+    upload_file_resumable,
+    ASSET_HASH_METADATA_KEY,
 )
 from services.file_service import compute_file_hash
 
@@ -32,12 +38,17 @@ from services.file_service import compute_file_hash
 # -----------------------------
 # VALIDATION
 # -----------------------------
-if len(sys.argv) != 3:
-    print("❌ Usage: python upload_assets_local.py <VENDOR_NAME> <ZIP_PATH>")
-    sys.exit(1)
-
-vendor = sys.argv[1]
-zip_path = sys.argv[2]
+parser = argparse.ArgumentParser(description="Upload a vendor asset ZIP to Azure Bronze.")
+parser.add_argument("vendor", help="Vendor name, e.g. 'Dayton Parts'")
+parser.add_argument("zip_path", help="Path to the asset ZIP")
+parser.add_argument("--block-size-mb", type=int, default=8, help="Block size in MB (default: 8)")
+parser.add_argument("--concurrency", type=int, default=4, help="Blocks uploaded in parallel (default: 4)")
+parser.add_argument("--mmap", action="store_true", help="Hash the ZIP through mmap")
+parser.add_argument("--rehash", action="store_true", help="Ignore the cached hash in '<ZIP_PATH>.sha256'")
+args = parser.parse_args()
+
+vendor = args.vendor
+zip_path = args.zip_path
 
 if not os.path.isfile(zip_path):
     print(f"❌ ZIP file not found: {zip_path}")
@@ -56,8 +67,7 @@ if not CONNECTION_STRING:
 # -----------------------------
 timestamp = datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
 vendor_folder = f"vendor={vendor}"
-blob_service_client = get_blob_service_client(CONNECTION_STRING)
-container_client = blob_service_client.get_container_client(CONTAINER_NAME)
+container_client = get_container_client(CONNECTION_STRING, CONTAINER_NAME)
 
 assets_blob_path = f"raw/{vendor_folder}/assets/assets.zip"
 
@@ -66,12 +76,12 @@ assets_blob_path = f"raw/{vendor_folder}/assets/assets.zip"
 # HASH CHECK
 # -----------------------------
 print("🔍 Computing local asset hash...")
-new_hash = compute_file_hash(zip_path)
+new_hash = compute_file_hash(zip_path, use_mmap=args.mmap, use_cache=not args.rehash)
 
 print("🔎 Checking existing asset hash...")
-last_hash = get_latest_asset_hash(container_client, vendor_folder)
+existing_blob = find_asset_by_hash(container_client, vendor_folder, "assets.zip", new_hash)
 
-if last_hash == new_hash:
+if existing_blob:
     print("🟡 Assets unchanged — upload skipped")
     sys.exit(0)
 
@@ -80,15 +90,26 @@ if last_hash == new_hash:
 # UPLOAD
 # -----------------------------
 print("⬆️ Uploading assets ZIP...")
+def show_progress(done_blocks, total_blocks):
+    end = "\n" if done_blocks == total_blocks else ""
+    print(f"\r   {done_blocks}/{total_blocks} blocks", end=end, flush=True)
+
+
 try:
-    upload_blob(
+    upload_file_resumable(
         local_path=zip_path,
         blob_path=assets_blob_path,
         connection_string=CONNECTION_STRING,
         container_name=CONTAINER_NAME,
+        block_size=args.block_size_mb * 1024 * 1024,
+        max_concurrency=args.concurrency,
+        metadata={ASSET_HASH_METADATA_KEY: new_hash},
+        progress=show_progress,
+        block_hash_ids=True,
     )
 except Exception as e:
-    print(f"🔴 Upload failed: {e}")
+    print(f"\n🔴 Upload failed: {e}")
+    print("   Rerun the same command to resume from the staged blocks.")
     sys.exit(1)
 
 
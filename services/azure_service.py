@@ -3,9 +3,21 @@ Azure Blob Storage services for FGI Vendor Portal
 """
 import os
 import json
+import base64
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+import requests
+from requests.adapters import HTTPAdapter
+from azure.core.exceptions import ResourceNotFoundError
+from azure.core.pipeline.transport import RequestsTransport
 from azure.storage.blob import BlobServiceClient
-from services.file_service import compute_file_hash
+from services.file_service import compute_file_hash, local_file_info
+from services.tracing import count_azure_call, in_trace_context, span, traced
 
 from datetime import datetime, timedelta
 from azure.storage.blob import generate_blob_sas, BlobSasPermissions,BlobServiceClient, ContentSettings
@@ -15,6 +27,44 @@ import os
 ACCOUNT_NAME = os.getenv("AZURE_STORAGE_ACCOUNT_NAME")
 ACCOUNT_KEY = os.getenv("AZURE_STORAGE_ACCOUNT_KEY")
 
+# Blob metadata key holding the SHA-256 of an uploaded asset ZIP
+ASSET_HASH_METADATA_KEY = "sha256"
+
+# Block hash scheme of browser asset uploads: SHA-256 of every fixed-size
+# block, and a root = SHA-256 of the concatenated block digests. The block
+# ids of such uploads carry the block digests (see asset_block_id).
+ASSET_HASH_SCHEME = "sha256-blocks-v1"
+ASSET_HASH_BLOCK_SIZE = 8 * 1024 * 1024  # keep in sync with ASSET_BLOCK_SIZE in uploads.html
+ASSET_ROOT_METADATA_KEY = "sha256root"
+ASSET_BLOCK_SIZE_METADATA_KEY = "hashblocksize"
+
+# Max pooled HTTP connections shared by every Azure client in the process
+AZURE_HTTP_POOL_SIZE = int(os.getenv("AZURE_HTTP_POOL_SIZE", "32"))
+
+# Bounded thread pool size for concurrent blob uploads within one submission
+AZURE_UPLOAD_WORKERS = int(os.getenv("AZURE_UPLOAD_WORKERS", "4"))
+
+# Block size and in-flight block limit for streamed uploads (bounds memory use)
+STREAM_BLOCK_SIZE = int(os.getenv("AZURE_STREAM_BLOCK_MB", "4")) * 1024 * 1024
+STREAM_MAX_IN_FLIGHT = int(os.getenv("AZURE_STREAM_MAX_IN_FLIGHT", "4"))
+
+# Process-wide client registry (see get_blob_service_client)
+_client_lock = threading.Lock()
+_http_session = None
+_service_clients = {}
+_container_clients = {}
+_client_pool_stats = {"hits": 0, "misses": 0}
+
+# Blob batch API limit and concurrent batch requests for bulk deletes
+BLOB_DELETE_BATCH_SIZE = 256
+BLOB_DELETE_WORKERS = int(os.getenv("AZURE_DELETE_WORKERS", "4"))
+
+# Seconds a completed prefix listing is reused (0 disables the listing cache)
+BLOB_LISTING_TTL = float(os.getenv("AZURE_LISTING_TTL_SECONDS", "30"))
+
+# Prefix listings kept at most; the least recently used one is dropped first
+BLOB_LISTING_MAX_ENTRIES = int(os.getenv("AZURE_LISTING_MAX_ENTRIES", "256"))
+
 from azure.storage.blob import (
     BlobServiceClient,
     generate_blob_sas,
@@ -23,12 +73,12 @@ from azure.storage.blob import (
 from datetime import datetime, timedelta
 import os
 
-def generate_upload_sas(container: str, blob_path: str) -> str:
+def _generate_blob_sas_url(container, blob_path, permission, expiry):
     conn_str = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
     if not conn_str:
         raise RuntimeError("AZURE_STORAGE_CONNECTION_STRING not set")
 
-    blob_service = BlobServiceClient.from_connection_string(conn_str)
+    blob_service = get_blob_service_client(conn_str)
 
     account_name = blob_service.account_name
     account_key = blob_service.credential.account_key  # ✅ THIS IS THE FIX
@@ -38,12 +88,31 @@ def generate_upload_sas(container: str, blob_path: str) -> str:
         container_name=container,
         blob_name=blob_path,
         account_key=account_key,
-        permission=BlobSasPermissions(write=True, create=True, add=True),
-        expiry=datetime.utcnow() + timedelta(hours=1)
+        permission=permission,
+        expiry=expiry
     )
 
     return f"https://{account_name}.blob.core.windows.net/{container}/{blob_path}?{sas}"
 
+def generate_upload_sas(container: str, blob_path: str) -> str:
+    return _generate_blob_sas_url(
+        container,
+        blob_path,
+        BlobSasPermissions(write=True, create=True, add=True),
+        datetime.utcnow() + timedelta(hours=1),
+    )
+
+def generate_read_sas(container: str, blob_path: str) -> str:
+    """
+    Short-lived read-only SAS URL, e.g. the source of a Put Block From URL.
+    """
+    return _generate_blob_sas_url(
+        container,
+        blob_path,
+        BlobSasPermissions(read=True),
+        datetime.utcnow() + timedelta(hours=1),
+    )
+
 def utc_timestamp():
     return datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
 
@@ -51,9 +120,31 @@ def safe_vendor_key(vendor: str) -> str:
     return vendor.strip().replace(" ", "_")
 
 
+def _shared_http_session():
+    """
+    Return the pooled requests session shared by all Azure clients.
+    Must be called with _client_lock held.
+    """
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=AZURE_HTTP_POOL_SIZE,
+            pool_maxsize=AZURE_HTTP_POOL_SIZE,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _http_session = session
+    return _http_session
+
+
 def get_blob_service_client(connection_string):
     """
-    Create and return Azure Blob Service Client.
+    Return the process-wide Azure Blob Service Client for a connection string.
+
+    Clients are created once and reused across requests and threads. All of
+    them share one pooled HTTP session, so TLS connections are kept alive
+    instead of being re-established on every call.
     
     Args:
         connection_string (str): Azure Storage connection string
@@ -66,57 +157,564 @@ def get_blob_service_client(connection_string):
     """
     if not connection_string:
         raise RuntimeError("AZURE_STORAGE_CONNECTION_STRING is not configured.")
-    return BlobServiceClient.from_connection_string(connection_string)
 
+    with _client_lock:
+        client = _service_clients.get(connection_string)
+        if client is not None:
+            _client_pool_stats["hits"] += 1
+            return client
+
+        _client_pool_stats["misses"] += 1
+        transport = RequestsTransport(session=_shared_http_session(), session_owner=False)
+        client = BlobServiceClient.from_connection_string(connection_string, transport=transport)
+        _service_clients[connection_string] = client
+        return client
 
-def get_latest_asset_hash(container_client, vendor_folder):
+
+def get_container_client(connection_string, container_name):
     """
-    Return last uploaded asset hash from Azure manifest.
-    
+    Return the process-wide container client for a connection string and container.
+
+    Args:
+        connection_string (str): Azure Storage connection string
+        container_name (str): Azure container name
+
+    Returns:
+        ContainerClient: Container client sharing the pooled transport
+    """
+    key = (connection_string, container_name)
+
+    with _client_lock:
+        client = _container_clients.get(key)
+        if client is not None:
+            _client_pool_stats["hits"] += 1
+            return client
+        _client_pool_stats["misses"] += 1
+
+    client = get_blob_service_client(connection_string).get_container_client(container_name)
+
+    with _client_lock:
+        return _container_clients.setdefault(key, client)
+
+
+def get_client_pool_stats():
+    """
+    Return client registry counters.
+
+    Returns:
+        dict: Registry hits/misses and number of cached clients
+    """
+    with _client_lock:
+        return {
+            "hits": _client_pool_stats["hits"],
+            "misses": _client_pool_stats["misses"],
+            "service_clients": len(_service_clients),
+            "container_clients": len(_container_clients),
+        }
+
+
+# -----------------------------
+# BLOB LISTING CACHE
+# -----------------------------
+class BlobListingCache:
+    """
+    Per-process cache of prefix listings, keyed by (account, container, prefix).
+
+    Listings are fetched page by page and yielded as they arrive, so a caller
+    that stops at the first match never lists the rest of the prefix. A
+    listing is cached once its last page is fetched, and only if no blob was
+    written or deleted meanwhile. Writes and deletes made through this module
+    invalidate every cached prefix of the blob; changes made elsewhere (e.g.
+    browser SAS uploads, other processes) are picked up when the TTL expires.
+
+    Expired listings are dropped whenever a listing is stored, and at most
+    max_entries listings are kept (least recently used first out), so a
+    long-running process listing many vendors does not grow without bound.
+    """
+
+    def __init__(self, ttl, max_entries=BLOB_LISTING_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = 0
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "partial": 0}
+
+    def iter_blobs(self, container_client, prefix):
+        """
+        Yield the blobs (with metadata) under prefix, from the cache if fresh.
+        """
+        key = (container_client.account_name, container_client.container_name, prefix)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._stats["hits"] += 1
+                self._entries.move_to_end(key)
+                blobs = entry[1]
+            else:
+                self._stats["misses"] += 1
+                blobs = None
+            version = self._version
+
+        if blobs is not None:
+            yield from blobs
+            return
+
+        fetched = []
+        completed = False
+        try:
+            pages = container_client.list_blobs(name_starts_with=prefix, include=["metadata"]).by_page()
+            for page in pages:
+                page = list(page)
+                count_azure_call("list_blobs")
+                fetched.extend(page)
+                if pages.continuation_token is None:
+                    # Last page: the listing is complete even if the caller stops early
+                    completed = True
+                    self._store(key, version, fetched)
+                yield from page
+        finally:
+            if not completed:
+                with self._lock:
+                    self._stats["partial"] += 1
+
+    def _store(self, key, version, blobs):
+        with self._lock:
+            if self.ttl <= 0 or self._version != version:
+                return
+
+            now = time.monotonic()
+            for expired in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+                del self._entries[expired]
+
+            self._entries[key] = (now + self.ttl, blobs)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, container_name, blob_name):
+        """
+        Drop every cached listing of container_name whose prefix covers blob_name.
+        """
+        with self._lock:
+            self._version += 1
+            self._stats["invalidations"] += 1
+            for key in [k for k in self._entries if k[1] == container_name and blob_name.startswith(k[2])]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "ttl_seconds": self.ttl,
+                    "max_entries": self.max_entries}
+
+
+_listing_cache = BlobListingCache(BLOB_LISTING_TTL)
+
+
+def list_blobs_cached(container_client, prefix):
+    """
+    Lazily iterate the blobs under a prefix, reusing a recent complete listing.
+
     Args:
         container_client: Azure container client
-        vendor_folder (str): Vendor folder name (e.g., 'vendor=Grote')
-        
+        prefix (str): Blob name prefix
+
+    Returns:
+        iterator: BlobProperties (metadata included)
+    """
+    return _listing_cache.iter_blobs(container_client, prefix)
+
+
+def invalidate_blob_listing(container_name, blob_path):
+    """
+    Forget cached listings that include blob_path; call after writing or deleting it.
+    """
+    _listing_cache.invalidate(container_name, blob_path)
+
+
+def get_listing_cache_stats():
+    """
+    Return listing cache counters.
+
+    Returns:
+        dict: hits, misses, invalidations, partial (listings stopped early),
+            entries, ttl_seconds and max_entries
+    """
+    return _listing_cache.stats()
+
+
+def _delete_batch(container_client, names):
+    """
+    Delete up to BLOB_DELETE_BATCH_SIZE blobs in one batch request.
+
+    Falls back to one delete_blob call per blob if the batch request itself
+    fails (e.g. on storage emulators without batch support).
+
+    Returns:
+        list: (blob name, status, error message or None) per blob
+    """
+    try:
+        count_azure_call("delete_blobs")
+        responses = list(container_client.delete_blobs(*names, raise_on_any_failure=False))
+    except Exception as e:
+        print(f"⚠ Batch delete failed ({e}); deleting {len(names)} blob(s) one by one")
+        results = []
+        for name in names:
+            try:
+                count_azure_call("delete_blob")
+                container_client.delete_blob(name)
+                results.append((name, "deleted", None))
+            except ResourceNotFoundError:
+                results.append((name, "not_found", None))
+            except Exception as blob_error:
+                results.append((name, "failed", str(blob_error)))
+        return results
+
+    results = []
+    for name, response in zip(names, responses):
+        if response.status_code in (200, 202):
+            results.append((name, "deleted", None))
+        elif response.status_code == 404:
+            results.append((name, "not_found", None))
+        else:
+            results.append((name, "failed", f"HTTP {response.status_code} {response.reason}"))
+    return results
+
+
+def delete_blobs_batched(container_client, names, dry_run=False,
+                         batch_size=BLOB_DELETE_BATCH_SIZE, max_workers=BLOB_DELETE_WORKERS):
+    """
+    Delete many blobs with the Blob batch API, several batches at a time.
+
+    Args:
+        container_client: Azure container client
+        names (list): Blob names to delete
+        dry_run (bool): Only report what would be deleted
+        batch_size (int): Blobs per batch request (Azure allows at most 256)
+        max_workers (int): Maximum concurrent batch requests
+
     Returns:
-        str or None: SHA-256 hash of last uploaded assets, or None if no manifest exists
+        dict: dry_run, deleted, not_found, failed (counts) and results
+            (list of dicts with blob, status and error)
     """
-    prefix = f"raw/{vendor_folder}/logs/"
-    blobs = list(container_client.list_blobs(name_starts_with=prefix))
+    names = list(dict.fromkeys(names))
+    report = {"dry_run": dry_run, "deleted": 0, "not_found": 0, "failed": 0, "results": []}
 
-    if not blobs:
-        return None  # No manifest present yet
+    if dry_run:
+        report["results"] = [{"blob": name, "status": "would_delete", "error": None} for name in names]
+        return report
+    if not names:
+        return report
 
-    blobs_sorted = sorted(blobs, key=lambda b: b.name, reverse=True)
-    latest_manifest_blob = blobs_sorted[0]
+    batches = [names[i:i + batch_size] for i in range(0, len(names), batch_size)]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as pool:
+        futures = [pool.submit(in_trace_context(_delete_batch), container_client, batch) for batch in batches]
+        batch_results = [future.result() for future in futures]
 
-    manifest_data = container_client.download_blob(latest_manifest_blob.name).readall()
-    manifest = json.loads(manifest_data)
+    for results in batch_results:
+        for name, status, error in results:
+            report[status] += 1
+            report["results"].append({"blob": name, "status": status, "error": error})
+            if status != "failed":
+                invalidate_blob_listing(container_client.container_name, name)
 
-    # return manifest.get("assets_hash")
+    print(f"🧹 Deleted {report['deleted']} blob(s) in {len(batches)} batch(es)"
+          + (f", {report['failed']} failed" if report["failed"] else ""))
+    return report
 
 
-def delete_old_asset_zips(container_client, vendor_folder):
+def delete_old_asset_zips(container_client, vendor_folder, dry_run=False):
     """
     Delete old asset ZIP files, keeping only the most recent one.
     
     Args:
         container_client: Azure container client
         vendor_folder (str): Vendor folder name (e.g., 'vendor=Grote')
+        dry_run (bool): Only report what would be deleted
+
+    Returns:
+        dict: Report from delete_blobs_batched
     """
     prefix = f"raw/{vendor_folder}/assets/"
-    blobs = list(container_client.list_blobs(name_starts_with=prefix))
+    names = sorted(blob.name for blob in list_blobs_cached(container_client, prefix))
+
+    # Everything but the newest ZIP (nothing if there is at most one)
+    return delete_blobs_batched(container_client, names[:-1], dry_run=dry_run)
+
+
+def compute_blob_hash(container_client, blob_name):
+    """
+    Compute SHA-256 hash of a blob by streaming it chunk by chunk.
+
+    Args:
+        container_client: Azure container client
+        blob_name (str): Blob path in container
+
+    Returns:
+        str: Hexadecimal SHA-256 hash string
+    """
+    sha = hashlib.sha256()
+    with span("compute_blob_hash") as s:
+        count_azure_call("download_blob")
+        for chunk in container_client.download_blob(blob_name).chunks():
+            sha.update(chunk)
+            s.add_bytes(len(chunk))
+    return sha.hexdigest()
+
+
+def _find_indexed_asset(container_client, vendor_folder, filename, expected, compute_metadata):
+    """
+    Find an asset ZIP whose hash metadata equals expected.
+
+    Blobs without the metadata keys are hashed with compute_metadata(blob_name)
+    and backfilled, newest first, only when no indexed blob matches.
+    """
+    prefix = f"raw/{vendor_folder}/assets/"
+    unindexed = []
+
+    for blob in list_blobs_cached(container_client, prefix):
+        if not blob.name.endswith(filename):
+            continue
+
+        metadata = blob.metadata or {}
+        if not all(metadata.get(key) for key in expected):
+            unindexed.append(blob)
+        elif all(metadata[key] == value for key, value in expected.items()):
+            return blob.name
+
+    for blob in sorted(unindexed, key=lambda b: b.name, reverse=True):
+        computed = compute_metadata(blob.name)
+
+        metadata = dict(blob.metadata or {})
+        metadata.update(computed)
+        count_azure_call("set_blob_metadata")
+        container_client.get_blob_client(blob.name).set_blob_metadata(metadata)
+        invalidate_blob_listing(container_client.container_name, blob.name)
+        print(f"[INDEX] Backfilled asset hash: {blob.name}")
+
+        if computed == expected:
+            return blob.name
+
+    return None
+
+
+def find_asset_by_hash(container_client, vendor_folder, filename, file_hash):
+    """
+    Find an existing asset ZIP with the same name and content hash.
+
+    Hashes are read from blob metadata, so a lookup is a single listing call.
+    Blobs uploaded before the metadata existed are hashed once on the server
+    and backfilled, newest first, only when no indexed blob matches.
+
+    Args:
+        container_client: Azure container client
+        vendor_folder (str): Vendor folder name (e.g., 'vendor=Grote')
+        filename (str): Original ZIP filename
+        file_hash (str): SHA-256 hash computed by the client
+
+    Returns:
+        str or None: Matching blob path, or None if no match exists
+    """
+    return _find_indexed_asset(
+        container_client,
+        vendor_folder,
+        filename,
+        {ASSET_HASH_METADATA_KEY: file_hash},
+        lambda blob_name: {ASSET_HASH_METADATA_KEY: compute_blob_hash(container_client, blob_name)},
+    )
+
 
-    if len(blobs) <= 1:
-        return  # Nothing to delete
+# -----------------------------
+# ASSET BLOCK HASHES
+# -----------------------------
+def block_hash_root(block_hashes):
+    """
+    Return the root hash of a block hash list (hex SHA-256 of the concatenated digests).
+    """
+    return hashlib.sha256(b"".join(bytes.fromhex(h) for h in block_hashes)).hexdigest()
+
+
+def asset_block_id(index, block_hash):
+    """
+    Return the block id of the index-th block of an asset upload.
 
-    blobs_sorted = sorted(blobs, key=lambda b: b.name)
+    The id is the ASCII text '<index:06d><base64url digest>' (49 bytes), so
+    the block digests can be read back from the committed block list. This
+    is the form the SDK takes and returns (it base64-encodes ids on the
+    wire); the browser sends the base64 of the same text.
+    """
+    digest = base64.urlsafe_b64encode(bytes.fromhex(block_hash)).rstrip(b"=").decode()
+    return f"{index:06d}{digest}"
 
-    for old_blob in blobs_sorted[:-1]:
-        container_client.delete_blob(old_blob.name)
-        print(f"[CLEANUP] Deleted old asset ZIP: {old_blob.name}")
 
+def file_block_hashes(local_path, block_size):
+    """
+    Return the hex SHA-256 of every block_size block of a local file.
+    """
+    hashes = []
+    with open(local_path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            hashes.append(hashlib.sha256(block).hexdigest())
+    return hashes
+
+
+def _block_hash_from_id(block_id, index):
+    # The SDK returns block ids already base64-decoded when they are text
+    # (see asset_block_id)
+    if len(block_id) != 49 or block_id[:6] != f"{index:06d}":
+        return None
+    try:
+        return base64.urlsafe_b64decode(block_id[6:] + "=").hex()
+    except ValueError:
+        return None
+
+
+def committed_block_hashes(container_client, blob_name):
+    """
+    Read the block hashes of a blob uploaded with asset_block_id block ids.
 
-def upload_blob(local_path, blob_path, connection_string, container_name):
+    Args:
+        container_client: Azure container client
+        blob_name (str): Blob path in container
+
+    Returns:
+        tuple or None: (block_size, list of hex block hashes), or None if the
+            blob was not uploaded with the block hash scheme
+    """
+    count_azure_call("get_block_list")
+    committed, _ = container_client.get_blob_client(blob_name).get_block_list("committed")
+    if not committed:
+        return None
+
+    block_size = committed[0].size
+    hashes = []
+    for index, block in enumerate(committed):
+        block_hash = _block_hash_from_id(block.id, index)
+        if block_hash is None:
+            return None
+        if block.size != block_size and index != len(committed) - 1:
+            return None
+        hashes.append(block_hash)
+    return block_size, hashes
+
+
+def compute_blob_block_hashes(container_client, blob_name, block_size):
+    """
+    Hash a blob block by block by streaming it (for blobs without block hash ids).
+
+    Returns:
+        list: Hex SHA-256 of every block_size block
+    """
+    hashes = []
+    sha = hashlib.sha256()
+    filled = 0
+
+    with span("compute_blob_block_hashes") as s:
+        count_azure_call("download_blob")
+        for chunk in container_client.download_blob(blob_name).chunks():
+            s.add_bytes(len(chunk))
+            view = memoryview(chunk)
+            while view:
+                take = min(block_size - filled, len(view))
+                sha.update(view[:take])
+                filled += take
+                view = view[take:]
+                if filled == block_size:
+                    hashes.append(sha.hexdigest())
+                    sha = hashlib.sha256()
+                    filled = 0
+
+    if filled:
+        hashes.append(sha.hexdigest())
+    return hashes
+
+
+def blob_block_root(container_client, blob_name, block_size):
+    """
+    Return the block hash root of a blob, from its block ids when possible.
+    """
+    committed = committed_block_hashes(container_client, blob_name)
+    if committed is not None and committed[0] == block_size:
+        return block_hash_root(committed[1])
+    return block_hash_root(compute_blob_block_hashes(container_client, blob_name, block_size))
+
+
+def find_asset_by_block_hashes(container_client, vendor_folder, filename, block_hashes, block_size):
+    """
+    Find an existing asset ZIP with the same name and block hash root.
+
+    Like find_asset_by_hash, but for the ASSET_HASH_SCHEME. Blobs without a
+    root in their metadata are backfilled from their committed block ids
+    (no download) or, for older uploads, by hashing them block by block.
+
+    Args:
+        container_client: Azure container client
+        vendor_folder (str): Vendor folder name (e.g., 'vendor=Grote')
+        filename (str): Original ZIP filename
+        block_hashes (list): Hex SHA-256 of every block, computed by the client
+        block_size (int): Block size the client hashed with
+
+    Returns:
+        str or None: Matching blob path, or None if no match exists
+    """
+    return _find_indexed_asset(
+        container_client,
+        vendor_folder,
+        filename,
+        {
+            ASSET_ROOT_METADATA_KEY: block_hash_root(block_hashes),
+            ASSET_BLOCK_SIZE_METADATA_KEY: str(block_size),
+        },
+        lambda blob_name: {
+            ASSET_ROOT_METADATA_KEY: blob_block_root(container_client, blob_name, block_size),
+            ASSET_BLOCK_SIZE_METADATA_KEY: str(block_size),
+        },
+    )
+
+
+def reusable_asset_blocks(container_client, vendor_folder, filename, block_hashes, block_size,
+                          max_candidates=3):
+    """
+    Find blocks of a new asset ZIP that already exist in a previous upload.
+
+    The newest previous uploads of the same filename are checked (via their
+    block ids, no download); the first one with the same block size is used
+    as the source.
+
+    Returns:
+        dict or None: source_blob_path and blocks ([new index, source index]
+            pairs), or None if nothing can be reused
+    """
+    prefix = f"raw/{vendor_folder}/assets/"
+    candidates = sorted(
+        (blob.name for blob in list_blobs_cached(container_client, prefix) if blob.name.endswith(filename)),
+        reverse=True,
+    )[:max_candidates]
+
+    for name in candidates:
+        committed = committed_block_hashes(container_client, name)
+        if committed is None or committed[0] != block_size:
+            continue
+
+        source_index = {block_hash: index for index, block_hash in enumerate(committed[1])}
+        blocks = [
+            [index, source_index[block_hash]]
+            for index, block_hash in enumerate(block_hashes)
+            if block_hash in source_index
+        ]
+        if blocks:
+            return {"source_blob_path": name, "blocks": blocks}
+        return None
+
+    return None
+
+
+def upload_blob(local_path, blob_path, connection_string, container_name, metadata=None):
     """
     Upload a file to Azure Blob Storage.
     
@@ -125,16 +723,246 @@ def upload_blob(local_path, blob_path, connection_string, container_name):
         blob_path (str): Destination blob path in container
         connection_string (str): Azure Storage connection string
         container_name (str): Azure container name
+        metadata (dict, optional): Blob metadata to store with the upload
         
     Returns:
         str: Full blob path in format 'container/blob_path'
     """
-    blob_service_client = get_blob_service_client(connection_string)
-    container_client = blob_service_client.get_container_client(container_name)
+    container_client = get_container_client(connection_string, container_name)
+    blob_client = container_client.get_blob_client(blob_path)
+
+    with span("upload_blob", blob=blob_path) as s, open(local_path, "rb") as data:
+        count_azure_call("upload_blob")
+        blob_client.upload_blob(data, overwrite=True, metadata=metadata)
+        s.add_bytes(os.fstat(data.fileno()).st_size)
+    invalidate_blob_listing(container_name, blob_path)
+
+    print(f"✅ Uploaded to Azure: {blob_path}")
+    return f"{container_name}/{blob_path}"
+
+
+def make_block_id(index):
+    """
+    Return the base64 block id of the index-th block (fixed width, as Azure requires).
+    """
+    return base64.b64encode(f"{index:08d}".encode()).decode()
+
+
+def upload_stream(stream, blob_path, connection_string, container_name,
+                  archive_path=None, block_size=STREAM_BLOCK_SIZE,
+                  max_in_flight=STREAM_MAX_IN_FLIGHT, on_chunk=None):
+    """
+    Upload a readable stream to Azure Blob Storage in a single pass.
+
+    Each chunk read from the stream is hashed, staged as a block and, if
+    archive_path is given, written to a local archive copy, so the data is
+    never written to disk and read back before it is uploaded. At most
+    max_in_flight blocks are held in memory at once.
+
+    Args:
+        stream: Binary file-like object (e.g. FileStorage.stream)
+        blob_path (str): Destination blob path in container
+        connection_string (str): Azure Storage connection string
+        container_name (str): Azure container name
+        archive_path (str, optional): Local path to keep a copy of the data
+        block_size (int): Bytes per staged block
+        max_in_flight (int): Maximum blocks being staged concurrently
+        on_chunk (callable, optional): Called with every chunk read, e.g. to
+            validate the data while it is uploaded
+
+    Returns:
+        dict: blob ('container/blob_path'), sha256, size, archive_path
+    """
+    container_client = get_container_client(connection_string, container_name)
+    blob_client = container_client.get_blob_client(blob_path)
+
+    sha = hashlib.sha256()
+    size = 0
+    block_ids = []
+    pending = []
+
+    archive = None
+    if archive_path:
+        os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+        archive = open(archive_path, "wb")
+
+    try:
+        with span("upload_stream", blob=blob_path) as s, ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            while True:
+                chunk = stream.read(block_size)
+                if not chunk:
+                    break
+
+                sha.update(chunk)
+                size += len(chunk)
+                if archive:
+                    archive.write(chunk)
+                if on_chunk:
+                    on_chunk(chunk)
+
+                block_id = make_block_id(len(block_ids))
+                block_ids.append(block_id)
+                count_azure_call("stage_block")
+                pending.append(pool.submit(blob_client.stage_block, block_id, chunk))
+
+                # Bound memory: wait for the oldest block before reading more
+                if len(pending) >= max_in_flight:
+                    pending.pop(0).result()
+
+            for future in pending:
+                future.result()
+            s.add_bytes(size)
+    finally:
+        if archive:
+            archive.close()
+
+    file_hash = sha.hexdigest()
+    count_azure_call("commit_block_list")
+    blob_client.commit_block_list(block_ids, metadata={ASSET_HASH_METADATA_KEY: file_hash})
+    invalidate_blob_listing(container_name, blob_path)
+
+    print(f"✅ Streamed to Azure: {blob_path}")
+    return {
+        "blob": f"{container_name}/{blob_path}",
+        "sha256": file_hash,
+        "size": size,
+        "archive_path": archive_path,
+    }
+
+
+def _load_upload_journal(journal_path, expected):
+    """
+    Return the staged block indices recorded in a journal, or an empty set if
+    the journal is missing or belongs to a different file/blob/block size.
+    """
+    if not os.path.isfile(journal_path):
+        return set()
+
+    try:
+        with open(journal_path) as f:
+            journal = json.load(f)
+    except (OSError, ValueError):
+        return set()
+
+    if any(journal.get(key) != value for key, value in expected.items()):
+        return set()
+
+    return set(journal.get("staged_blocks", []))
+
+
+def _save_upload_journal(journal_path, expected, staged):
+    tmp_path = f"{journal_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({**expected, "staged_blocks": sorted(staged)}, f)
+    os.replace(tmp_path, journal_path)
+
+
+def upload_file_resumable(local_path, blob_path, connection_string, container_name,
+                          block_size=8 * 1024 * 1024, max_concurrency=4,
+                          journal_path=None, metadata=None, progress=None,
+                          block_hash_ids=False):
+    """
+    Upload a large file as staged blocks, resuming an interrupted upload.
+
+    Staged block indices are recorded in a local journal. On a rerun for the
+    same file, blob path and block size, blocks that are still staged in
+    Azure are skipped and only the missing ones are uploaded before the final
+    commit_block_list. The journal is removed once the blob is committed.
+
+    Args:
+        local_path (str): Local file path
+        blob_path (str): Destination blob path in container
+        connection_string (str): Azure Storage connection string
+        container_name (str): Azure container name
+        block_size (int): Bytes per block
+        max_concurrency (int): Blocks uploaded in parallel
+        journal_path (str, optional): Journal location (default: '<local_path>.upload.json')
+        metadata (dict, optional): Blob metadata set on commit
+        progress (callable, optional): Called as progress(done_blocks, total_blocks)
+        block_hash_ids (bool): Name the blocks with asset_block_id, as browser
+            asset uploads do, so later uploads can match and reuse them from
+            the committed block list without downloading the blob; costs one
+            extra read of the file to hash it block by block
+
+    Returns:
+        str: Full blob path in format 'container/blob_path'
+    """
+    journal_path = journal_path or f"{local_path}.upload.json"
+    stat = os.stat(local_path)
+    total_blocks = -(-stat.st_size // block_size)
+
+    expected = {
+        "blob_path": f"{container_name}/{blob_path}",
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "block_size": block_size,
+    }
+    if block_hash_ids:
+        block_ids = [
+            asset_block_id(i, block_hash)
+            for i, block_hash in enumerate(file_block_hashes(local_path, block_size))
+        ]
+        expected["block_ids"] = ASSET_HASH_SCHEME
+    else:
+        block_ids = [make_block_id(i) for i in range(total_blocks)]
+
+    container_client = get_container_client(connection_string, container_name)
     blob_client = container_client.get_blob_client(blob_path)
 
-    with open(local_path, "rb") as data:
-        blob_client.upload_blob(data, overwrite=True)
+    # Trust the journal only for blocks Azure still holds as uncommitted
+    staged = _load_upload_journal(journal_path, expected)
+    if staged:
+        try:
+            count_azure_call("get_block_list")
+            _, uncommitted = blob_client.get_block_list("uncommitted")
+            on_server = {block.id for block in uncommitted}
+        except ResourceNotFoundError:
+            on_server = set()
+        staged = {i for i in staged if i < total_blocks and block_ids[i] in on_server}
+        print(f"↩️ Resuming upload: {len(staged)}/{total_blocks} blocks already staged")
+
+    def stage(index):
+        with open(local_path, "rb") as f:
+            f.seek(index * block_size)
+            data = f.read(block_size)
+        count_azure_call("stage_block")
+        blob_client.stage_block(block_ids[index], data)
+        return index
+
+    journal_lock = threading.Lock()
+    remaining = [i for i in range(total_blocks) if i not in staged]
+
+    with span("upload_file_resumable", blob=blob_path) as s, ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        futures = [pool.submit(in_trace_context(stage), i) for i in remaining]
+        s.add_bytes(sum(min(block_size, stat.st_size - i * block_size) for i in remaining))
+        try:
+            for future in as_completed(futures):
+                index = future.result()
+                with journal_lock:
+                    staged.add(index)
+                    _save_upload_journal(journal_path, expected, staged)
+                if progress:
+                    progress(len(staged), total_blocks)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            # as_completed may report the failure before blocks that finished
+            # earlier; journal those too so a rerun does not stage them again
+            wait(futures)
+            with journal_lock:
+                staged.update(
+                    future.result() for future in futures
+                    if not future.cancelled() and future.exception() is None
+                )
+                _save_upload_journal(journal_path, expected, staged)
+            raise
+
+    count_azure_call("commit_block_list")
+    blob_client.commit_block_list(block_ids, metadata=metadata)
+    invalidate_blob_listing(container_name, blob_path)
+
+    if os.path.isfile(journal_path):
+        os.remove(journal_path)
 
     print(f"✅ Uploaded to Azure: {blob_path}")
     return f"{container_name}/{blob_path}"
@@ -151,157 +979,250 @@ def upload_json_blob(
 
     Used for notify markers (human-in-the-loop triggers).
     """
-    blob_service_client = BlobServiceClient.from_connection_string(
-        connection_string
-    )
-    container_client = blob_service_client.get_container_client(
-        container_name
-    )
-
+    container_client = get_container_client(connection_string, container_name)
     blob_client = container_client.get_blob_client(blob_path)
 
     payload = json.dumps(data, indent=2)
 
-    blob_client.upload_blob(
-        payload,
-        overwrite=True,
-        content_settings=ContentSettings(
-            content_type="application/json"
+    with span("upload_json_blob", blob=blob_path) as s:
+        count_azure_call("upload_blob")
+        blob_client.upload_blob(
+            payload,
+            overwrite=True,
+            content_settings=ContentSettings(
+                content_type="application/json"
+            )
         )
-    )
+        s.add_bytes(len(payload.encode()))
+    invalidate_blob_listing(container_name, blob_path)
 
 
+def run_uploads_parallel(uploads, max_workers=AZURE_UPLOAD_WORKERS):
+    """
+    Run independent upload calls concurrently on a bounded thread pool.
 
-def upload_to_azure_bronze_opticat(vendor, xml_local_path, pricing_local_path, 
-                           connection_string, container_name, upload_folder):
+    Waits for every call to finish before returning, so a failure never
+    leaves uploads running in the background.
+
+    Args:
+        uploads (list): Zero-argument callables (e.g. functools.partial of upload_blob)
+        max_workers (int): Maximum concurrent uploads
+
+    Returns:
+        list: Result of each call, in input order
+
+    Raises:
+        Exception: The first failed upload's error, in input order
     """
-    Upload product XML, pricing XLSX, and assets ZIP to Azure Bronze.
-    Includes: hash check, skip-if-same, smart deletion, manifest updates.
-    
+    if not uploads:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(uploads))) as pool:
+        futures = [pool.submit(in_trace_context(upload)) for upload in uploads]
+
+    return [future.result() for future in futures]
+
+
+@traced()
+def upload_manifest_and_marker(local_manifest_path, manifest_blob_path, notify_marker,
+                               connection_string, container_name):
+    """
+    Upload a submission manifest and its notify marker in parallel.
+
     Args:
-        vendor (str): Vendor name
-        xml_local_path (str): Local path to XML file
-        pricing_local_path (str): Local path to pricing Excel file
+        local_manifest_path (str): Local manifest JSON path
+        manifest_blob_path (str): Destination manifest blob path
+        notify_marker (tuple or None): (blob_path, payload) of the notify marker
         connection_string (str): Azure Storage connection string
         container_name (str): Azure container name
-        upload_folder (str): Base upload folder for local manifest storage
-        
-    Returns:
-        None
     """
-    timestamp = utc_timestamp()
-    safe_vendor = safe_vendor_key(vendor)
+    uploads = [
+        partial(upload_blob, local_manifest_path, manifest_blob_path, connection_string, container_name),
+    ]
+    if notify_marker:
+        marker_blob_path, marker_payload = notify_marker
+        uploads.append(
+            partial(upload_json_blob, marker_payload, marker_blob_path, connection_string, container_name)
+        )
+
+    run_uploads_parallel(uploads)
+
+
+def opticat_blob_paths(vendor, timestamp):
+    """
+    Return the Bronze (xml_blob_path, pricing_blob_path) of an OptiCat submission.
+    """
     vendor_folder = f"vendor={vendor}"
+    return (
+        f"raw/{vendor_folder}/product/{timestamp}_product.xml",
+        f"raw/{vendor_folder}/pricing/{timestamp}_pricing.xlsx",
+    )
 
-    blob_service_client = get_blob_service_client(connection_string)
-    container_client = blob_service_client.get_container_client(container_name)
 
-    # --------------- XML + Pricing always uploaded ---------------
-    xml_blob_path = f"raw/{vendor_folder}/product/{timestamp}_product.xml"
-    pricing_blob_path = f"raw/{vendor_folder}/pricing/{timestamp}_pricing.xlsx"
+def non_opticat_blob_path(vendor, timestamp):
+    """
+    Return the Bronze unified XLSX blob path of a Non-OptiCat submission.
+    """
+    return f"raw/vendor={vendor}/unified/{timestamp}_unified.xlsx"
 
-    xml_blob_full = upload_blob(xml_local_path, xml_blob_path, connection_string, container_name)
-    pricing_blob_full = upload_blob(pricing_local_path, pricing_blob_path, connection_string, container_name)
 
+def sibling_blob_path(blob_full, suffix):
+    """
+    Return the path of a JSON blob stored next to a data blob, e.g.
+    'container/raw/.../X_unified.xlsx' -> 'raw/.../X_unified.delta.json'.
+    """
+    blob_path = blob_full.split("/", 1)[1]
+    return f"{os.path.splitext(blob_path)[0]}.{suffix}.json"
 
-    # --------------- Create manifest ---------------
-    manifest = {
-    "vendor": vendor,
-    "timestamp": timestamp,
-    "azure_xml_blob": xml_blob_full,
-    "azure_pricing_blob": pricing_blob_full,
-    "assets_uploaded_via": "browser_sas",
-}
 
+def download_json_blob(blob_full, connection_string):
+    """
+    Download and parse a JSON blob given as 'container/blob_path'; None if missing.
+    """
+    container_name, blob_path = blob_full.split("/", 1)
+    container_client = get_container_client(connection_string, container_name)
+    try:
+        count_azure_call("download_blob")
+        return json.loads(container_client.get_blob_client(blob_path).download_blob().readall())
+    except ResourceNotFoundError:
+        return None
+
+
+@traced()
+def write_bronze_manifest(manifest, subfolder, notify_marker, connection_string,
+                          container_name, upload_folder):
+    """
+    Store a submission manifest locally and in Azure, together with its notify marker.
+
+    Must only be called once every data blob of the submission is uploaded.
+
+    Args:
+        manifest (dict): Manifest document; its vendor and timestamp name the files
+        subfolder (str): Local manifest subfolder ('opticat' or 'non_opticat')
+        notify_marker (tuple or None): (blob_path, payload) of the notify marker
+        connection_string (str): Azure Storage connection string
+        container_name (str): Azure container name
+        upload_folder (str): Base upload folder for local manifest storage
+
+    Returns:
+        str: Manifest blob path
+    """
+    vendor = manifest["vendor"]
+    local_manifest_dir = os.path.join(upload_folder, vendor, subfolder)
 
-    local_manifest_dir = os.path.join(upload_folder, vendor, "opticat")
     os.makedirs(local_manifest_dir, exist_ok=True)
-    manifest_filename = f"manifest-{safe_vendor}-{timestamp}.json"
+    manifest_filename = f"manifest-{safe_vendor_key(vendor)}-{manifest['timestamp']}.json"
     local_manifest_path = os.path.join(local_manifest_dir, manifest_filename)
 
-
     with open(local_manifest_path, "w") as f:
         json.dump(manifest, f, indent=4)
 
-    manifest_blob_path = f"raw/{vendor_folder}/logs/{manifest_filename}"
-    upload_blob(local_manifest_path, manifest_blob_path, connection_string, container_name)
+    manifest_blob_path = f"raw/vendor={vendor}/logs/{manifest_filename}"
+    upload_manifest_and_marker(
+        local_manifest_path,
+        manifest_blob_path,
+        notify_marker,
+        connection_string,
+        container_name,
+    )
 
     print(f"📄 Manifest created and uploaded: {manifest_blob_path}")
+    return manifest_blob_path
 
-    
-def upload_to_azure_bronze_non_opticat(
-        vendor,
-        unified_local_path,
-        connection_string,
-        container_name,
-        upload_folder):
+
+def upload_to_azure_bronze_opticat(vendor, xml_local_path, pricing_local_path,
+                                   connection_string, container_name):
     """
-    Upload unified XLSX and optional assets ZIP to Azure Bronze for NON-OptiCat vendors.
-    Mirrors the structure and behavior of upload_to_azure_bronze_opticat.
+    Upload the product XML and pricing XLSX of an OptiCat submission to Bronze.
 
-    Structure created in Azure:
-        raw/vendor=<Vendor>/unified/<timestamp>_unified.xlsx
-        raw/vendor=<Vendor>/assets/<timestamp>_assets.zip
-        raw/vendor=<Vendor>/logs/manifest_<timestamp>.json
+    Both go up in parallel. The manifest and notify marker are left to the
+    caller (see submission_service.publish_bronze_submission), which must
+    only write them once this returns.
 
-    Includes:
-        - hash check for assets ZIP
-        - skip upload if same hash
-        - delete old ZIPs, keep only latest
-        - store manifest locally and in Azure
+    Args:
+        vendor (str): Vendor name
+        xml_local_path (str): Local path to XML file
+        pricing_local_path (str): Local path to pricing Excel file
+        connection_string (str): Azure Storage connection string
+        container_name (str): Azure container name
+
+    Returns:
+        dict: timestamp (str) used in the blob names, blobs (manifest key ->
+            'container/blob_path') and files (manifest key -> {sha256, size}
+            of the local file, hashed after its upload succeeded)
     """
+    timestamp = utc_timestamp()
+    xml_blob_path, pricing_blob_path = opticat_blob_paths(vendor, timestamp)
+
+    xml_blob_full, pricing_blob_full = run_uploads_parallel([
+        partial(upload_blob, xml_local_path, xml_blob_path, connection_string, container_name),
+        partial(upload_blob, pricing_local_path, pricing_blob_path, connection_string, container_name),
+    ])
+
+    return {
+        "timestamp": timestamp,
+        "blobs": {
+            "azure_xml_blob": xml_blob_full,
+            "azure_pricing_blob": pricing_blob_full,
+        },
+        "files": {
+            "azure_xml_blob": local_file_info(xml_local_path),
+            "azure_pricing_blob": local_file_info(pricing_local_path),
+        },
+    }
+
+
+def upload_to_azure_bronze_non_opticat(vendor, unified_local_path, connection_string, container_name):
+    """
+    Upload the unified XLSX of a Non-OptiCat submission to Bronze.
 
-    vendor_folder = f"vendor={vendor}"
+    Blob created in Azure:
+        raw/vendor=<Vendor>/unified/<timestamp>_unified.xlsx
+
+    Assets go straight from the browser to Azure (SAS upload), so they are
+    not handled here. The manifest and notify marker are left to the caller
+    (see submission_service.publish_bronze_submission).
 
-    blob_service_client = get_blob_service_client(connection_string)
-    container_client = blob_service_client.get_container_client(container_name)
+    Args:
+        vendor (str): Vendor name
+        unified_local_path (str): Local path to the unified XLSX
+        connection_string (str): Azure Storage connection string
+        container_name (str): Azure container name
+
+    Returns:
+        dict: timestamp, blobs and files, as for upload_to_azure_bronze_opticat
+    """
     timestamp = utc_timestamp()
-    safe_vendor = safe_vendor_key(vendor)
 
-    # -------------------- Upload unified XLSX --------------------
-    unified_blob_path = f"raw/{vendor_folder}/unified/{timestamp}_unified.xlsx"
     azure_unified_blob = upload_blob(
         unified_local_path,
-        unified_blob_path,
+        non_opticat_blob_path(vendor, timestamp),
         connection_string,
         container_name,
     )
 
- 
-
-    # -------------------- Create manifest --------------------
-    manifest = {
-    "vendor": vendor,
-    "timestamp": timestamp,
-    "azure_unified_blob": azure_unified_blob,
-    "assets_uploaded_via": "browser_sas",
-}
-
+    return {
+        "timestamp": timestamp,
+        "blobs": {"azure_unified_blob": azure_unified_blob},
+        "files": {"azure_unified_blob": local_file_info(unified_local_path)},
+    }
 
-    local_manifest_dir = os.path.join(upload_folder, vendor, "non_opticat")
-    os.makedirs(local_manifest_dir, exist_ok=True)
-
-    manifest_filename = f"manifest-{safe_vendor}-{timestamp}.json"
-    local_manifest_path = os.path.join(local_manifest_dir, manifest_filename)
 
-    with open(local_manifest_path, "w") as f:
-        json.dump(manifest, f, indent=4)
-
-    manifest_blob_path = f"raw/{vendor_folder}/logs/{manifest_filename}"
-    upload_blob(
-        local_manifest_path,
-        manifest_blob_path,
-        connection_string,
-        container_name,
-    )
+def cleanup_old_assets_except(container_client, vendor_folder, keep_blob_path, dry_run=False):
+    """
+    Delete every asset blob of a vendor except the ones to keep.
 
-    print(f"📄 Manifest created and uploaded: {manifest_blob_path}")
+    Args:
+        container_client: Azure container client
+        vendor_folder (str): Vendor folder name (e.g., 'vendor=Grote')
+        keep_blob_path (str or iterable): Blob path(s) to keep
+        dry_run (bool): Only report what would be deleted
 
-def cleanup_old_assets_except(container_client, vendor_folder, keep_blob_path):
+    Returns:
+        dict: Report from delete_blobs_batched
+    """
+    keep = {keep_blob_path} if isinstance(keep_blob_path, str) else set(keep_blob_path)
     prefix = f"raw/{vendor_folder}/assets/"
-    blobs = container_client.list_blobs(name_starts_with=prefix)
+    names = [blob.name for blob in list_blobs_cached(container_client, prefix) if blob.name not in keep]
 
-    for blob in blobs:
-        if blob.name != keep_blob_path:
-            container_client.delete_blob(blob.name)
-            print(f"[CLEANUP] Deleted old asset: {blob.name}")
+    return delete_blobs_batched(container_client, names, dry_run=dry_run)
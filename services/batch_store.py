@@ -0,0 +1,317 @@
+"""
+Server-side storage for single-product batches in FGI Vendor Portal
+
+The Flask session only carries the batch id; the rows themselves live in a
+local SQLite database or in per-batch JSON-lines files. Batches nobody has
+added to for BATCH_TTL_SECONDS are abandoned (the session expired or the
+browser was closed) and are deleted by expire().
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+
+from services.sqlite_transaction import ClosingTransaction
+
+
+# Row lists making up a single-product batch (one per Excel tab + UI summary)
+BATCH_SECTIONS = (
+    "batch_item_rows",
+    "batch_desc_rows",
+    "batch_ext_rows",
+    "batch_attr_rows",
+    "batch_interchange_rows",
+    "batch_package_rows",
+    "batch_asset_rows",
+    "batch_price_rows",
+    "pending_products",
+)
+
+# Batches untouched this long are deleted by expire()
+BATCH_TTL_SECONDS = int(os.getenv("BATCH_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+class DuplicateSkuError(ValueError):
+    """
+    Raised when a product is appended to a batch that already holds its SKU.
+    """
+
+    def __init__(self, sku):
+        super().__init__(f"SKU '{sku}' is already in the batch.")
+        self.sku = sku
+
+
+def _pending_skus(rows_by_section):
+    return [row["sku"] for row in rows_by_section.get("pending_products", [])]
+
+
+def new_batch_id():
+    """
+    Generate a new unique batch id.
+
+    Returns:
+        str: Random hex batch id
+    """
+    return uuid.uuid4().hex
+
+
+class SQLiteBatchStore:
+    """
+    Batch store backed by a single local SQLite database.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS batch_rows ("
+                " batch_id TEXT NOT NULL,"
+                " section TEXT NOT NULL,"
+                " row_json TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_batch_rows "
+                "ON batch_rows (batch_id, section)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS batch_skus ("
+                " batch_id TEXT NOT NULL,"
+                " sku TEXT NOT NULL,"
+                " PRIMARY KEY (batch_id, sku))"
+            )
+
+            # Last append per batch, for expire()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS batches ("
+                " batch_id TEXT PRIMARY KEY,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _transaction(self):
+        # sqlite3's own context manager commits but never closes
+        return ClosingTransaction(self._connect())
+
+    def append(self, batch_id, rows_by_section):
+        """
+        Append rows to a batch in one transaction.
+
+        Args:
+            batch_id (str): Batch id
+            rows_by_section (dict): Section name -> list of row dicts
+
+        Raises:
+            DuplicateSkuError: If a pending_products SKU is already in the
+                batch; nothing is appended
+        """
+        params = [
+            (batch_id, section, json.dumps(row))
+            for section, rows in rows_by_section.items()
+            for row in rows
+        ]
+        with self._transaction() as conn:
+            try:
+                for sku in _pending_skus(rows_by_section):
+                    conn.execute("INSERT INTO batch_skus (batch_id, sku) VALUES (?, ?)", (batch_id, sku))
+            except sqlite3.IntegrityError:
+                raise DuplicateSkuError(sku) from None
+            conn.executemany(
+                "INSERT INTO batch_rows (batch_id, section, row_json) VALUES (?, ?, ?)",
+                params,
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO batches (batch_id, updated_at) VALUES (?, ?)",
+                (batch_id, time.time()),
+            )
+
+    def get(self, batch_id, section):
+        """
+        Return all rows of one batch section in insertion order.
+
+        Args:
+            batch_id (str): Batch id
+            section (str): Section name from BATCH_SECTIONS
+
+        Returns:
+            list: Row dicts
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "SELECT row_json FROM batch_rows "
+                "WHERE batch_id = ? AND section = ? ORDER BY rowid",
+                (batch_id, section),
+            )
+            return [json.loads(row_json) for (row_json,) in cursor]
+
+    def get_all(self, batch_id):
+        """
+        Return every section of a batch.
+
+        Args:
+            batch_id (str): Batch id
+
+        Returns:
+            dict: Section name -> list of row dicts
+        """
+        batch = {section: [] for section in BATCH_SECTIONS}
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "SELECT section, row_json FROM batch_rows "
+                "WHERE batch_id = ? ORDER BY rowid",
+                (batch_id,),
+            )
+            for section, row_json in cursor:
+                batch.setdefault(section, []).append(json.loads(row_json))
+        return batch
+
+    def clear(self, batch_id):
+        """
+        Delete all rows of a batch.
+
+        Args:
+            batch_id (str): Batch id
+        """
+        with self._transaction() as conn:
+            self._delete(conn, [batch_id])
+
+    def skus(self, batch_id):
+        """
+        Return the SKUs of the products in a batch.
+
+        Args:
+            batch_id (str): Batch id
+
+        Returns:
+            set: SKUs
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute("SELECT sku FROM batch_skus WHERE batch_id = ?", (batch_id,))
+            return {sku for (sku,) in cursor}
+
+    def has_sku(self, batch_id, sku):
+        """
+        Return True if a product with this SKU is already in the batch.
+        """
+        with self._transaction() as conn:
+            return conn.execute(
+                "SELECT 1 FROM batch_skus WHERE batch_id = ? AND sku = ?", (batch_id, sku)
+            ).fetchone() is not None
+
+    def expire(self, ttl_seconds=BATCH_TTL_SECONDS):
+        """
+        Delete batches nobody has appended to for ttl_seconds.
+
+        Args:
+            ttl_seconds (float): Age of the last append after which a batch
+                is abandoned
+
+        Returns:
+            int: Batches deleted
+        """
+        with self._transaction() as conn:
+            batch_ids = [
+                batch_id for (batch_id,) in conn.execute(
+                    "SELECT batch_id FROM batches WHERE updated_at < ?", (time.time() - ttl_seconds,)
+                )
+            ]
+            self._delete(conn, batch_ids)
+        return len(batch_ids)
+
+    @staticmethod
+    def _delete(conn, batch_ids):
+        params = [(batch_id,) for batch_id in batch_ids]
+        for table in ("batch_rows", "batch_skus", "batches"):
+            conn.executemany(f"DELETE FROM {table} WHERE batch_id = ?", params)
+
+
+class FileBatchStore:
+    """
+    Batch store writing one JSON-lines file per batch section.
+
+    Layout: <base_dir>/<batch_id>/<section>.jsonl
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        os.makedirs(base_dir, exist_ok=True)
+
+    def _batch_dir(self, batch_id):
+        return os.path.join(self.base_dir, batch_id)
+
+    def append(self, batch_id, rows_by_section):
+        for sku in _pending_skus(rows_by_section):
+            if self.has_sku(batch_id, sku):
+                raise DuplicateSkuError(sku)
+
+        batch_dir = self._batch_dir(batch_id)
+        os.makedirs(batch_dir, exist_ok=True)
+
+        for section, rows in rows_by_section.items():
+            if not rows:
+                continue
+            with open(os.path.join(batch_dir, f"{section}.jsonl"), "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row) + "\n")
+
+        # The folder's mtime marks the last append, for expire()
+        os.utime(batch_dir)
+
+    def get(self, batch_id, section):
+        path = os.path.join(self._batch_dir(batch_id), f"{section}.jsonl")
+        if not os.path.isfile(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def get_all(self, batch_id):
+        return {section: self.get(batch_id, section) for section in BATCH_SECTIONS}
+
+    def clear(self, batch_id):
+        shutil.rmtree(self._batch_dir(batch_id), ignore_errors=True)
+
+    def skus(self, batch_id):
+        return {row["sku"] for row in self.get(batch_id, "pending_products")}
+
+    def has_sku(self, batch_id, sku):
+        return sku in self.skus(batch_id)
+
+    def expire(self, ttl_seconds=BATCH_TTL_SECONDS):
+        cutoff = time.time() - ttl_seconds
+        expired = 0
+        for batch_id in os.listdir(self.base_dir):
+            batch_dir = self._batch_dir(batch_id)
+            try:
+                if not os.path.isdir(batch_dir) or os.path.getmtime(batch_dir) >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            shutil.rmtree(batch_dir, ignore_errors=True)
+            expired += 1
+        return expired
+
+
+def get_batch_store(backend, base_dir):
+    """
+    Create the configured batch store.
+
+    Args:
+        backend (str): 'sqlite' or 'file'
+        base_dir (str): Directory holding the batch data
+
+    Returns:
+        SQLiteBatchStore or FileBatchStore
+
+    Raises:
+        ValueError: If backend is unknown
+    """
+    if backend == "sqlite":
+        return SQLiteBatchStore(os.path.join(base_dir, "batches.db"))
+    if backend == "file":
+        return FileBatchStore(base_dir)
+    raise ValueError(f"Unknown batch store backend: {backend}")
@@ -0,0 +1,222 @@
+"""
+SKU-level deltas between successive vendor submissions for FGI Vendor Portal
+
+Every row of a submitted file is hashed and the row hashes are combined per
+SKU (and per sheet). Comparing these fingerprints with the ones saved for the
+vendor's previous submission gives the SKUs that were added, modified or
+deleted, so ingestion can process only what changed.
+"""
+import os
+import json
+import hashlib
+from xml.etree.ElementTree import tostring
+
+from openpyxl import load_workbook
+
+from services.excel_service import cell_text
+from validators.opticat_xml_validator import OPTICAT_ITEM_ELEMENT, validate_opticat_xml
+from validators.unified_workbook_validator import TEMPLATE_REFERENCE_SHEETS
+
+
+# Header names identifying the SKU column of a sheet (first match wins,
+# otherwise the first column is used)
+DELTA_KEY_COLUMNS = ("Part Number", "SKU")
+
+DIGEST_SIZE = 16
+
+
+def row_digest(data):
+    """
+    Return the binary digest of one row (bytes).
+    """
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+class SkuFingerprints:
+    """
+    Collects row digests per sheet and SKU and combines them into one
+    fingerprint per SKU.
+
+    A SKU with several rows in a sheet (e.g. pricing levels) gets one
+    fingerprint over all of them; row order does not matter.
+    """
+
+    def __init__(self):
+        self._digests = {}
+
+    def add(self, sheet, sku, digest):
+        skus = self._digests.setdefault(sheet, {})
+        if sku in skus:
+            skus[sku].append(digest)
+        else:
+            skus[sku] = [digest]
+
+    def add_xml_item(self, sku, element):
+        """
+        on_item callback for OpticatXmlValidator.
+        """
+        element.tail = None  # whitespace after the item is not part of it
+        self.add(OPTICAT_ITEM_ELEMENT, sku, row_digest(tostring(element)))
+
+    def result(self):
+        """
+        Returns:
+            dict: sheet -> {sku: hex fingerprint}
+        """
+        fingerprints = {}
+        for sheet, skus in self._digests.items():
+            fingerprints[sheet] = {
+                sku: (digests[0] if len(digests) == 1 else row_digest(b"".join(sorted(digests)))).hex()
+                for sku, digests in skus.items()
+            }
+        return fingerprints
+
+
+def fingerprint_workbook(path):
+    """
+    Fingerprint every SKU of an XLSX workbook, sheet by sheet.
+
+    Template reference sheets are skipped. Trailing empty cells are ignored,
+    so a row only changes its fingerprint when a value changes.
+
+    Args:
+        path (str): Local path of the workbook
+
+    Returns:
+        dict: sheet -> {sku: hex fingerprint}
+    """
+    collector = SkuFingerprints()
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            if ws.title in TEMPLATE_REFERENCE_SHEETS:
+                continue
+
+            rows = ws.iter_rows(values_only=True)
+            header = [cell_text(name) for name in next(rows, ())]
+            key_index = next(
+                (header.index(name) for name in DELTA_KEY_COLUMNS if name in header), 0
+            )
+
+            for values in rows:
+                texts = [cell_text(value) for value in values]
+                while texts and not texts[-1]:
+                    texts.pop()
+                if key_index >= len(texts) or not texts[key_index]:
+                    continue
+                collector.add(ws.title, texts[key_index], row_digest("\x1f".join(texts).encode()))
+    finally:
+        wb.close()
+
+    return collector.result()
+
+
+def fingerprint_opticat_xml(path):
+    """
+    Fingerprint every <Item> of an OptiCat product XML by its PartNumber.
+
+    Args:
+        path (str): Local path of the XML file
+
+    Returns:
+        dict: {"Item": {sku: hex fingerprint}}
+    """
+    collector = SkuFingerprints()
+    validate_opticat_xml(path, on_item=collector.add_xml_item)
+    return collector.result()
+
+
+def compute_delta(previous, current):
+    """
+    Compare two fingerprint sets.
+
+    Args:
+        previous (dict): sheet -> {sku: fingerprint} of the previous submission
+        current (dict): sheet -> {sku: fingerprint} of the new submission
+
+    Returns:
+        dict: sheet -> {added, modified, deleted} (sorted SKU lists); sheets
+            without changes are left out
+    """
+    delta = {}
+    for sheet in sorted(previous.keys() | current.keys()):
+        old = previous.get(sheet, {})
+        new = current.get(sheet, {})
+
+        added = sorted(new.keys() - old.keys())
+        deleted = sorted(old.keys() - new.keys())
+        modified = sorted(sku for sku in new.keys() & old.keys() if new[sku] != old[sku])
+
+        if added or modified or deleted:
+            delta[sheet] = {"added": added, "modified": modified, "deleted": deleted}
+    return delta
+
+
+def delta_counts(delta):
+    """
+    Return the total number of added, modified and deleted SKUs of a delta.
+    """
+    counts = {"added": 0, "modified": 0, "deleted": 0}
+    for changes in delta.values():
+        for kind in counts:
+            counts[kind] += len(changes[kind])
+    return counts
+
+
+# -----------------------------
+# LOCAL FINGERPRINT STORE
+# -----------------------------
+def fingerprint_file_path(manifest_dir, vendor_key, timestamp, blob_key):
+    """
+    Return the local path of a submission's saved fingerprints.
+    """
+    return os.path.join(manifest_dir, f"fingerprints-{vendor_key}-{timestamp}-{blob_key}.json")
+
+
+def save_fingerprints(path, fingerprints):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(fingerprints, f, separators=(",", ":"))
+
+
+def load_fingerprints(path):
+    """
+    Load saved fingerprints; None if the file does not exist.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def previous_manifest(manifest_dir, vendor_key, before_timestamp):
+    """
+    Find the vendor's latest local manifest older than before_timestamp.
+
+    Args:
+        manifest_dir (str): Local manifest folder (uploads/<vendor>/<subfolder>)
+        vendor_key (str): safe_vendor_key of the vendor
+        before_timestamp (str): Timestamp of the submission being written
+
+    Returns:
+        dict or None: Parsed manifest
+    """
+    prefix = f"manifest-{vendor_key}-"
+    try:
+        names = os.listdir(manifest_dir)
+    except FileNotFoundError:
+        return None
+
+    # Timestamps are YYYY-MM-DD_HH-MM-SS, so names sort chronologically
+    candidates = sorted(
+        name for name in names
+        if name.startswith(prefix) and name.endswith(".json")
+        and name[len(prefix):-len(".json")] < before_timestamp
+    )
+    if not candidates:
+        return None
+
+    with open(os.path.join(manifest_dir, candidates[-1])) as f:
+        return json.load(f)
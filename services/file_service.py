@@ -2,12 +2,21 @@
 File handling and validation services for FGI Vendor Portal
 """
 import os
+import json
+import mmap
 import hashlib
 from werkzeug.utils import secure_filename
+from services.tracing import span
 
 
 ALLOWED_EXTENSIONS = {'xml', 'xlsx'}
 
+# Bytes hashed per update in compute_file_hash
+HASH_BUFFER_SIZE = 1024 * 1024
+
+# Suffix of the sidecar file caching a file's hash (see compute_file_hash)
+HASH_SIDECAR_SUFFIX = ".sha256"
+
 
 def allowed_file(filename):
     """
@@ -22,9 +31,9 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def save_file(file, vendor_name, subfolder, upload_folder):
+def local_upload_path(file, vendor_name, subfolder, upload_folder):
     """
-    Save file locally to vendor-specific subfolder.
+    Return the local path an uploaded file is stored at, creating its folder.
     
     Args:
         file: FileStorage object from Flask request
@@ -33,29 +42,131 @@ def save_file(file, vendor_name, subfolder, upload_folder):
         upload_folder (str): Base upload directory path
         
     Returns:
-        str: Full filepath where file was saved
+        str: Full local filepath for the file
     """
     filename = secure_filename(file.filename)
     vendor_folder = os.path.join(upload_folder, vendor_name, subfolder)
     os.makedirs(vendor_folder, exist_ok=True)
-    filepath = os.path.join(vendor_folder, filename)
-    file.save(filepath)
+    return os.path.join(vendor_folder, filename)
+
+
+def save_file(file, vendor_name, subfolder, upload_folder):
+    """
+    Save file locally to vendor-specific subfolder.
+    
+    Args:
+        file: FileStorage object from Flask request
+        vendor_name (str): Name of the vendor
+        subfolder (str): Subfolder path (e.g., 'opticat', 'manual_assets')
+        upload_folder (str): Base upload directory path
+        
+    Returns:
+        str: Full filepath where file was saved
+    """
+    filepath = local_upload_path(file, vendor_name, subfolder, upload_folder)
+    with span("save_file", subfolder=subfolder) as s:
+        file.save(filepath)
+        s.add_bytes(os.path.getsize(filepath))
     return filepath
 
 
-def compute_file_hash(filepath):
+def _hash_readinto(filepath, buffer_size):
+    sha = hashlib.sha256()
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with open(filepath, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            sha.update(view[:n])
+    return sha.hexdigest()
+
+
+def _hash_mmap(filepath, buffer_size):
+    sha = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return sha.hexdigest()  # empty files cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, len(mapped), buffer_size):
+                    sha.update(view[offset:offset + buffer_size])
+            finally:
+                view.release()
+    return sha.hexdigest()
+
+
+def hash_sidecar_path(filepath):
+    """
+    Return the path of the sidecar file caching a file's SHA-256.
+    """
+    return f"{filepath}{HASH_SIDECAR_SUFFIX}"
+
+
+def _hash_cache_key(stat):
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "inode": stat.st_ino}
+
+
+def compute_file_hash(filepath, use_mmap=False, use_cache=False, buffer_size=HASH_BUFFER_SIZE):
     """
     Compute SHA-256 hash of a file without loading it entirely into RAM.
     Useful for detecting if asset ZIP has changed.
+
+    The file is read with readinto into one reused buffer (or mapped with
+    mmap), so a multi-GB file takes a few thousand hash updates. With
+    use_cache, the hash is stored in a '<file>.sha256' sidecar keyed by the
+    file's size, mtime and inode, and reused while those are unchanged.
     
     Args:
         filepath (str): Path to the file
+        use_mmap (bool): Hash a memory-mapped view instead of reading
+        use_cache (bool): Read / write the sidecar hash cache
+        buffer_size (int): Bytes hashed per update
         
     Returns:
         str: Hexadecimal SHA-256 hash string
     """
-    sha = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            sha.update(chunk)
-    return sha.hexdigest()
\ No newline at end of file
+    key = None
+    if use_cache:
+        key = _hash_cache_key(os.stat(filepath))
+        try:
+            with open(hash_sidecar_path(filepath)) as f:
+                cached = json.load(f)
+            if all(cached.get(name) == value for name, value in key.items()):
+                return cached["sha256"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    if use_mmap:
+        file_hash = _hash_mmap(filepath, buffer_size)
+    else:
+        file_hash = _hash_readinto(filepath, buffer_size)
+
+    if use_cache:
+        # Only cache if the file did not change while it was being hashed
+        if _hash_cache_key(os.stat(filepath)) == key:
+            try:
+                with open(hash_sidecar_path(filepath), "w") as f:
+                    json.dump({**key, "sha256": file_hash}, f)
+            except OSError as e:
+                print(f"⚠ Could not write hash cache for {filepath}: {e}")
+
+    return file_hash
+
+
+def local_file_info(filepath):
+    """
+    Return the SHA-256 hash and size of a local file, as recorded in manifests.
+
+    The Bronze upload functions call this once a file's upload succeeded;
+    the file is read a second time, so the hash costs one extra local pass.
+
+    Args:
+        filepath (str): Path to the file
+
+    Returns:
+        dict: sha256 (str), size (int)
+    """
+    return {"sha256": compute_file_hash(filepath), "size": os.path.getsize(filepath)}
@@ -0,0 +1,503 @@
+"""
+Bulk import of single-product batches for FGI Vendor Portal
+
+Vendors can upload a spreadsheet instead of submitting /single-product once
+per SKU. Accepted layouts:
+  - XLSX with the tabs written by create_multi_product_excel
+    (Item_Master, Descriptions, ..., Pricing)
+  - CSV with the Item_Master columns followed by the Pricing columns,
+    one row per pricing level (product columns repeated on every row)
+
+Each product is rebuilt as a single-product form and checked with
+validate_single_product_new, so bulk and manual entry share the same rules.
+"""
+import re
+import csv
+
+from openpyxl import load_workbook
+from werkzeug.datastructures import MultiDict
+
+from helpers.lookups import PRICING_METHODS
+from helpers.pricing_engine import base_prices, compute_pricing_columns, discount_multipliers
+from helpers.pricing_levels import EHC_FEE_COLUMNS, build_price_rows, concat_level_values, parse_pricing_levels
+from services.batch_store import BATCH_SECTIONS, DuplicateSkuError
+from services.excel_service import ITEM_MASTER_COLUMNS, MULTI_PRODUCT_SHEETS, cell_text
+from services.pricing_timeline import approved_pricing_conflicts
+from validators.pricing_validator import validate_single_product_new
+
+
+ALLOWED_IMPORT_EXTENSIONS = {"csv", "xlsx"}
+
+# Products validated and written to the batch store per transaction
+IMPORT_BATCH_SIZE = 500
+
+# Item_Master column -> single product form field
+ITEM_MASTER_FORM_FIELDS = {
+    "Vendor": "vendor_name",
+    "Part Number": "sku",
+    "UNSPSC": "unspsc_code",
+    "HazmatFlag": "hazmat_flag",
+    "Product Status": "product_status",
+    "Barcode Type": "barcode_type",
+    "Barcode Number": "barcode_number",
+    "Quantity UOM": "quantity_uom",
+    "Quantity Size": "quantity_size",
+    "VMRS Code": "vmrs_code",
+}
+
+# Pricing column -> level form field, for every pricing method
+PRICING_COMMON_FORM_FIELDS = [
+    ("Pricing Type", "level_type[]"),
+    ("Pricing Change Type", "level_price_change_type[]"),
+    ("MOQ Unit", "level_moq_uom[]"),
+    ("MOQ", "level_moq_qty[]"),
+    ("Currency", "level_currency[]"),
+    ("Tier Min Qty", "level_tier_min_qty[]"),
+    ("Tier Max Qty", "level_tier_max_qty[]"),
+]
+
+# Pricing column -> level form field, per pricing method (inverse of
+# build_price_rows; the base price of discount-based rows is derived, see
+# _discount_base_price)
+PRICING_METHOD_FORM_FIELDS = {
+    "net_cost": [
+        ("List Price", "level_net_list_price[]"),
+        ("Pricing Amount", "level_net_net_cost[]"),
+        ("Effective Date", "level_net_effective_date[]"),
+    ],
+    "price_levels": [
+        ("List Price", "level_pl_list_price[]"),
+        ("Jobber Price", "level_pl_jobber_price[]"),
+        ("Pricing Amount", "level_pl_net_cost[]"),
+        ("Effective Date", "level_pl_effective_date[]"),
+    ],
+    "discount_based": [
+        ("List Price", "level_db_list_price_opt[]"),
+        ("Discount %", "level_db_discount_pct[]"),
+        ("Effective Date", "level_db_effective_date[]"),
+    ],
+    "ehc_based": [("Pricing Amount", "level_ehc_base_price[]")] + list(EHC_FEE_COLUMNS),
+    "promo_pricing": [
+        ("Pricing Amount", "level_pr_promo_price[]"),
+        ("Start Date", "level_pr_start_date[]"),
+        ("End Date", "level_pr_end_date[]"),
+    ],
+    "quote_pricing": [
+        ("Pricing Amount", "level_qt_price[]"),
+        ("Start Date", "level_qt_start_date[]"),
+        ("End Date", "level_qt_end_date[]"),
+        ("Notes", "level_qt_number[]"),
+    ],
+    "tender_pricing": [
+        ("Pricing Amount", "level_td_price[]"),
+        ("Start Date", "level_td_start_date[]"),
+        ("End Date", "level_td_end_date[]"),
+        ("Notes", "level_td_number[]"),
+    ],
+    "core_pricing": [
+        ("Core Cost", "level_core_list_price[]"),
+        ("Core Part Number", "level_core_part_number[]"),
+    ],
+}
+
+# Notes written by build_price_rows for quote / tender numbers
+NOTE_PREFIXES = {
+    "level_qt_number[]": "Quote #:",
+    "level_td_number[]": "Tender #:",
+}
+
+# Every level field an imported level sets, so the level_*[] lists stay aligned
+_ALL_LEVEL_FIELDS = frozenset(
+    [field for _, field in PRICING_COMMON_FORM_FIELDS]
+    + [field for fields in PRICING_METHOD_FORM_FIELDS.values() for _, field in fields]
+    + ["level_pricing_method[]", "level_db_base_price[]"]
+)
+
+# Pricing Method cell: label as written to the workbook, or the method key
+_METHOD_BY_LABEL = {label.lower(): key for key, label in PRICING_METHODS.items()}
+_METHOD_BY_LABEL.update({key: key for key in PRICING_METHODS})
+
+# Child tabs: sheet title -> (batch section, columns a row must fill to be kept)
+_CHILD_SHEETS = {
+    "Descriptions": ("batch_desc_rows", None),
+    "Extended_Info": ("batch_ext_rows", None),
+    "Attributes": ("batch_attr_rows", None),
+    "Part_Interchange": ("batch_interchange_rows", None),
+    "Packages": ("batch_package_rows", None),
+    "Digital_Assets": ("batch_asset_rows", ("Media Type", "File Name")),
+}
+_SHEET_COLUMNS = dict(MULTI_PRODUCT_SHEETS)
+
+_PRICING_LEVEL_ERROR = re.compile(r"^Pricing Level (\d+)\b")
+
+
+def allowed_import_file(filename):
+    """
+    Check if a bulk import file has an allowed extension.
+
+    Args:
+        filename (str): Name of the file to check
+
+    Returns:
+        bool: True for .csv and .xlsx files
+    """
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_IMPORT_EXTENSIONS
+
+
+def _iter_table(rows):
+    """
+    Turn raw rows (header first) into (row number, row dict), skipping blank rows.
+    """
+    header = [cell_text(cell) for cell in next(rows, ())]
+    for row_number, values in enumerate(rows, start=2):
+        row = {name: cell_text(value) for name, value in zip(header, values) if name}
+        if any(row.values()):
+            yield row_number, row
+
+
+# ---------------------------------------
+# READERS: yield one product at a time
+# ---------------------------------------
+def _new_product(sheet, row_number, item):
+    return {
+        "sku": item.get("Part Number", ""),
+        "sheet": sheet,
+        "row": row_number,
+        "item": item,
+        "children": {section: [] for section, _ in _CHILD_SHEETS.values()},
+        "pricing": [],
+    }
+
+
+def iter_xlsx_products(path):
+    """
+    Read a multi-product workbook in read-only (streaming) mode.
+
+    Child tabs are grouped by SKU first; Item_Master is then streamed and
+    each product is yielded with its child and pricing rows.
+
+    Args:
+        path (str): Local path of the XLSX file
+
+    Yields:
+        dict: Product with sku, sheet, row, item, children, pricing.
+            Child rows without an Item_Master row are yielded last with
+            item set to None.
+    """
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        children = {}
+        for title in list(_CHILD_SHEETS) + ["Pricing"]:
+            if title not in wb.sheetnames:
+                continue
+            key = "Part Number" if title == "Pricing" else "SKU"
+            for row_number, row in _iter_table(wb[title].iter_rows(values_only=True)):
+                children.setdefault(row.get(key, ""), []).append((title, row_number, row))
+
+        if "Item_Master" in wb.sheetnames:
+            for row_number, item in _iter_table(wb["Item_Master"].iter_rows(values_only=True)):
+                product = _new_product("Item_Master", row_number, item)
+                for title, child_row_number, row in children.pop(product["sku"], []):
+                    if title == "Pricing":
+                        product["pricing"].append((child_row_number, row))
+                    else:
+                        product["children"][_CHILD_SHEETS[title][0]].append((title, child_row_number, row))
+                yield product
+    finally:
+        wb.close()
+
+    for sku, rows in children.items():
+        title, row_number, _ = rows[0]
+        yield {"sku": sku, "sheet": title, "row": row_number, "item": None}
+
+
+def iter_csv_products(path):
+    """
+    Read a flat CSV (Item_Master + Pricing columns, one row per pricing level).
+
+    Rows are grouped by Part Number; a product's item columns are taken
+    from its first row.
+
+    Args:
+        path (str): Local path of the CSV file
+
+    Yields:
+        dict: Product with sku, sheet, row, item, children, pricing
+    """
+    products = {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row_number, row in _iter_table(iter(csv.reader(f))):
+            sku = row.get("Part Number", "")
+            product = products.get(sku)
+            if product is None:
+                item = {column: row.get(column, "") for column in ITEM_MASTER_COLUMNS}
+                product = products[sku] = _new_product("CSV", row_number, item)
+            product["pricing"].append((row_number, row))
+
+    yield from products.values()
+
+
+def iter_import_products(path):
+    """
+    Yield the products of a bulk import file (XLSX or CSV).
+    """
+    if path.lower().endswith(".csv"):
+        return iter_csv_products(path)
+    return iter_xlsx_products(path)
+
+
+# ---------------------------------------
+# VALIDATION + ROW BUILDING
+# ---------------------------------------
+def _pricing_method_key(value):
+    return _METHOD_BY_LABEL.get(value.strip().lower(), value.strip())
+
+
+def _discount_base_price(row):
+    """
+    Base price of a discount-based Pricing row: Pricing Amount is the net
+    price, so base = Pricing Amount / (1 - Discount %). Falls back to the
+    Pricing Amount text when it cannot be divided (validation then reports
+    it, or a 100% discount makes any base give the same net price).
+    """
+    amount = row.get("Pricing Amount", "")
+    base = base_prices([amount], discount_multipliers([row.get("Discount %", "")]))[0]
+    return amount if base is None else base
+
+
+def product_form(product):
+    """
+    Rebuild the single product form an imported product would have submitted.
+
+    Args:
+        product (dict): Product from iter_import_products
+
+    Returns:
+        MultiDict: Form data accepted by validate_single_product_new
+    """
+    form = MultiDict()
+    for column, field in ITEM_MASTER_FORM_FIELDS.items():
+        form.add(field, product["item"].get(column, ""))
+
+    for _, _, row in product["children"]["batch_desc_rows"]:
+        form.add("desc_code[]", row.get("Description Code", ""))
+        form.add("desc_value[]", row.get("Description Value", ""))
+
+    for _, row in product["pricing"]:
+        method = _pricing_method_key(row.get("Pricing Method", ""))
+        level = {"level_pricing_method[]": method}
+        for column, field in PRICING_COMMON_FORM_FIELDS + PRICING_METHOD_FORM_FIELDS.get(method, []):
+            value = row.get(column, "")
+            prefix = NOTE_PREFIXES.get(field)
+            if prefix and value.startswith(prefix):
+                value = value[len(prefix):].strip()
+            level[field] = value
+        if method == "discount_based":
+            level["level_db_base_price[]"] = _discount_base_price(row)
+        for field, value in level.items():
+            form.add(field, value)
+        for field in _ALL_LEVEL_FIELDS.difference(level):
+            form.add(field, "")
+
+    return form
+
+
+def _error(sheet, row, sku, message):
+    return {"sheet": sheet, "row": row, "sku": sku, "message": message}
+
+
+def validate_import_product(product, form, levels, known_skus, vendor):
+    """
+    Validate one imported product.
+
+    Args:
+        product (dict): Product from iter_import_products
+        form (MultiDict): product_form(product)
+        levels (dict): parse_pricing_levels(form)
+        known_skus (set): SKUs already in the batch or earlier in the file
+        vendor (str): Batch vendor, or "" if not set yet
+
+    Returns:
+        list: Error dicts (sheet, row, sku, message); empty if valid
+    """
+    sku = product["sku"]
+    sheet, row = product["sheet"], product["row"]
+
+    if product["item"] is None:
+        return [_error(sheet, row, sku, f"SKU '{sku}' has no Item_Master row.")]
+
+    errors = []
+    if sku and sku in known_skus:
+        errors.append(_error(sheet, row, sku, f"SKU '{sku}' is already in the batch."))
+
+    product_vendor = form.get("vendor_name", "")
+    if vendor and product_vendor and product_vendor != vendor:
+        errors.append(_error(
+            sheet, row, sku,
+            f"Vendor '{product_vendor}' does not match the batch vendor '{vendor}'."
+        ))
+
+    ok, messages = validate_single_product_new(form, levels)
+    for message in messages:
+        # Pricing level errors point at the Pricing row of that level
+        match = _PRICING_LEVEL_ERROR.match(message)
+        if match and int(match.group(1)) <= len(product["pricing"]):
+            pricing_row = product["pricing"][int(match.group(1)) - 1][0]
+            errors.append(_error("Pricing" if sheet != "CSV" else sheet, pricing_row, sku, message))
+        else:
+            errors.append(_error(sheet, row, sku, message))
+
+    return errors
+
+
+def product_batch_rows(product, levels, pricing_columns=None, offset=0):
+    """
+    Build the batch rows (one list per batch section) of a valid product.
+
+    Args:
+        product (dict): Product from iter_import_products
+        levels (dict): parse_pricing_levels(product_form(product))
+        pricing_columns (dict, optional): compute_pricing_columns over the
+            levels of the import chunk, see build_price_rows
+        offset (int): Index of the product's first level in columns
+
+    Returns:
+        dict: Batch section -> list of row dicts
+    """
+    sku = product["sku"]
+    vendor_name = product["item"].get("Vendor", "")
+    rows = {section: [] for section in BATCH_SECTIONS}
+
+    rows["batch_item_rows"].append(
+        {column: product["item"].get(column, "") for column in ITEM_MASTER_COLUMNS}
+    )
+
+    for title, (section, required) in _CHILD_SHEETS.items():
+        columns = _SHEET_COLUMNS[title]
+        for _, _, row in product["children"][section]:
+            if required and not all(row.get(column) for column in required):
+                continue
+            child = {column: row.get(column, "") for column in columns}
+            child["SKU"] = sku
+            rows[section].append(child)
+
+    price_rows, method_labels = build_price_rows(levels, vendor_name, sku, pricing_columns, offset)
+    rows["batch_price_rows"] = price_rows
+
+    rows["pending_products"].append({
+        "sku": sku,
+        "vendor_name": vendor_name,
+        "product_status": product["item"].get("Product Status", ""),
+        "pricing_method": ", ".join(sorted(method_labels)),
+    })
+    return rows
+
+
+def approved_product_warnings(product, levels, product_rows, approved):
+    """
+    Check a valid product's Pricing rows against the vendor's last approved pricing.
+
+    Returns:
+        list: Warning dicts (sheet, row, sku, message)
+    """
+    sheet = "Pricing" if product["sheet"] != "CSV" else "CSV"
+    used_rows = [
+        row_number
+        for (row_number, _), used in zip(product["pricing"], levels["used"])
+        if used
+    ]
+    return [
+        _error(sheet, conflict["ref"], product["sku"], conflict["message"])
+        for conflict in approved_pricing_conflicts(
+            product_rows["batch_price_rows"], used_rows, approved, describe=lambda row: f"row {row}"
+        )
+    ]
+
+
+def import_products(path, batch_store, batch_id, existing_skus, vendor="",
+                    batch_size=IMPORT_BATCH_SIZE, approved_timeline=None):
+    """
+    Validate a bulk import file and append its valid products to a batch.
+
+    Invalid products are skipped and reported; valid ones are priced in one
+    compute_pricing_columns pass and written to the batch store batch_size
+    products at a time. A product whose SKU
+    another request added to the batch meanwhile is reported as an error.
+
+    Args:
+        path (str): Local path of the CSV / XLSX file
+        batch_store: SQLiteBatchStore or FileBatchStore
+        batch_id (str): Batch to append to
+        existing_skus (set): SKUs already in the batch
+        vendor (str): Vendor of the batch, or "" to take it from the file
+        batch_size (int): Products per batch store write
+        approved_timeline (callable, optional): vendor -> that vendor's last
+            approved PriceTimeline or None; imported prices colliding with
+            it are reported as warnings
+
+    Returns:
+        dict: imported (int), failed (int), vendor (str), errors and
+            warnings (lists of dicts with sheet, row, sku, message)
+    """
+    report = {"imported": 0, "failed": 0, "vendor": vendor, "errors": [], "warnings": []}
+    approved = approved_vendor = None
+    known_skus = set(existing_skus)
+    pending = []
+
+    def append(products):
+        rows = {section: [] for section in BATCH_SECTIONS}
+        for _, product_rows in products:
+            for section, section_rows in product_rows.items():
+                rows[section].extend(section_rows)
+        batch_store.append(batch_id, rows)
+        report["imported"] += len(products)
+
+    def flush():
+        if not pending:
+            return
+
+        # One pricing pass over every level of the chunk
+        pricing_columns = compute_pricing_columns(concat_level_values([levels for _, levels in pending]))
+        built = []
+        offset = 0
+        for product, levels in pending:
+            product_rows = product_batch_rows(product, levels, pricing_columns, offset)
+            offset += levels["count"]
+            if approved is not None:
+                report["warnings"].extend(approved_product_warnings(product, levels, product_rows, approved))
+            built.append((product, product_rows))
+        pending.clear()
+
+        try:
+            append(built)
+        except DuplicateSkuError:
+            # Another request added one of these SKUs since existing_skus was
+            # read; nothing was appended, so retry product by product
+            for product, product_rows in built:
+                try:
+                    append([(product, product_rows)])
+                except DuplicateSkuError as e:
+                    report["failed"] += 1
+                    report["errors"].append(_error(product["sheet"], product["row"], product["sku"], str(e)))
+
+    for product in iter_import_products(path):
+        form = product_form(product) if product["item"] is not None else None
+        levels = parse_pricing_levels(form) if form is not None else None
+        errors = validate_import_product(product, form, levels, known_skus, report["vendor"])
+
+        if errors:
+            report["failed"] += 1
+            report["errors"].extend(errors)
+            continue
+
+        known_skus.add(product["sku"])
+        report["vendor"] = report["vendor"] or form.get("vendor_name", "")
+        if approved_timeline and report["vendor"] and approved_vendor != report["vendor"]:
+            approved, approved_vendor = approved_timeline(report["vendor"]), report["vendor"]
+
+        pending.append((product, levels))
+        if len(pending) >= batch_size:
+            flush()
+
+    flush()
+    return report
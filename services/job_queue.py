@@ -0,0 +1,395 @@
+"""
+Local background job queue for FGI Vendor Portal
+
+Jobs are persisted in SQLite so queued submissions survive restarts and the
+queue works without any external broker. Worker threads inside the web
+process claim jobs atomically, so several gunicorn workers can share one
+queue file.
+
+Each process claims jobs under its own owner id and records a heartbeat
+every few seconds from a dedicated thread, even while all its workers are
+busy with long uploads. A running job is only put back in the queue when
+its owner's heartbeat is older than stale_after_seconds, i.e. the process
+that claimed it crashed or was killed.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import traceback
+from datetime import datetime, timedelta
+from services.sqlite_transaction import ClosingTransaction
+from services.tracing import finish_trace, start_trace
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+def _now():
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def new_job_id():
+    """
+    Generate a new unique job id (e.g. to name a job's upload folder before
+    it is enqueued).
+
+    Returns:
+        str: Random hex job id
+    """
+    return uuid.uuid4().hex
+
+
+class SQLiteJobQueue:
+    """
+    Job queue persisted in a local SQLite database.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " payload_json TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " progress TEXT NOT NULL DEFAULT '',"
+                " message TEXT NOT NULL DEFAULT '',"
+                " result_json TEXT,"
+                " created_at TEXT NOT NULL,"
+                " updated_at TEXT NOT NULL,"
+                " owner TEXT)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_workers ("
+                " owner TEXT PRIMARY KEY,"
+                " heartbeat_at TEXT NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _transaction(self):
+        # sqlite3's own context manager commits but never closes
+        return ClosingTransaction(self._connect())
+
+    def enqueue(self, kind, payload, job_id=None):
+        """
+        Add a job to the queue.
+
+        Args:
+            kind (str): Job handler name
+            payload (dict): JSON-serialisable job arguments
+            job_id (str, optional): Id from new_job_id(); generated if not given
+
+        Returns:
+            str: Job id
+        """
+        job_id = job_id or new_job_id()
+        now = _now()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload_json, status, progress, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), JOB_QUEUED, "Queued", now, now),
+            )
+        return job_id
+
+    def claim_next(self, owner=None):
+        """
+        Atomically move the oldest queued job to running.
+
+        Args:
+            owner (str, optional): Owner id of the claiming process (see
+                heartbeat); jobs without an owner are requeued by age only
+
+        Returns:
+            dict or None: Claimed job, or None if the queue is empty
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, kind, payload_json FROM jobs "
+                "WHERE status = ? ORDER BY created_at LIMIT 1",
+                (JOB_QUEUED,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            job_id, kind, payload_json = row
+            conn.execute(
+                "UPDATE jobs SET status = ?, progress = ?, owner = ?, updated_at = ? WHERE id = ?",
+                (JOB_RUNNING, "Started", owner, _now(), job_id),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        return {"id": job_id, "kind": kind, "payload": json.loads(payload_json)}
+
+    def update(self, job_id, status=None, progress=None, message=None, result=None):
+        """
+        Update status fields of a job. Fields left as None are unchanged.
+        """
+        fields = {"updated_at": _now()}
+        if status is not None:
+            fields["status"] = status
+        if progress is not None:
+            fields["progress"] = progress
+        if message is not None:
+            fields["message"] = message
+        if result is not None:
+            fields["result_json"] = json.dumps(result)
+
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._transaction() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+
+    def get(self, job_id):
+        """
+        Return a job's current state.
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            dict or None: Job state, or None if unknown
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id, kind, status, progress, message, result_json, created_at, updated_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return {
+            "job_id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "progress": row[3],
+            "message": row[4],
+            "result": json.loads(row[5]) if row[5] else None,
+            "created_at": row[6],
+            "updated_at": row[7],
+        }
+
+    def heartbeat(self, owner):
+        """
+        Record that the process with this owner id is alive.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_workers (owner, heartbeat_at) VALUES (?, ?)",
+                (owner, _now()),
+            )
+
+    def requeue_stale(self, stale_after_seconds):
+        """
+        Put 'running' jobs whose worker process is gone back in the queue.
+
+        A job is stale when its owner has not recorded a heartbeat for
+        stale_after_seconds (or, for jobs claimed without an owner, when the
+        job itself has not been updated for that long). Jobs of live owners
+        are never requeued, however long they run.
+
+        Args:
+            stale_after_seconds (int): Heartbeat age after which an owner is gone
+
+        Returns:
+            int: Number of jobs requeued
+        """
+        cutoff = (datetime.utcnow() - timedelta(seconds=stale_after_seconds)).isoformat() + "Z"
+        with self._transaction() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, progress = ?, owner = NULL, updated_at = ? "
+                "WHERE status = ? AND ("
+                " (owner IS NULL AND updated_at < ?)"
+                " OR (owner IS NOT NULL AND owner NOT IN"
+                "  (SELECT owner FROM job_workers WHERE heartbeat_at >= ?)))",
+                (JOB_QUEUED, "Requeued after worker restart", _now(), JOB_RUNNING, cutoff, cutoff),
+            )
+            conn.execute("DELETE FROM job_workers WHERE heartbeat_at < ?", (cutoff,))
+            conn.execute("COMMIT")
+            return cursor.rowcount
+
+
+def run_job(job_queue, job, handlers):
+    """
+    Execute one claimed job and record its outcome.
+
+    Handlers are called as handler(payload, report_progress) and return a
+    JSON-serialisable result dict.
+    """
+    job_id = job["id"]
+    handler = handlers.get(job["kind"])
+
+    if handler is None:
+        job_queue.update(job_id, status=JOB_FAILED, message=f"Unknown job kind: {job['kind']}")
+        return
+
+    def report_progress(progress):
+        job_queue.update(job_id, progress=progress)
+
+    trace_token = start_trace("job", job["kind"], job_id=job_id)
+    try:
+        result = handler(job["payload"], report_progress)
+    except Exception as e:
+        finish_trace(trace_token, JOB_FAILED)
+        traceback.print_exc()
+        job_queue.update(job_id, status=JOB_FAILED, progress="Failed", message=str(e))
+        print(f"🔴 Job {job_id} ({job['kind']}) failed: {e}")
+        return
+
+    finish_trace(trace_token, JOB_COMPLETED)
+    job_queue.update(job_id, status=JOB_COMPLETED, progress="Completed", result=result or {})
+    print(f"✅ Job {job_id} ({job['kind']}) completed")
+
+
+def _worker_loop(job_queue, handlers, poll_interval, owner):
+    # Nothing may end the loop: a dead thread leaves its share of the queue unserved
+    while True:
+        job = None
+        try:
+            job = job_queue.claim_next(owner)
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+
+            run_job(job_queue, job, handlers)
+        except sqlite3.OperationalError as e:
+            print(f"⚠ Job queue busy: {e}")
+            _fail_claimed_job(job_queue, job, e)
+            time.sleep(poll_interval)
+        except Exception as e:
+            traceback.print_exc()
+            print(f"🔴 Job worker error: {e}")
+            _fail_claimed_job(job_queue, job, e)
+            time.sleep(poll_interval)
+
+
+def _fail_claimed_job(job_queue, job, error):
+    """
+    Best effort: mark a job whose outcome could not be recorded as failed.
+    """
+    if job is None:
+        return
+    try:
+        job_queue.update(job["id"], status=JOB_FAILED, progress="Failed", message=str(error))
+    except Exception as e:
+        print(f"⚠ Could not mark job {job['id']} as failed: {e}")
+
+
+def _heartbeat_loop(job_queue, owner, interval, stale_after_seconds):
+    # Also requeues the jobs of processes that stopped beating
+    while True:
+        try:
+            job_queue.heartbeat(owner)
+            requeued = job_queue.requeue_stale(stale_after_seconds)
+            if requeued:
+                print(f"⚠ Requeued {requeued} job(s) of stopped workers")
+        except Exception as e:
+            print(f"⚠ Job worker heartbeat failed: {e}")
+        time.sleep(interval)
+
+
+_workers_lock = threading.Lock()
+_worker_threads = []
+_worker_pid = None
+_worker_owner = None
+_heartbeat_thread = None
+
+
+def ensure_job_workers(job_queue, handlers, num_workers=2, poll_interval=1.0,
+                       stale_after_seconds=300, heartbeat_interval=30.0):
+    """
+    Start the background worker threads for this process if not running yet.
+
+    Safe to call on every request: after a fork (e.g. gunicorn --preload)
+    the child process starts its own workers, and a worker thread that died
+    is replaced.
+
+    Args:
+        job_queue (SQLiteJobQueue): Queue to consume
+        handlers (dict): Job kind -> handler callable
+        num_workers (int): Number of worker threads
+        poll_interval (float): Seconds to sleep when the queue is empty
+        stale_after_seconds (int): Requeue running jobs whose process has not
+            sent a heartbeat for this long; keep it several heartbeat
+            intervals long
+        heartbeat_interval (float): Seconds between heartbeats of this process
+    """
+    global _worker_pid, _worker_owner, _heartbeat_thread
+
+    if _workers_running(num_workers):
+        return
+
+    with _workers_lock:
+        if _workers_running(num_workers):
+            return
+
+        if _worker_pid != os.getpid():
+            # New process (first call or after a fork): threads were not inherited
+            _worker_owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            job_queue.heartbeat(_worker_owner)
+            requeued = job_queue.requeue_stale(stale_after_seconds)
+            if requeued:
+                print(f"⚠ Requeued {requeued} stale job(s)")
+            _worker_threads[:] = [None] * num_workers
+            _heartbeat_thread = None
+            _worker_pid = os.getpid()
+
+        if num_workers and (_heartbeat_thread is None or not _heartbeat_thread.is_alive()):
+            _heartbeat_thread = threading.Thread(
+                target=_heartbeat_loop,
+                args=(job_queue, _worker_owner, heartbeat_interval, stale_after_seconds),
+                name="job-heartbeat",
+                daemon=True,
+            )
+            _heartbeat_thread.start()
+
+        for i, thread in enumerate(_worker_threads):
+            if thread is not None and thread.is_alive():
+                continue
+            if thread is not None:
+                print(f"⚠ Restarting job worker {thread.name}")
+            thread = threading.Thread(
+                target=_worker_loop,
+                args=(job_queue, handlers, poll_interval, _worker_owner),
+                name=f"job-worker-{i}",
+                daemon=True,
+            )
+            thread.start()
+            _worker_threads[i] = thread
+
+
+def _workers_running(num_workers):
+    return (
+        _worker_pid == os.getpid()
+        and len(_worker_threads) == num_workers
+        and all(thread is not None and thread.is_alive() for thread in _worker_threads)
+        and (not num_workers or (_heartbeat_thread is not None and _heartbeat_thread.is_alive()))
+    )
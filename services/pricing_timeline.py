@@ -0,0 +1,506 @@
+"""
+Effective-date timelines of SKU prices for FGI Vendor Portal
+
+Base prices (net cost, price levels, discount) take effect on their
+Effective Date and stay active until the next one; promo, quote and tender
+prices are active over a Start / End Date window on top of them.
+PriceTimeline keeps these per SKU as sorted intervals, answers "which price
+is active on date D" with a binary search and finds conflicting windows with
+one sort-and-sweep per SKU, so it scales to catalogs with millions of rows.
+
+The vendor's last approved pricing is saved as a timeline snapshot when a
+pricing review is uploaded, so new submissions can be checked against it
+without reading the approved workbook again.
+"""
+import os
+import json
+import threading
+from bisect import bisect_right
+from datetime import datetime
+
+from openpyxl import load_workbook
+
+from helpers.lookups import PRICING_METHODS
+from services.excel_service import cell_text
+
+
+KIND_BASE = "base"
+KIND_PROMO = "promo"
+KIND_QUOTE = "quote"
+KIND_TENDER = "tender"
+
+# When windows overlap on a date, the first kind in this list wins
+OVERRIDE_PRIORITY = (KIND_TENDER, KIND_QUOTE, KIND_PROMO)
+
+# Windows a base price must not take effect in
+CONTRACT_KINDS = frozenset((KIND_TENDER, KIND_QUOTE))
+
+CONFLICT_WINDOW_OVERLAP = "window_overlap"
+CONFLICT_DUPLICATE_EFFECTIVE = "duplicate_effective_date"
+CONFLICT_EFFECTIVE_IN_CONTRACT = "effective_in_contract"
+
+SOURCE_BATCH = "batch"
+SOURCE_APPROVED = "approved"
+
+OPEN_END = "9999-12-31"
+
+# Pricing method -> (kind, start field, end field) of a single-product level;
+# core pricing has no price timeline
+LEVEL_DATE_FIELDS = {
+    "net_cost": (KIND_BASE, "level_net_effective_date[]", None),
+    "price_levels": (KIND_BASE, "level_pl_effective_date[]", None),
+    "discount_based": (KIND_BASE, "level_db_effective_date[]", None),
+    "promo_pricing": (KIND_PROMO, "level_pr_start_date[]", "level_pr_end_date[]"),
+    "quote_pricing": (KIND_QUOTE, "level_qt_start_date[]", "level_qt_end_date[]"),
+    "tender_pricing": (KIND_TENDER, "level_td_start_date[]", "level_td_end_date[]"),
+}
+
+# Pricing Method cell (label or key, casefolded) -> kind
+_KIND_BY_METHOD = {}
+for _method, _label in PRICING_METHODS.items():
+    if _method in LEVEL_DATE_FIELDS:
+        _KIND_BY_METHOD[_method] = _KIND_BY_METHOD[_label.casefold()] = LEVEL_DATE_FIELDS[_method][0]
+_KIND_BY_METHOD["discount based pricing"] = KIND_BASE
+
+APPROVED_PRICING_SHEET = "Pricing"
+
+
+def timeline_date(value):
+    """
+    Normalize a date cell / form value to "YYYY-MM-DD"; None if it is not a date.
+    """
+    text = cell_text(value)[:10]
+    try:
+        datetime.strptime(text, "%Y-%m-%d")
+    except ValueError:
+        return None
+    return text
+
+
+def _normalized_key(key):
+    """
+    Casefold the parts of a price key, as tier_validator groups tiers, so
+    "CAD" / "Each" from one source and "cad" / "EACH" from another compete
+    for the same slot.
+    """
+    return tuple(cell_text(part).casefold() for part in key)
+
+
+def _window_order(window):
+    return window[0], window[1] or ""
+
+
+def _span(window):
+    start, end = window[0], window[1]
+    return start if start == end else f"{start} to {end}"
+
+
+class PriceTimeline:
+    """
+    Price windows of many SKUs.
+
+    A window is (start, end, kind, key, amount, ref, source): key groups the
+    prices that compete for the same slot (currency, level type, tier min),
+    ref identifies the row for the caller and source is SOURCE_BATCH or
+    SOURCE_APPROVED. Base windows end where the next base price of the same
+    key starts.
+
+    Usage:
+        timeline = PriceTimeline()
+        timeline.add_price_row(row, ref=row_number)
+        timeline.active("SKU-1", "2025-06-01")
+        timeline.conflicts(approved=approved_timeline)
+    """
+
+    def __init__(self, source=SOURCE_BATCH):
+        self.source = source
+        self._windows = {}
+        self._indexes = {}
+
+    def __len__(self):
+        return sum(len(windows) for windows in self._windows.values())
+
+    def __contains__(self, sku):
+        return sku in self._windows
+
+    def skus(self):
+        return self._windows.keys()
+
+    def windows(self, sku):
+        return self._windows.get(sku, [])
+
+    def add(self, sku, kind, start, end=None, key=(), amount="", ref=None):
+        """
+        Add one price.
+
+        Args:
+            sku (str): Part number
+            kind (str): KIND_BASE, KIND_PROMO, KIND_QUOTE or KIND_TENDER
+            start (str): Effective / start date (YYYY-MM-DD)
+            end (str, optional): End date of promo / quote / tender windows;
+                open-ended if not given
+            key (tuple): Currency, level type, tier min, ... (compared
+                casefolded)
+            amount (str): Pricing Amount, used to tell restated prices apart
+            ref: Row reference for conflict reports
+        """
+        if kind != KIND_BASE and not end:
+            end = OPEN_END
+        self._windows.setdefault(sku, []).append(
+            (start, end if kind != KIND_BASE else None, kind, _normalized_key(key), amount, ref, self.source)
+        )
+        self._indexes.pop(sku, None)
+
+    def add_price_row(self, row, ref=None):
+        """
+        Add a Pricing sheet row (dict keyed by column name).
+
+        Rows without a dated price (core pricing, blank or invalid dates)
+        are skipped.
+
+        Returns:
+            bool: True if the row was added
+        """
+        kind = _KIND_BY_METHOD.get(cell_text(row.get("Pricing Method")).casefold())
+        if kind is None:
+            return False
+
+        if kind == KIND_BASE:
+            start, end = timeline_date(row.get("Effective Date")), None
+        else:
+            start, end = timeline_date(row.get("Start Date")), timeline_date(row.get("End Date"))
+        if start is None:
+            return False
+
+        key = (
+            cell_text(row.get("Currency")),
+            cell_text(row.get("Pricing Type")),
+            cell_text(row.get("Tier Min Qty")),
+        )
+        self.add(
+            cell_text(row.get("Part Number")), kind, start, end, key,
+            cell_text(row.get("Pricing Amount")), ref,
+        )
+        return True
+
+    def add_levels(self, sku, levels):
+        """
+        Add the dated levels of one product (parse_pricing_levels output);
+        ref is the level index.
+        """
+        values = levels["values"]
+        for i in range(levels["count"]):
+            if not levels["used"][i]:
+                continue
+            fields = LEVEL_DATE_FIELDS.get(values["level_pricing_method[]"][i])
+            if fields is None:
+                continue
+            kind, start_field, end_field = fields
+            start = timeline_date(values[start_field][i])
+            end = timeline_date(values[end_field][i]) if end_field else None
+            if start is None:
+                continue
+            key = (values["level_currency[]"][i], values["level_type[]"][i], values["level_tier_min_qty[]"][i])
+            self.add(sku, kind, start, end, key, ref=i)
+
+    # -----------------------------
+    # QUERIES
+    # -----------------------------
+    def _index(self, sku):
+        """
+        Sorted lookup structure of one SKU, built on first use:
+        (base windows by start, their starts,
+         override windows by start, their starts, running max of their ends)
+        """
+        index = self._indexes.get(sku)
+        if index is None:
+            windows = self._windows.get(sku, [])
+            base = sorted((w for w in windows if w[2] == KIND_BASE), key=_window_order)
+            overrides = sorted((w for w in windows if w[2] != KIND_BASE), key=_window_order)
+            max_end = []
+            reach = ""
+            for window in overrides:
+                reach = max(reach, window[1])
+                max_end.append(reach)
+            index = self._indexes[sku] = (
+                base, [w[0] for w in base], overrides, [w[0] for w in overrides], max_end,
+            )
+        return index
+
+    def active(self, sku, on_date, key=None):
+        """
+        Return the price window active for a SKU on a date.
+
+        Promo / quote / tender windows containing the date win over base
+        prices (see OVERRIDE_PRIORITY, then the latest start); otherwise the
+        latest base price effective on or before the date applies.
+
+        Args:
+            sku (str): Part number
+            on_date (str): Date (YYYY-MM-DD)
+            key (tuple, optional): Only consider prices with this key
+
+        Returns:
+            dict or None: start, end, kind, key, amount, ref, source
+        """
+        base, base_starts, overrides, override_starts, max_end = self._index(sku)
+        if key is not None:
+            key = _normalized_key(key)
+
+        best = None
+        j = bisect_right(override_starts, on_date) - 1
+        # max_end is non-decreasing, so once it is before the date no earlier
+        # window can contain it
+        while j >= 0 and max_end[j] >= on_date:
+            window = overrides[j]
+            if window[1] >= on_date and (key is None or window[3] == key):
+                if best is None or OVERRIDE_PRIORITY.index(window[2]) < OVERRIDE_PRIORITY.index(best[2]):
+                    best = window
+            j -= 1
+
+        if best is None:
+            j = bisect_right(base_starts, on_date) - 1
+            while j >= 0 and key is not None and base[j][3] != key:
+                j -= 1
+            if j >= 0:
+                best = base[j]
+
+        if best is None:
+            return None
+        return dict(zip(("start", "end", "kind", "key", "amount", "ref", "source"), best))
+
+    # -----------------------------
+    # CONFLICTS
+    # -----------------------------
+    def conflicts(self, approved=None, describe=str):
+        """
+        Find conflicting prices of the SKUs in this timeline.
+
+        Reported per SKU:
+          - promo / quote / tender windows of the same kind and key that overlap
+          - base prices of the same key with the same effective date
+          - base prices taking effect inside a quote or tender window of the
+            same currency and level type
+
+        With approved, the windows of the same SKUs in the approved timeline
+        take part too; conflicts between two approved prices and approved
+        prices restated unchanged are not reported.
+
+        Args:
+            approved (PriceTimeline, optional): Last approved pricing
+            describe (callable): Turns a ref of this timeline into text for
+                messages (approved prices are named by row)
+
+        Returns:
+            list: Conflict dicts with kind, sku, ref, other (ref of the price
+                it conflicts with), approved (True if other is an approved
+                price) and message
+        """
+        conflicts = []
+        for sku, windows in self._windows.items():
+            if approved is not None and sku in approved:
+                windows = windows + approved.windows(sku)
+            conflicts.extend(_sku_conflicts(sku, windows, describe))
+        return conflicts
+
+
+def _sku_conflicts(sku, windows, describe):
+    conflicts = []
+
+    def report(kind, window, other, message):
+        # Keep the batch price as the subject of the conflict
+        if window[6] == SOURCE_APPROVED:
+            if other[6] == SOURCE_APPROVED:
+                return
+            window, other = other, window
+        if window[0] == other[0] and window[1] == other[1] and window[4] == other[4] and other[6] != window[6]:
+            return  # approved price restated unchanged
+        approved = other[6] == SOURCE_APPROVED
+        other_text = f"approved pricing row {other[5]}" if approved else describe(other[5])
+        conflicts.append({
+            "kind": kind, "sku": sku, "ref": window[5], "other": other[5], "approved": approved,
+            "message": message.replace("{other}", other_text),
+        })
+
+    groups = {}
+    for window in windows:
+        groups.setdefault((window[2], window[3]), []).append(window)
+
+    contracts = {}
+    for (kind, key), group in groups.items():
+        group.sort(key=_window_order)
+
+        if kind == KIND_BASE:
+            for previous, window in zip(group, group[1:]):
+                if window[0] == previous[0]:
+                    report(
+                        CONFLICT_DUPLICATE_EFFECTIVE, window, previous,
+                        f"Another base price takes effect on {window[0]} ({{other}}).",
+                    )
+            continue
+
+        if kind in CONTRACT_KINDS:
+            contracts.setdefault(key[:2], []).extend(group)
+
+        # Sweep: the window reaching furthest so far is the one later windows overlap
+        reach = None
+        for window in group:
+            if reach is not None and window[0] <= reach[1]:
+                report(
+                    CONFLICT_WINDOW_OVERLAP, window, reach,
+                    f"{kind.capitalize()} {_span(window)} overlaps {kind} {_span(reach)} ({{other}}).",
+                )
+            if reach is None or window[1] > reach[1]:
+                reach = window
+
+    if contracts:
+        indexed = {}
+        for key, group in contracts.items():
+            group.sort(key=_window_order)
+            max_end, reach = [], ""
+            for window in group:
+                reach = max(reach, window[1])
+                max_end.append(reach)
+            indexed[key] = (group, [w[0] for w in group], max_end)
+
+        for (kind, key), group in groups.items():
+            if kind != KIND_BASE or key[:2] not in indexed:
+                continue
+            contract_windows, starts, max_end = indexed[key[:2]]
+            for window in group:
+                j = bisect_right(starts, window[0]) - 1
+                while j >= 0 and max_end[j] >= window[0]:
+                    contract = contract_windows[j]
+                    if contract[1] >= window[0]:
+                        report(
+                            CONFLICT_EFFECTIVE_IN_CONTRACT, window, contract,
+                            f"Base price effective {window[0]} falls inside "
+                            f"{contract[2]} {_span(contract)} ({{other}}).",
+                        )
+                        break
+                    j -= 1
+
+    return conflicts
+
+
+def validate_level_timeline(levels, sku=""):
+    """
+    Check the dated levels of one product for conflicting windows.
+
+    Args:
+        levels (dict): Parsed levels from parse_pricing_levels
+        sku (str): Part number, for messages
+
+    Returns:
+        list[str]: Error messages, "Pricing Level N: ..." (empty if valid)
+    """
+    timeline = PriceTimeline()
+    timeline.add_levels(sku, levels)
+    return [
+        f"Pricing Level {conflict['ref'] + 1}: {conflict['message']}"
+        for conflict in timeline.conflicts(describe=lambda i: f"Pricing Level {i + 1}")
+    ]
+
+
+def approved_pricing_conflicts(price_rows, refs, approved, describe=str):
+    """
+    Check Pricing rows against the vendor's last approved pricing.
+
+    Args:
+        price_rows (list): Pricing row dicts (e.g. from build_price_rows)
+        refs (list): Ref per row for the conflict reports
+        approved (PriceTimeline): Last approved pricing
+        describe (callable): See PriceTimeline.conflicts
+
+    Returns:
+        list: Conflicts with an approved price (see PriceTimeline.conflicts)
+    """
+    timeline = PriceTimeline()
+    for row, ref in zip(price_rows, refs):
+        timeline.add_price_row(row, ref=ref)
+    return [
+        conflict for conflict in timeline.conflicts(approved=approved, describe=describe)
+        if conflict["approved"]
+    ]
+
+
+# -----------------------------
+# APPROVED PRICING SNAPSHOT
+# -----------------------------
+def timeline_from_pricing_workbook(path, source=SOURCE_APPROVED, sheet=APPROVED_PRICING_SHEET):
+    """
+    Build a timeline from the Pricing sheet of a workbook (first sheet if
+    there is none); ref is the row number.
+    """
+    timeline = PriceTimeline(source=source)
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet in wb.sheetnames else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = [cell_text(name) for name in next(rows, ())]
+        for row_number, values in enumerate(rows, start=2):
+            timeline.add_price_row(dict(zip(header, values)), ref=row_number)
+    finally:
+        wb.close()
+    return timeline
+
+
+def approved_timeline_path(upload_folder, vendor_name):
+    return os.path.join(upload_folder, vendor_name, "pricing_review", "approved-timeline.json")
+
+
+def save_timeline(path, timeline):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    snapshot = {
+        sku: [window[:6] for window in timeline.windows(sku)]
+        for sku in timeline.skus()
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_timeline(path, source=SOURCE_APPROVED):
+    """
+    Load a saved timeline; None if the file does not exist.
+    """
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    timeline = PriceTimeline(source=source)
+    for sku, windows in snapshot.items():
+        timeline._windows[sku] = [
+            (start, end, kind, _normalized_key(key), amount, ref, source)
+            for start, end, kind, key, amount, ref in windows
+        ]
+    return timeline
+
+
+_approved_lock = threading.Lock()
+_approved = {}
+
+
+def get_approved_timeline(upload_folder, vendor_name):
+    """
+    Return the vendor's last approved pricing timeline (None if no pricing
+    review was uploaded yet), cached per process until the snapshot changes.
+    """
+    path = approved_timeline_path(upload_folder, vendor_name)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    with _approved_lock:
+        cached = _approved.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    timeline = load_timeline(path)
+    with _approved_lock:
+        _approved[path] = (mtime, timeline)
+    return timeline
@@ -0,0 +1,196 @@
+"""
+On-demand request profiling for FGI Vendor Portal
+
+A profiled call runs under cProfile; its stats are written to the profile
+folder (uploads/_profiles) as <profile id>.prof next to <profile id>.json
+holding the request metadata (endpoint, vendor, status, duration, trigger).
+Profiles are read back with pstats and summarised as the top functions by
+cumulative time, so hot spots can be found without attaching a debugger.
+
+cProfile only sees the thread it runs in, so time spent in worker threads
+(parallel Azure uploads, job workers) shows up as waiting in the request
+thread. Only one call is profiled at a time per process.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import pstats
+import random
+import cProfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# Requests profiled at random (0.01 = 1%); 0 disables sampling
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+# Secret that turns profiling on for one request (X-Profile header or
+# ?profile= query flag) and is required to view saved profiles; when unset,
+# requests cannot trigger profiling and the profile viewer is disabled
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+
+# Newest profiles kept on disk; older ones are deleted when a profile is saved
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "calls")
+
+_PROFILE_ID_PATTERN = re.compile(r"^[\w.-]+$")
+
+# cProfile cannot run two profilers at once, even in different threads
+_profile_lock = threading.Lock()
+
+
+def profile_trigger(token):
+    """
+    Decide whether to profile a call.
+
+    Args:
+        token (str or None): Token sent with the request (header or query flag)
+
+    Returns:
+        str or None: "request" when the token matches PROFILE_TOKEN, "sample"
+            when picked by PROFILE_SAMPLE_RATE, else None
+    """
+    if PROFILE_TOKEN and token == PROFILE_TOKEN:
+        return "request"
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+@contextmanager
+def profile_section():
+    """
+    Profile the body of a with block with cProfile.
+
+    Yields:
+        dict: profiler (cProfile.Profile, or None when another call is already
+            being profiled) and, once the block exits, seconds
+    """
+    capture = {"profiler": None, "seconds": None}
+    if not _profile_lock.acquire(blocking=False):
+        yield capture
+        return
+
+    try:
+        capture["profiler"] = profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield capture
+        finally:
+            profiler.disable()
+            capture["seconds"] = time.perf_counter() - started
+    finally:
+        _profile_lock.release()
+
+
+def save_profile(profile_dir, profiler, metadata):
+    """
+    Write a profile and its metadata to profile_dir.
+
+    Args:
+        profile_dir (str): Profile folder (created if missing)
+        profiler (cProfile.Profile): Finished profiler
+        metadata (dict): JSON-serialisable request metadata
+
+    Returns:
+        str: Profile id
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+
+    endpoint = re.sub(r"[^\w-]", "_", str(metadata.get("endpoint") or "call"))
+    profile_id = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{endpoint}_{uuid.uuid4().hex[:8]}"
+
+    profiler.dump_stats(os.path.join(profile_dir, f"{profile_id}.prof"))
+    with open(os.path.join(profile_dir, f"{profile_id}.json"), "w") as f:
+        json.dump({"profile_id": profile_id, **metadata}, f, indent=2, default=str)
+
+    _prune_profiles(profile_dir, PROFILE_KEEP)
+    print(f"🔬 Saved profile {profile_id} ({metadata.get('duration_ms')} ms)")
+    return profile_id
+
+
+def _prune_profiles(profile_dir, keep):
+    # Profile ids start with a timestamp, so name order is age order
+    ids = sorted(name[:-len(".json")] for name in os.listdir(profile_dir) if name.endswith(".json"))
+    for profile_id in ids[:max(len(ids) - keep, 0)]:
+        for suffix in (".prof", ".json"):
+            try:
+                os.remove(os.path.join(profile_dir, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(profile_dir, limit=50):
+    """
+    Return the metadata of the newest profiles, newest first.
+    """
+    if not os.path.isdir(profile_dir):
+        return []
+
+    ids = sorted(
+        (name[:-len(".json")] for name in os.listdir(profile_dir) if name.endswith(".json")),
+        reverse=True,
+    )
+    profiles = []
+    for profile_id in ids[:limit]:
+        metadata = load_profile_metadata(profile_dir, profile_id)
+        if metadata is not None:
+            profiles.append(metadata)
+    return profiles
+
+
+def load_profile_metadata(profile_dir, profile_id):
+    """
+    Return a profile's metadata, or None if the id is unknown or malformed.
+    """
+    if not _PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(profile_dir, f"{profile_id}.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def top_functions(profile_dir, profile_id, limit=30, sort="cumulative"):
+    """
+    Summarise a saved profile as its most expensive functions.
+
+    Args:
+        profile_dir (str): Profile folder
+        profile_id (str): Id returned by save_profile
+        limit (int): Functions returned
+        sort (str): One of PROFILE_SORT_KEYS
+
+    Returns:
+        list or None: Dicts with function ("file:line(name)"), calls,
+            primitive_calls, tottime and cumtime (seconds); None if the
+            profile does not exist
+    """
+    if sort not in PROFILE_SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(PROFILE_SORT_KEYS)}")
+    if not _PROFILE_ID_PATTERN.match(profile_id):
+        return None
+
+    path = os.path.join(profile_dir, f"{profile_id}.prof")
+    if not os.path.isfile(path):
+        return None
+
+    column = {"cumulative": 3, "tottime": 2, "calls": 1}[sort]
+    rows = sorted(pstats.Stats(path).stats.items(), key=lambda item: item[1][column], reverse=True)
+
+    return [
+        {
+            "function": f"{filename}:{line}({name})" if line else name,
+            "calls": calls,
+            "primitive_calls": primitive_calls,
+            "tottime": round(tottime, 6),
+            "cumtime": round(cumtime, 6),
+        }
+        for (filename, line, name), (primitive_calls, calls, tottime, cumtime, _) in rows[:limit]
+    ]
@@ -0,0 +1,31 @@
+"""
+SQLite connection handling shared by the portal's local stores
+
+sqlite3's own connection context manager commits or rolls back but never
+closes the connection, so `with conn:` blocks leak one open file handle per
+call until the garbage collector gets to it. The batch store, job queue and
+submission index open a short-lived connection per operation and use
+ClosingTransaction instead.
+"""
+from contextlib import closing
+
+
+class ClosingTransaction:
+    """
+    Commit (or roll back) a sqlite3 connection like its own context manager,
+    then close it.
+
+    Usage:
+        with ClosingTransaction(sqlite3.connect(path)) as conn:
+            conn.execute(...)
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc_info):
+        with closing(self.conn):
+            return self.conn.__exit__(*exc_info)
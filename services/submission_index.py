@@ -0,0 +1,288 @@
+"""
+Local index of vendor submissions for FGI Vendor Portal
+
+Every manifest written to Bronze is also recorded in a SQLite database, so
+"latest submission of a vendor", "history since a date" and "pending notify
+markers" are answered locally instead of by listing and downloading log
+blobs. The index is only a cache of the manifests: it can be rebuilt from
+the raw/vendor=<v>/logs/ prefixes at any time.
+"""
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from services.sqlite_transaction import ClosingTransaction
+
+
+SUBMISSION_PUBLISHED = "published"
+
+MARKER_PENDING = "pending"
+MARKER_PROCESSED = "processed"
+
+NOTIFY_MARKER_PREFIX = "raw/notifymarker/"
+
+# Manifest keys identifying the vendor type of manifests that predate "vendor_type"
+_NON_OPTICAT_BLOB_KEYS = ("azure_unified_blob",)
+
+
+def _now():
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def manifest_vendor_type(manifest):
+    """
+    Return 'opticat' or 'non-opticat' for a manifest.
+    """
+    if manifest.get("vendor_type"):
+        return manifest["vendor_type"]
+    return "non-opticat" if any(key in manifest for key in _NON_OPTICAT_BLOB_KEYS) else "opticat"
+
+
+class SubmissionIndex:
+    """
+    Submission catalog persisted in a local SQLite database.
+    """
+
+    _COLUMNS = (
+        "manifest_blob, vendor, vendor_type, timestamp, status, "
+        "notify_marker, marker_status, manifest_json, indexed_at"
+    )
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS submissions ("
+                " manifest_blob TEXT PRIMARY KEY,"
+                " vendor TEXT NOT NULL,"
+                " vendor_type TEXT NOT NULL,"
+                " timestamp TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " notify_marker TEXT,"
+                " marker_status TEXT,"
+                " manifest_json TEXT NOT NULL,"
+                " indexed_at TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_submissions_vendor "
+                "ON submissions (vendor, timestamp)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_submissions_marker "
+                "ON submissions (marker_status, timestamp)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _transaction(self):
+        # sqlite3's own context manager commits but never closes
+        return ClosingTransaction(self._connect())
+
+    @staticmethod
+    def _row(manifest_blob, manifest, marker_status):
+        notify_marker = manifest.get("notify_marker")
+        return (
+            manifest_blob,
+            manifest["vendor"],
+            manifest_vendor_type(manifest),
+            manifest["timestamp"],
+            SUBMISSION_PUBLISHED,
+            notify_marker,
+            marker_status if notify_marker else None,
+            json.dumps(manifest),
+            _now(),
+        )
+
+    @staticmethod
+    def _to_dict(row):
+        manifest = json.loads(row[7])
+        return {
+            "manifest_blob": row[0],
+            "vendor": row[1],
+            "vendor_type": row[2],
+            "timestamp": row[3],
+            "status": row[4],
+            "notify_marker": row[5],
+            "marker_status": row[6],
+            "files": manifest.get("files", {}),
+            "manifest": manifest,
+            "indexed_at": row[8],
+        }
+
+    def record(self, manifest_blob, manifest, marker_status=MARKER_PENDING):
+        """
+        Add or replace one submission.
+
+        Args:
+            manifest_blob (str): Manifest blob path
+            manifest (dict): Manifest contents
+            marker_status (str): Status of its notify marker, if it has one
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO submissions ({self._COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._row(manifest_blob, manifest, marker_status),
+            )
+
+    def latest(self, vendor, vendor_type=None):
+        """
+        Return the vendor's most recent submission.
+
+        Args:
+            vendor (str): Vendor name
+            vendor_type (str, optional): Restrict to 'opticat' or 'non-opticat'
+
+        Returns:
+            dict or None: Submission
+        """
+        query = f"SELECT {self._COLUMNS} FROM submissions WHERE vendor = ?"
+        params = [vendor]
+        if vendor_type:
+            query += " AND vendor_type = ?"
+            params.append(vendor_type)
+        query += " ORDER BY timestamp DESC LIMIT 1"
+
+        with self._transaction() as conn:
+            row = conn.execute(query, params).fetchone()
+        return self._to_dict(row) if row else None
+
+    def history(self, vendor, since=None, limit=100):
+        """
+        Return the vendor's submissions, newest first.
+
+        Args:
+            vendor (str): Vendor name
+            since (str, optional): Only submissions at or after this timestamp
+                (YYYY-MM-DD or YYYY-MM-DD_HH-MM-SS)
+            limit (int): Maximum submissions returned
+
+        Returns:
+            list: Submissions
+        """
+        query = f"SELECT {self._COLUMNS} FROM submissions WHERE vendor = ?"
+        params = [vendor]
+        if since:
+            query += " AND timestamp >= ?"
+            params.append(since)
+        query += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(limit)
+
+        with self._transaction() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def pending_markers(self):
+        """
+        Return every submission whose notify marker is still pending, oldest first.
+        """
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f"SELECT {self._COLUMNS} FROM submissions "
+                "WHERE marker_status = ? ORDER BY timestamp",
+                (MARKER_PENDING,),
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def set_marker_status(self, notify_marker, marker_status):
+        """
+        Update the status of a notify marker (e.g. once ingestion picked it up).
+
+        Returns:
+            int: Number of submissions updated
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE submissions SET marker_status = ? WHERE notify_marker = ?",
+                (marker_status, notify_marker),
+            )
+            return cursor.rowcount
+
+    def rebuild(self, container_client, max_workers=8):
+        """
+        Replace the index with the manifests found in Bronze.
+
+        Lists the raw/vendor=<v>/logs/ prefixes, downloads the manifests in
+        parallel and marks a notify marker pending when its blob still
+        exists under raw/notifymarker/.
+
+        Args:
+            container_client: Azure container client of the Bronze container
+            max_workers (int): Concurrent manifest downloads
+
+        Returns:
+            dict: manifests, vendors and pending_markers counts
+        """
+        vendor_prefixes = [
+            item.name for item in container_client.walk_blobs(name_starts_with="raw/vendor=", delimiter="/")
+        ]
+        manifest_blobs = [
+            blob.name
+            for prefix in vendor_prefixes
+            for blob in container_client.list_blobs(name_starts_with=f"{prefix}logs/")
+            if blob.name.endswith(".json")
+        ]
+        live_markers = {
+            blob.name for blob in container_client.list_blobs(name_starts_with=NOTIFY_MARKER_PREFIX)
+        }
+
+        def download(name):
+            return name, json.loads(container_client.download_blob(name).readall())
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            manifests = list(pool.map(download, manifest_blobs))
+
+        rows = []
+        for name, manifest in manifests:
+            if "vendor" not in manifest or "timestamp" not in manifest:
+                print(f"⚠ Skipping unreadable manifest: {name}")
+                continue
+            status = MARKER_PENDING if manifest.get("notify_marker") in live_markers else MARKER_PROCESSED
+            rows.append(self._row(name, manifest, status))
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM submissions")
+            conn.executemany(
+                f"INSERT OR REPLACE INTO submissions ({self._COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        return {
+            "manifests": len(rows),
+            "vendors": len({row[1] for row in rows}),
+            "pending_markers": sum(1 for row in rows if row[6] == MARKER_PENDING),
+        }
+
+
+_indexes_lock = threading.Lock()
+_indexes = {}
+
+
+def submission_index_path(upload_folder):
+    return os.path.join(upload_folder, "_index", "submissions.db")
+
+
+def get_submission_index(upload_folder):
+    """
+    Return the process-wide SubmissionIndex of an upload folder.
+    """
+    db_path = submission_index_path(upload_folder)
+    with _indexes_lock:
+        if db_path not in _indexes:
+            _indexes[db_path] = SubmissionIndex(db_path)
+        return _indexes[db_path]
@@ -0,0 +1,609 @@
+"""
+Background processing of vendor submissions for FGI Vendor Portal
+
+The /upload route only saves the files and enqueues a job; the handlers in
+this module do the Azure work (data blobs, SKU deltas, manifest, notify
+marker) on the job worker threads and record each published manifest in
+the local submission index.
+"""
+import os
+import shutil
+import sqlite3
+from datetime import datetime
+from functools import partial, wraps
+
+from services.azure_service import (
+    delete_blobs_batched,
+    download_json_blob,
+    get_container_client,
+    run_uploads_parallel,
+    safe_vendor_key,
+    sibling_blob_path,
+    upload_blob,
+    upload_json_blob,
+    upload_to_azure_bronze_opticat,
+    upload_to_azure_bronze_non_opticat,
+    write_bronze_manifest,
+)
+from services.delta_service import (
+    SkuFingerprints,
+    compute_delta,
+    delta_counts,
+    fingerprint_file_path,
+    fingerprint_opticat_xml,
+    fingerprint_workbook,
+    load_fingerprints,
+    previous_manifest,
+    save_fingerprints,
+)
+from services.submission_index import get_submission_index
+from services.pricing_timeline import (
+    approved_timeline_path,
+    get_approved_timeline,
+    save_timeline,
+    timeline_from_pricing_workbook,
+)
+from validators.unified_workbook_validator import (
+    WorkbookValidationError,
+    validate_unified_workbook,
+)
+from validators.opticat_xml_validator import (
+    XmlValidationError,
+    validate_opticat_xml,
+)
+from validators.tier_validator import PricingTierError, validate_pricing_workbook_tiers
+
+
+def notify_marker_path(vendor_name, timestamp):
+    """
+    Return the Bronze blob path of a submission's notify marker.
+    """
+    return f"raw/notifymarker/{vendor_name}_{timestamp}.json"
+
+
+def vendor_submission_marker(vendor_name, vendor_type, uploaded_files):
+    """
+    Build the notify marker payload of a vendor submission.
+
+    Args:
+        vendor_name (str): Vendor name
+        vendor_type (str): 'opticat' or 'non-opticat'
+        uploaded_files (list): Original filenames of the submitted files
+
+    Returns:
+        dict: Marker payload
+    """
+    return {
+        "submission_type": "vendor_submission",
+        "vendor": vendor_name,
+        "vendor_type": vendor_type,
+        "uploaded_files": uploaded_files,
+        "raw_vendor_path": f"raw/vendor={vendor_name}",
+        "uploaded_at": datetime.utcnow().isoformat() + "Z",
+        "next_step": "Data team to run vendor ingestion pipeline"
+    }
+
+
+def validation_summary(report):
+    """
+    Return the part of a validation report recorded in the Bronze manifest.
+    """
+    return {key: value for key, value in report.items() if key != "errors"}
+
+
+def write_bronze_deltas(vendor, timestamp, blobs, fingerprints, manifest_dir,
+                        connection_string, container_name):
+    """
+    Upload the SKU delta and fingerprints of each fingerprinted data blob.
+
+    Both go next to the full file ('<name>.delta.json', '<name>.fingerprints.json').
+    The delta is against the fingerprints of the vendor's previous manifest;
+    without one, every SKU is reported as added and the delta is marked full.
+
+    Args:
+        vendor (str): Vendor name
+        timestamp (str): Submission timestamp used in the blob names
+        blobs (dict): Manifest keys -> 'container/blob_path' of the data blobs
+        fingerprints (dict): Manifest key -> fingerprints (see delta_service)
+        manifest_dir (str): Local manifest folder of the vendor
+        connection_string (str): Azure Storage connection string
+        container_name (str): Azure container name
+
+    Returns:
+        dict: Manifest key -> delta entry for the manifest
+    """
+    vendor_key = safe_vendor_key(vendor)
+    previous = previous_manifest(manifest_dir, vendor_key, timestamp)
+    previous_deltas = (previous or {}).get("deltas", {})
+
+    entries = {}
+    uploads = []
+    for blob_key, current in fingerprints.items():
+        previous_fingerprints = None
+        previous_timestamp = None
+        if blob_key in previous_deltas:
+            previous_timestamp = previous["timestamp"]
+            previous_fingerprints = load_fingerprints(
+                fingerprint_file_path(manifest_dir, vendor_key, previous_timestamp, blob_key)
+            )
+            if previous_fingerprints is None:
+                previous_fingerprints = download_json_blob(
+                    previous_deltas[blob_key]["fingerprints_blob"], connection_string
+                )
+
+        full = previous_fingerprints is None
+        delta = compute_delta(previous_fingerprints or {}, current)
+        counts = delta_counts(delta)
+
+        local_fingerprints = fingerprint_file_path(manifest_dir, vendor_key, timestamp, blob_key)
+        save_fingerprints(local_fingerprints, current)
+
+        delta_blob_path = sibling_blob_path(blobs[blob_key], "delta")
+        fingerprints_blob_path = sibling_blob_path(blobs[blob_key], "fingerprints")
+        document = {
+            "vendor": vendor,
+            "timestamp": timestamp,
+            "source_blob": blobs[blob_key],
+            "previous_timestamp": None if full else previous_timestamp,
+            "full": full,
+            **counts,
+            "sheets": delta,
+        }
+        uploads += [
+            partial(upload_json_blob, document, delta_blob_path, connection_string, container_name),
+            partial(upload_blob, local_fingerprints, fingerprints_blob_path, connection_string, container_name),
+        ]
+
+        entries[blob_key] = {
+            "delta_blob": f"{container_name}/{delta_blob_path}",
+            "fingerprints_blob": f"{container_name}/{fingerprints_blob_path}",
+            "previous_timestamp": document["previous_timestamp"],
+            "full": full,
+            **counts,
+        }
+        print(f"🔍 Delta {blob_key}: +{counts['added']} ~{counts['modified']} -{counts['deleted']}"
+              + (" (full)" if full else f" vs {previous_timestamp}"))
+
+    run_uploads_parallel(uploads)
+    return entries
+
+
+def publish_bronze_submission(vendor, timestamp, blobs, subfolder, notify_marker,
+                              connection_string, container_name, upload_folder,
+                              validation=None, fingerprints=None, files=None):
+    """
+    Write the manifest of a submission whose data blobs are all in Bronze.
+
+    The SKU deltas are written first, then the manifest together with the
+    notify marker; the manifest is finally recorded in the local submission
+    index.
+
+    Args:
+        vendor (str): Vendor name
+        timestamp (str): Submission timestamp used in the blob names
+        blobs (dict): Manifest keys -> 'container/blob_path' of the data blobs
+        subfolder (str): Local manifest subfolder ('opticat' or 'non_opticat')
+        notify_marker (tuple or None): (blob_path, payload) of the notify marker
+        connection_string (str): Azure Storage connection string
+        container_name (str): Azure container name
+        upload_folder (str): Base upload folder for local manifest storage
+        validation (dict or None): Validation summary of the data files
+        fingerprints (dict or None): Manifest key -> SKU fingerprints; a delta
+            against the previous submission is written for each
+        files (dict or None): Manifest key -> {sha256, size} of the data blobs
+
+    Returns:
+        str: Manifest blob path
+    """
+    manifest = {
+        "vendor": vendor,
+        "vendor_type": "opticat" if subfolder == "opticat" else "non-opticat",
+        "timestamp": timestamp,
+        **blobs,
+        "assets_uploaded_via": "browser_sas",
+    }
+    if notify_marker:
+        manifest["notify_marker"] = notify_marker[0]
+    if files:
+        manifest["files"] = files
+    if validation is not None:
+        manifest["validation"] = validation
+    if fingerprints:
+        manifest["deltas"] = write_bronze_deltas(
+            vendor, timestamp, blobs, fingerprints, os.path.join(upload_folder, vendor, subfolder),
+            connection_string, container_name,
+        )
+
+    manifest_blob_path = write_bronze_manifest(
+        manifest, subfolder, notify_marker, connection_string, container_name, upload_folder,
+    )
+
+    # The index is a rebuildable cache; never fail a published submission over it
+    try:
+        get_submission_index(upload_folder).record(manifest_blob_path, manifest)
+    except sqlite3.Error as e:
+        print(f"⚠ Submission index not updated: {e}")
+
+    return manifest_blob_path
+
+
+def check_unified_workbook(path, report_progress, approved_timeline=None):
+    """
+    Validate a unified XLSX before it is published to the data team.
+
+    Args:
+        path (str): Local path of the workbook
+        report_progress (callable): Callback receiving a progress message
+        approved_timeline (PriceTimeline, optional): Vendor's last approved pricing
+
+    Returns:
+        dict: Validation summary for the manifest
+
+    Raises:
+        WorkbookValidationError: If the workbook does not match the template
+    """
+    report_progress("Validating unified XLSX")
+    report = validate_unified_workbook(path, approved_timeline=approved_timeline)
+    if not report["valid"]:
+        raise WorkbookValidationError(report)
+    return validation_summary(report)
+
+
+def check_opticat_xml(summary):
+    """
+    Reject an OptiCat product XML whose validation summary has errors.
+
+    Args:
+        summary (dict): Summary from OpticatXmlValidator.close()
+
+    Returns:
+        dict: Validation summary for the manifest
+
+    Raises:
+        XmlValidationError: If the XML is malformed or incomplete
+    """
+    if not summary["valid"]:
+        raise XmlValidationError(summary)
+    return validation_summary(summary)
+
+
+def check_pricing_tiers(path, report_progress):
+    """
+    Reject a pricing XLSX (OptiCat pricing, approved pricing review) whose
+    tiers overlap, leave gaps or have min > max.
+
+    Args:
+        path (str): Local path of the workbook
+        report_progress (callable): Callback receiving a progress message
+
+    Raises:
+        PricingTierError: If any tiers conflict
+    """
+    report_progress("Checking pricing tiers")
+    errors = validate_pricing_workbook_tiers(path)
+    if errors:
+        raise PricingTierError(errors)
+
+
+def process_pricing_review(payload, report_progress, connection_string, upload_folder):
+    """
+    Upload an approved pricing file to Silver and notify the data team.
+
+    Args:
+        payload (dict): vendor_name, timestamp, local_path, uploaded_file
+        report_progress (callable): Callback receiving a progress message
+        connection_string (str): Azure Storage connection string
+        upload_folder (str): Base upload folder for the approved pricing timeline
+
+    Returns:
+        dict: Uploaded blob paths
+    """
+    vendor_name = payload["vendor_name"]
+    timestamp = payload["timestamp"]
+
+    check_pricing_tiers(payload["local_path"], report_progress)
+
+    report_progress("Uploading approved pricing file")
+    blob_path = (
+        f"approved/vendor={vendor_name}/pricing/"
+        f"{timestamp}_pricing.xlsx"
+    )
+
+    upload_blob(
+        local_path=payload["local_path"],
+        blob_path=blob_path,
+        connection_string=connection_string,
+        container_name="silver"
+    )
+
+    # ---------------------------------------
+    # SNAPSHOT APPROVED PRICE TIMELINE (local)
+    # Later submissions are checked against it
+    # ---------------------------------------
+    report_progress("Indexing approved pricing dates")
+    try:
+        timeline = timeline_from_pricing_workbook(payload["local_path"])
+        save_timeline(approved_timeline_path(upload_folder, vendor_name), timeline)
+        print(f"📅 Approved pricing timeline for {vendor_name}: {len(timeline)} price(s)")
+    except Exception as e:
+        # The approved file is already in Silver; only the date checks lose it
+        print(f"⚠ Could not index approved pricing for {vendor_name}: {e}")
+
+    # ---------------------------------------
+    # CREATE NOTIFY MARKER (Bronze)
+    # ---------------------------------------
+    report_progress("Writing notify marker")
+    marker_payload = {
+        "submission_type": "pricing_review",
+        "vendor": vendor_name,
+        "uploaded_file": payload["uploaded_file"],
+        "reviewed_pricing_path": f"silver/approved/vendor={vendor_name}/pricing",
+        "uploaded_at": datetime.utcnow().isoformat() + "Z",
+        "action_required": "Run pricing pipeline"
+    }
+    marker_name = notify_marker_path(vendor_name, timestamp)
+
+    upload_json_blob(
+        data=marker_payload,
+        blob_path=marker_name,
+        connection_string=connection_string,
+        container_name="bronze"
+    )
+
+    return {"pricing_blob": f"silver/{blob_path}", "notify_marker": marker_name}
+
+
+def process_opticat_submission(payload, report_progress, connection_string, upload_folder):
+    """
+    Upload an OptiCat submission (product XML + pricing XLSX) to Bronze.
+
+    Args:
+        payload (dict): vendor_name, timestamp, container_name,
+            product_path, pricing_path, uploaded_files
+        report_progress (callable): Callback receiving a progress message
+        connection_string (str): Azure Storage connection string
+        upload_folder (str): Base upload folder for local manifest storage
+
+    Returns:
+        dict: Notify marker blob path
+    """
+    vendor_name = payload["vendor_name"]
+
+    # ---------------------------------------
+    # CREATE NOTIFY MARKER (Vendor Submission)
+    # Written together with the manifest once the data blobs succeed
+    # ---------------------------------------
+    marker_payload = vendor_submission_marker(vendor_name, "opticat", payload["uploaded_files"])
+    marker_name = notify_marker_path(vendor_name, payload["timestamp"])
+
+    # Nothing reaches Bronze unless the product XML parses and is complete;
+    # the same pass fingerprints the items for the delta
+    report_progress("Validating product XML")
+    xml_fingerprints = SkuFingerprints()
+    validation = check_opticat_xml(
+        validate_opticat_xml(payload["product_path"], on_item=xml_fingerprints.add_xml_item)
+    )
+    check_pricing_tiers(payload["pricing_path"], report_progress)
+
+    report_progress("Fingerprinting pricing XLSX")
+    fingerprints = {
+        "azure_xml_blob": xml_fingerprints.result(),
+        "azure_pricing_blob": fingerprint_workbook(payload["pricing_path"]),
+    }
+
+    report_progress("Uploading product XML and pricing XLSX")
+    uploaded = upload_to_azure_bronze_opticat(
+        vendor=vendor_name,
+        xml_local_path=payload["product_path"],
+        pricing_local_path=payload["pricing_path"],
+        connection_string=connection_string,
+        container_name=payload["container_name"],
+    )
+
+    report_progress("Writing manifest and notify marker")
+    publish_bronze_submission(
+        vendor_name,
+        uploaded["timestamp"],
+        uploaded["blobs"],
+        "opticat",
+        (marker_name, marker_payload),
+        connection_string,
+        payload["container_name"],
+        upload_folder,
+        validation=validation,
+        fingerprints=fingerprints,
+        files=uploaded["files"],
+    )
+
+    return {"notify_marker": marker_name}
+
+
+def process_non_opticat_submission(payload, report_progress, connection_string, upload_folder):
+    """
+    Upload a Non-OptiCat submission (unified XLSX) to Bronze.
+
+    Args:
+        payload (dict): vendor_name, timestamp, container_name,
+            unified_path, uploaded_files
+        report_progress (callable): Callback receiving a progress message
+        connection_string (str): Azure Storage connection string
+        upload_folder (str): Base upload folder for local manifest storage
+
+    Returns:
+        dict: Notify marker blob path
+    """
+    vendor_name = payload["vendor_name"]
+
+    # ---------------------------------------
+    # CREATE NOTIFY MARKER (Vendor Submission)
+    # Written together with the manifest once the data blob succeeds
+    # ---------------------------------------
+    marker_payload = vendor_submission_marker(vendor_name, "non-opticat", payload["uploaded_files"])
+    marker_name = notify_marker_path(vendor_name, payload["timestamp"])
+
+    # Nothing reaches Bronze unless the workbook matches the template
+    validation = check_unified_workbook(
+        payload["unified_path"], report_progress, get_approved_timeline(upload_folder, vendor_name)
+    )
+
+    report_progress("Fingerprinting unified XLSX")
+    fingerprints = {"azure_unified_blob": fingerprint_workbook(payload["unified_path"])}
+
+    report_progress("Uploading unified XLSX")
+    uploaded = upload_to_azure_bronze_non_opticat(
+        vendor=vendor_name,
+        unified_local_path=payload["unified_path"],
+        connection_string=connection_string,
+        container_name=payload["container_name"],
+    )
+
+    report_progress("Writing manifest and notify marker")
+    publish_bronze_submission(
+        vendor_name,
+        uploaded["timestamp"],
+        uploaded["blobs"],
+        "non_opticat",
+        (marker_name, marker_payload),
+        connection_string,
+        payload["container_name"],
+        upload_folder,
+        validation=validation,
+        fingerprints=fingerprints,
+        files=uploaded["files"],
+    )
+
+    return {"notify_marker": marker_name}
+
+
+def delete_streamed_blobs(payload, report_progress, connection_string):
+    """
+    Delete the data blobs of a rejected streamed submission from Bronze.
+
+    They were committed while they streamed, before the job could check
+    them; without a manifest nothing would ever read or clean them up.
+    """
+    report_progress("Deleting rejected files from Bronze")
+    container_name = payload["container_name"]
+    names = [blob.split("/", 1)[1] for blob in payload["blobs"].values()]
+    return delete_blobs_batched(get_container_client(connection_string, container_name), names)
+
+
+def process_streamed_submission(payload, report_progress, connection_string, upload_folder):
+    """
+    Finish a submission whose data blobs were streamed to Bronze by /upload.
+
+    Only the manifest and notify marker are left to write. A Non-OptiCat
+    workbook is validated from its local copy first; an OptiCat product XML
+    was validated while it streamed and its summary is in the payload, and
+    its pricing XLSX is tier checked from its local copy. /upload always
+    keeps a copy of the checked file (deleted with the job folder unless
+    STREAM_KEEP_ARCHIVE). If a check fails or the copy is missing, the
+    manifest and marker are withheld so the data team is not notified, and
+    the streamed data blobs are deleted from Bronze. SKU deltas are written
+    for the files that have a local copy.
+
+    Args:
+        payload (dict): vendor_name, vendor_type, timestamp, blob_timestamp,
+            container_name, blobs, files, archives, uploaded_files and, for
+            OptiCat, xml_validation
+        report_progress (callable): Callback receiving a progress message
+        connection_string (str): Azure Storage connection string
+        upload_folder (str): Base upload folder for local manifest storage
+
+    Returns:
+        dict: Manifest and notify marker blob paths
+    """
+    vendor_name = payload["vendor_name"]
+    vendor_type = payload["vendor_type"]
+
+    marker_payload = vendor_submission_marker(vendor_name, vendor_type, payload["uploaded_files"])
+    marker_name = notify_marker_path(vendor_name, payload["timestamp"])
+
+    archives = payload.get("archives", {})
+    checked_key = "azure_unified_blob" if vendor_type == "non-opticat" else "azure_pricing_blob"
+
+    validation = None
+    try:
+        if not archives.get(checked_key):
+            raise ValueError(f"No local copy of {checked_key} to check; manifest and notify marker withheld.")
+
+        if vendor_type == "non-opticat":
+            validation = check_unified_workbook(
+                archives[checked_key], report_progress, get_approved_timeline(upload_folder, vendor_name)
+            )
+        else:
+            if payload.get("xml_validation"):
+                validation = check_opticat_xml(payload["xml_validation"])
+            check_pricing_tiers(archives[checked_key], report_progress)
+    except (ValueError, WorkbookValidationError, XmlValidationError, PricingTierError):
+        delete_streamed_blobs(payload, report_progress, connection_string)
+        raise
+
+    fingerprints = {}
+    for blob_key, archive_path in payload.get("archives", {}).items():
+        if archive_path:
+            report_progress(f"Fingerprinting {blob_key}")
+            fingerprints[blob_key] = (
+                fingerprint_opticat_xml(archive_path) if archive_path.lower().endswith(".xml")
+                else fingerprint_workbook(archive_path)
+            )
+
+    report_progress("Writing manifest and notify marker")
+    manifest_blob_path = publish_bronze_submission(
+        vendor_name,
+        payload["blob_timestamp"],
+        payload["blobs"],
+        "opticat" if vendor_type == "opticat" else "non_opticat",
+        (marker_name, marker_payload),
+        connection_string,
+        payload["container_name"],
+        upload_folder,
+        validation=validation,
+        fingerprints=fingerprints,
+        files=payload.get("files"),
+    )
+
+    return {"manifest": manifest_blob_path, "notify_marker": marker_name}
+
+
+def removing_job_folder(handler):
+    """
+    Wrap a job handler so the job's private upload folder (payload
+    "job_folder", written by /upload) is deleted once the handler finishes,
+    whether it succeeded or failed. A job interrupted by a crash keeps its
+    folder, so it can run again when it is requeued.
+    """
+    @wraps(handler)
+    def run(payload, report_progress):
+        try:
+            return handler(payload, report_progress)
+        finally:
+            job_folder = payload.get("job_folder")
+            if job_folder:
+                shutil.rmtree(job_folder, ignore_errors=True)
+    return run
+
+
+def build_submission_handlers(connection_string, upload_folder):
+    """
+    Return job handlers for every submission kind, bound to the app config.
+
+    Args:
+        connection_string (str): Azure Storage connection string
+        upload_folder (str): Base upload folder
+
+    Returns:
+        dict: Job kind -> handler(payload, report_progress)
+    """
+    handlers = {
+        "pricing_review": process_pricing_review,
+        "opticat": process_opticat_submission,
+        "non_opticat": process_non_opticat_submission,
+        "streamed_submission": process_streamed_submission,
+    }
+    return {
+        kind: removing_job_folder(
+            partial(handler, connection_string=connection_string, upload_folder=upload_folder)
+        )
+        for kind, handler in handlers.items()
+    }
@@ -0,0 +1,344 @@
+"""
+Request tracing and metrics for FGI Vendor Portal
+
+Spans time the hot paths of a request or background job (file saves, blob
+uploads, manifest and marker writes) and carry the bytes they moved; Azure
+calls are counted per operation. Finished spans feed process-wide metrics,
+exposed in Prometheus text format by /metrics, and the trace of each request
+or job is printed as one JSON log line.
+
+Tracing is off unless TRACING_ENABLED=1. When off, span() returns a shared
+no-op object and traced() calls straight through, so instrumented code pays
+one flag check per call.
+
+Usage:
+    with span("save_file") as s:
+        path = save_file(...)
+        s.add_bytes(os.path.getsize(path))
+
+    @traced("upload_blob")
+    def upload_blob(...): ...
+
+    count_azure_call("upload_blob")
+"""
+import os
+import json
+import time
+import threading
+import contextvars
+from functools import wraps
+
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "0") == "1"
+TRACING_JSON_LOGS = os.getenv("TRACING_JSON_LOGS", "1") == "1"
+
+METRICS_PREFIX = "vendor_portal"
+
+# Upper bounds (seconds) of the span duration histogram
+SPAN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_current_trace = contextvars.ContextVar("vendor_portal_trace", default=None)
+
+
+def set_tracing(enabled):
+    """
+    Turn tracing on or off at runtime (e.g. from tests or a debug shell).
+    """
+    global TRACING_ENABLED
+    TRACING_ENABLED = bool(enabled)
+
+
+def tracing_enabled():
+    return TRACING_ENABLED
+
+
+# -----------------------------
+# METRICS
+# -----------------------------
+class _Metrics:
+    """
+    Process-wide span histograms, byte totals and Azure call counters.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}        # name -> [bucket counts..., count, sum]
+        self.span_bytes = {}   # name -> bytes
+        self.azure_calls = {}  # operation -> calls
+        self.traces = {}       # (kind, name, status) -> [count, sum]
+
+    def observe_span(self, name, seconds, n_bytes):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = [0] * (len(SPAN_BUCKETS) + 2)
+            for i, bound in enumerate(SPAN_BUCKETS):
+                if seconds <= bound:
+                    stats[i] += 1
+            stats[-2] += 1
+            stats[-1] += seconds
+            if n_bytes:
+                self.span_bytes[name] = self.span_bytes.get(name, 0) + n_bytes
+
+    def count_azure_call(self, operation, n):
+        with self._lock:
+            self.azure_calls[operation] = self.azure_calls.get(operation, 0) + n
+
+    def observe_trace(self, kind, name, status, seconds):
+        with self._lock:
+            stats = self.traces.setdefault((kind, name, str(status)), [0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+
+    def render(self):
+        """
+        Return the metrics in Prometheus text exposition format.
+        """
+        p = METRICS_PREFIX
+        lines = []
+        with self._lock:
+            lines += [
+                f"# HELP {p}_span_seconds Duration of traced spans.",
+                f"# TYPE {p}_span_seconds histogram",
+            ]
+            for name, stats in sorted(self.spans.items()):
+                label = _label_value(name)
+                for bound, count in zip(SPAN_BUCKETS, stats):
+                    lines.append(f'{p}_span_seconds_bucket{{span="{label}",le="{bound}"}} {count}')
+                lines.append(f'{p}_span_seconds_bucket{{span="{label}",le="+Inf"}} {stats[-2]}')
+                lines.append(f'{p}_span_seconds_count{{span="{label}"}} {stats[-2]}')
+                lines.append(f'{p}_span_seconds_sum{{span="{label}"}} {stats[-1]:.6f}')
+
+            lines += [
+                f"# HELP {p}_span_bytes_total Bytes transferred by traced spans.",
+                f"# TYPE {p}_span_bytes_total counter",
+            ]
+            for name, n_bytes in sorted(self.span_bytes.items()):
+                lines.append(f'{p}_span_bytes_total{{span="{_label_value(name)}"}} {n_bytes}')
+
+            lines += [
+                f"# HELP {p}_azure_calls_total Azure Storage calls by operation.",
+                f"# TYPE {p}_azure_calls_total counter",
+            ]
+            for operation, calls in sorted(self.azure_calls.items()):
+                lines.append(f'{p}_azure_calls_total{{operation="{_label_value(operation)}"}} {calls}')
+
+            lines += [
+                f"# HELP {p}_trace_seconds Duration of traced requests and jobs.",
+                f"# TYPE {p}_trace_seconds summary",
+            ]
+            for (kind, name, status), (count, total) in sorted(self.traces.items()):
+                labels = f'kind="{kind}",name="{_label_value(name)}",status="{_label_value(status)}"'
+                lines.append(f"{p}_trace_seconds_count{{{labels}}} {count}")
+                lines.append(f"{p}_trace_seconds_sum{{{labels}}} {total:.6f}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.span_bytes.clear()
+            self.azure_calls.clear()
+            self.traces.clear()
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = _Metrics()
+
+
+def render_metrics():
+    return metrics.render()
+
+
+# -----------------------------
+# TRACES AND SPANS
+# -----------------------------
+class Trace:
+    """
+    Spans, bytes and Azure calls of one request or background job.
+
+    Shared with the threads the request fans out to (see in_trace_context),
+    so updates are locked.
+    """
+
+    def __init__(self, kind, name, attributes=None):
+        self.kind = kind
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.spans = []
+        self.azure_calls = {}
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def record_span(self, name, seconds, n_bytes, attributes):
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "ms": round(seconds * 1000, 3),
+                "bytes": n_bytes,
+                **attributes,
+            })
+            self.bytes += n_bytes
+
+    def count_azure_call(self, operation, n):
+        with self._lock:
+            self.azure_calls[operation] = self.azure_calls.get(operation, 0) + n
+
+    def to_dict(self, status, seconds):
+        with self._lock:
+            return {
+                "trace": self.kind,
+                "name": self.name,
+                "status": status,
+                "ms": round(seconds * 1000, 3),
+                "bytes": self.bytes,
+                "azure_calls": dict(self.azure_calls),
+                "spans": list(self.spans),
+                "started_at": self.started_at,
+                **self.attributes,
+            }
+
+
+class Span:
+    """
+    One timed section. Use as a context manager; add_bytes() records data moved.
+    """
+
+    __slots__ = ("name", "attributes", "bytes", "_started")
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.bytes = 0
+        self._started = None
+
+    def add_bytes(self, n_bytes):
+        self.bytes += n_bytes or 0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._started
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        metrics.observe_span(self.name, seconds, self.bytes)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.record_span(self.name, seconds, self.bytes, self.attributes)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def add_bytes(self, n_bytes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name, **attributes):
+    """
+    Return a context manager timing one section of work.
+
+    Args:
+        name (str): Span name (metric label)
+        **attributes: Extra fields for the JSON log (e.g. blob path)
+    """
+    if not TRACING_ENABLED:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def traced(name=None):
+    """
+    Decorator running the function inside span(name or function name).
+    """
+    def decorate(fn):
+        span_name = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACING_ENABLED:
+                return fn(*args, **kwargs)
+            with Span(span_name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count_azure_call(operation, n=1):
+    """
+    Count Azure Storage calls (process metrics and the current trace).
+    """
+    if not TRACING_ENABLED:
+        return
+    metrics.count_azure_call(operation, n)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.count_azure_call(operation, n)
+
+
+def start_trace(kind, name, **attributes):
+    """
+    Start the trace of a request or job in the current context.
+
+    Returns:
+        token for finish_trace, or None when tracing is off
+    """
+    if not TRACING_ENABLED:
+        return None
+    return _current_trace.set(Trace(kind, name, attributes))
+
+
+def finish_trace(token, status):
+    """
+    Finish the trace started by start_trace: record its duration and print
+    it as one JSON log line.
+
+    Returns:
+        dict or None: The trace as logged
+    """
+    if token is None:
+        return None
+    trace = _current_trace.get()
+    _current_trace.reset(token)
+    if trace is None:
+        return None
+
+    seconds = time.perf_counter() - trace.started
+    metrics.observe_trace(trace.kind, trace.name, status, seconds)
+    record = trace.to_dict(status, seconds)
+    if TRACING_JSON_LOGS:
+        print(json.dumps(record, default=str), flush=True)
+    return record
+
+
+def in_trace_context(fn):
+    """
+    Wrap a callable so it runs in the caller's trace context, e.g. before
+    handing it to a thread pool (threads do not inherit context variables).
+    Each wrapper may only run in one thread at a time; wrap once per task.
+    """
+    if not TRACING_ENABLED:
+        return fn
+    context = contextvars.copy_context()
+
+    @wraps(fn)
+    def run(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+    return run
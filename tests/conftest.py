@@ -0,0 +1,40 @@
+"""
+Shared fixtures for the FGI Vendor Portal tests
+"""
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def portal_app(tmp_path_factory):
+    """
+    The Flask app, imported from a scratch directory so its uploads folder
+    (batches, job queue, profiles) stays out of the repository. No job
+    workers are started.
+    """
+    # Queued jobs stay queued so tests can inspect them
+    os.environ.setdefault("JOB_WORKERS", "0")
+
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("portal"))
+    try:
+        import app as portal
+    finally:
+        os.chdir(cwd)
+
+    portal.app.config["TESTING"] = True
+    return portal
+
+
+@pytest.fixture
+def client(portal_app):
+    return portal_app.app.test_client()
+
+
+def flashed_messages(client):
+    """
+    Return the (category, message) pairs flashed so far in the client's session.
+    """
+    with client.session_transaction() as session:
+        return list(session.get("_flashes", []))
@@ -0,0 +1,76 @@
+"""
+In-memory stand-in for the Azure Blob container / blob clients used by
+services.azure_service (block staging, block lists, commits, uploads)
+
+Block ids are kept as passed in: the real SDK base64-encodes them on the
+wire and decodes them again in get_block_list, so callers see the same
+strings.
+"""
+from types import SimpleNamespace
+
+from azure.core.exceptions import ResourceNotFoundError
+
+
+class FakeBlobClient:
+    def __init__(self, container, name):
+        self.container = container
+        self.name = name
+
+    def stage_block(self, block_id, data):
+        self.container.calls.append(("stage_block", self.name, block_id))
+        if self.container.fail_stage_after is not None:
+            if self.container.fail_stage_after == 0:
+                raise ConnectionError("connection reset while staging")
+            self.container.fail_stage_after -= 1
+        self.container.uncommitted.setdefault(self.name, {})[block_id] = bytes(data)
+
+    def get_block_list(self, block_list_type="committed"):
+        if self.name not in self.container.uncommitted and self.name not in self.container.blobs:
+            raise ResourceNotFoundError("blob not found")
+        committed = self.container.committed.get(self.name, [])
+        uncommitted = [
+            SimpleNamespace(id=block_id, size=len(data))
+            for block_id, data in self.container.uncommitted.get(self.name, {}).items()
+        ]
+        return committed, uncommitted
+
+    def commit_block_list(self, block_ids, metadata=None, **kwargs):
+        self.container.calls.append(("commit_block_list", self.name, list(block_ids)))
+        staged = self.container.uncommitted.pop(self.name)
+        self.container.blobs[self.name] = SimpleNamespace(
+            name=self.name, data=b"".join(staged[block_id] for block_id in block_ids), metadata=metadata
+        )
+        self.container.committed[self.name] = [
+            SimpleNamespace(id=block_id, size=len(staged[block_id])) for block_id in block_ids
+        ]
+
+    def upload_blob(self, data, overwrite=False, metadata=None, **kwargs):
+        if hasattr(data, "read"):
+            data = data.read()
+        if isinstance(data, str):
+            data = data.encode()
+        self.container.calls.append(("upload_blob", self.name))
+        self.container.blobs[self.name] = SimpleNamespace(name=self.name, data=data, metadata=metadata)
+
+
+class FakeContainerClient:
+    """
+    Container double; set fail_stage_after to N to make the (N+1)-th
+    stage_block call fail.
+    """
+
+    account_name = "devstoreaccount1"
+    container_name = "bronze"
+
+    def __init__(self):
+        self.blobs = {}
+        self.committed = {}
+        self.uncommitted = {}
+        self.calls = []
+        self.fail_stage_after = None
+
+    def get_blob_client(self, name):
+        return FakeBlobClient(self, name)
+
+    def staged_block_ids(self):
+        return [call[2] for call in self.calls if call[0] == "stage_block"]
@@ -0,0 +1,45 @@
+import os
+import time
+
+import pytest
+
+from services.batch_store import DuplicateSkuError, FileBatchStore, SQLiteBatchStore
+
+
+@pytest.fixture(params=["sqlite", "file"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteBatchStore(str(tmp_path / "batches.db"))
+    return FileBatchStore(str(tmp_path / "batches"))
+
+
+def product(sku):
+    return {"batch_item_rows": [{"Part Number": sku}], "pending_products": [{"sku": sku}]}
+
+
+def test_duplicate_sku_is_rejected_without_appending(store):
+    store.append("b1", product("SKU1"))
+    store.append("b2", product("SKU1"))
+
+    with pytest.raises(DuplicateSkuError):
+        store.append("b1", product("SKU1"))
+
+    assert store.skus("b1") == {"SKU1"}
+    assert store.has_sku("b1", "SKU1") and not store.has_sku("b1", "SKU2")
+    assert store.get("b1", "batch_item_rows") == [{"Part Number": "SKU1"}]
+
+
+def test_expire_deletes_only_abandoned_batches(store, monkeypatch):
+    store.append("old", product("SKU1"))
+    if isinstance(store, FileBatchStore):
+        hour_ago = time.time() - 3600
+        os.utime(os.path.join(store.base_dir, "old"), (hour_ago, hour_ago))
+    else:
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 3600)
+    store.append("new", product("SKU2"))
+
+    assert store.expire(ttl_seconds=60) == 1
+    assert store.get_all("old")["pending_products"] == []
+    assert store.skus("old") == set()
+    assert store.skus("new") == {"SKU2"}
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+from services import azure_service
+from services.azure_service import BlobListingCache
+
+
+class OnePageListing:
+    def __init__(self, blobs):
+        self.blobs = blobs
+        self.continuation_token = None
+
+    def by_page(self):
+        return self
+
+    def __iter__(self):
+        yield self.blobs
+
+
+class ListingContainer:
+    account_name = "devstoreaccount1"
+    container_name = "bronze"
+
+    def __init__(self):
+        self.listed = []
+
+    def list_blobs(self, name_starts_with, include=None):
+        self.listed.append(name_starts_with)
+        return OnePageListing([SimpleNamespace(name=f"{name_starts_with}blob")])
+
+
+def list_prefix(cache, container, prefix):
+    return [blob.name for blob in cache.iter_blobs(container, prefix)]
+
+
+def test_least_recently_used_listing_is_dropped_at_capacity():
+    cache, container = BlobListingCache(ttl=60, max_entries=2), ListingContainer()
+    for prefix in ("a/", "b/", "a/", "c/"):
+        list_prefix(cache, container, prefix)
+
+    assert container.listed == ["a/", "b/", "c/"]
+    list_prefix(cache, container, "a/")
+    list_prefix(cache, container, "b/")
+    assert container.listed == ["a/", "b/", "c/", "b/"]
+    assert cache.stats()["entries"] == 2
+
+
+def test_expired_listings_are_evicted_when_a_listing_is_stored(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(azure_service.time, "monotonic", lambda: now[0])
+    cache, container = BlobListingCache(ttl=30), ListingContainer()
+    list_prefix(cache, container, "a/")
+    list_prefix(cache, container, "b/")
+
+    now[0] += 31
+    list_prefix(cache, container, "c/")
+
+    assert cache.stats()["entries"] == 1
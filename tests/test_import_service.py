@@ -0,0 +1,84 @@
+import os
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from helpers.pricing_levels import build_price_rows, parse_pricing_levels
+from services.batch_store import SQLiteBatchStore
+from services.excel_service import create_multi_product_excel
+from services.import_service import import_products
+
+VENDOR = "Grote Lighting"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteBatchStore(str(tmp_path / "_batches" / "batches.db"))
+
+
+def discount_level_rows(sku, base_price, discount, list_price=""):
+    levels = parse_pricing_levels(MultiDict([
+        ("level_type[]", "Each"),
+        ("level_currency[]", "CAD"),
+        ("level_pricing_method[]", "discount_based"),
+        ("level_db_base_price[]", base_price),
+        ("level_db_discount_pct[]", discount),
+        ("level_db_list_price_opt[]", list_price),
+        ("level_db_effective_date[]", "2099-01-01"),
+    ]))
+    price_rows, _ = build_price_rows(levels, VENDOR, sku)
+    return price_rows
+
+
+def export(tmp_path, price_rows):
+    skus = dict.fromkeys(row["Part Number"] for row in price_rows)
+    return create_multi_product_excel(
+        [{"Vendor": VENDOR, "Part Number": sku} for sku in skus],
+        [], [], [], [], [], [], price_rows, str(tmp_path),
+    )
+
+
+PRICE_COLUMNS = ("Part Number", "List Price", "Discount %", "Multiplier", "Pricing Amount")
+
+
+def test_discount_based_rows_round_trip_through_export_and_import(tmp_path, store):
+    exported = (
+        discount_level_rows("DISC-1", "80", "0.25", list_price="100")
+        + discount_level_rows("DISC-2", "19.99", "0.3")
+        + discount_level_rows("DISC-3", "50", "0")
+    )
+    assert [row["Pricing Amount"] for row in exported] == ["60.0000", "13.9930", "50.0000"]
+
+    report = import_products(export(tmp_path, exported), store, "b1", set())
+
+    assert (report["imported"], report["errors"]) == (3, [])
+    imported = store.get("b1", "batch_price_rows")
+    assert [[row[c] for c in PRICE_COLUMNS] for row in imported] == \
+        [[row[c] for c in PRICE_COLUMNS] for row in exported]
+
+
+def test_sku_added_concurrently_is_reported_and_the_rest_imported(tmp_path, store):
+    path = export(tmp_path, discount_level_rows("DISC-1", "80", "0.25") + discount_level_rows("DISC-2", "80", "0.25"))
+    # Added by another request after the route read the batch's SKUs
+    store.append("b1", {"pending_products": [{"sku": "DISC-2"}]})
+
+    report = import_products(path, store, "b1", set())
+
+    assert (report["imported"], report["failed"]) == (1, 1)
+    assert [(e["sku"], e["message"]) for e in report["errors"]] == \
+        [("DISC-2", "SKU 'DISC-2' is already in the batch.")]
+    assert store.skus("b1") == {"DISC-1", "DISC-2"}
+    assert [row["Part Number"] for row in store.get("b1", "batch_price_rows")] == ["DISC-1"]
+
+
+def test_import_route_deletes_the_uploaded_file(client, portal_app, tmp_path):
+    path = export(tmp_path, discount_level_rows("ROUTE-1", "80", "0.25"))
+    with open(path, "rb") as f:
+        response = client.post(
+            "/single-product/import", data={"import_file": (f, "import.xlsx")},
+            headers={"Accept": "application/json"},
+        )
+
+    assert response.get_json()["imported"] == 1
+    imports = os.path.join(portal_app.UPLOAD_FOLDER, "_unassigned", "single_product_imports")
+    assert os.listdir(imports) == []
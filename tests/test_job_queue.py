@@ -0,0 +1,122 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import job_queue as jq
+from services.job_queue import (
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    SQLiteJobQueue,
+    ensure_job_workers,
+    run_job,
+)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SQLiteJobQueue(str(tmp_path / "jobs" / "jobs.db"))
+
+
+@pytest.fixture
+def fresh_workers(monkeypatch):
+    # Every test starts as if no worker had been started in this process
+    monkeypatch.setattr(jq, "_worker_threads", [])
+    monkeypatch.setattr(jq, "_worker_pid", None)
+    monkeypatch.setattr(jq, "_heartbeat_thread", None)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_run_job_records_result_and_failure(queue):
+    handlers = {
+        "ok": lambda payload, report_progress: {"echo": payload["value"]},
+        "boom": lambda payload, report_progress: 1 / 0,
+    }
+    ok_id = queue.enqueue("ok", {"value": 3})
+    boom_id = queue.enqueue("boom", {})
+
+    run_job(queue, queue.claim_next(), handlers)
+    run_job(queue, queue.claim_next(), handlers)
+
+    assert queue.get(ok_id)["status"] == JOB_COMPLETED
+    assert queue.get(ok_id)["result"] == {"echo": 3}
+    assert queue.get(boom_id)["status"] == JOB_FAILED
+
+
+def test_worker_survives_errors_recording_a_job(queue, fresh_workers):
+    class FlakyQueue(SQLiteJobQueue):
+        fail_next_completion = True
+
+        def update(self, job_id, status=None, **fields):
+            if status == JOB_COMPLETED and self.fail_next_completion:
+                self.fail_next_completion = False
+                raise sqlite3.OperationalError("database is locked")
+            super().update(job_id, status=status, **fields)
+
+    flaky = FlakyQueue(queue.db_path)
+    first = flaky.enqueue("ok", {})
+    second = flaky.enqueue("ok", {})
+
+    ensure_job_workers(flaky, {"ok": lambda payload, report_progress: {}}, num_workers=1, poll_interval=0.01)
+
+    assert wait_for(lambda: flaky.get(second)["status"] == JOB_COMPLETED)
+    assert flaky.get(first)["status"] == JOB_FAILED
+    assert jq._worker_threads[0].is_alive()
+
+
+def test_ensure_job_workers_restarts_dead_threads(queue, fresh_workers):
+    ensure_job_workers(queue, {}, num_workers=2, poll_interval=0.01)
+    alive = jq._worker_threads[1]
+
+    dead = threading.Thread(target=lambda: None, name="job-worker-0")
+    dead.start()
+    dead.join()
+    jq._worker_threads[0] = dead
+
+    ensure_job_workers(queue, {}, num_workers=2, poll_interval=0.01)
+
+    assert jq._worker_threads[0] is not dead
+    assert jq._worker_threads[0].is_alive()
+    assert jq._worker_threads[1] is alive
+
+
+def hours_ago(hours):
+    return (datetime.utcnow() - timedelta(hours=hours)).isoformat() + "Z"
+
+
+def backdate(queue, sql, *params):
+    with sqlite3.connect(queue.db_path) as conn:
+        conn.execute(sql, params)
+
+
+def test_requeue_stale_only_requeues_jobs_of_stopped_owners(queue):
+    live_job = queue.enqueue("upload", {})
+    dead_job = queue.enqueue("upload", {})
+    legacy_job = queue.enqueue("upload", {})
+
+    queue.heartbeat("host:1:live")
+    queue.heartbeat("host:2:dead")
+    queue.claim_next("host:1:live")
+    queue.claim_next("host:2:dead")
+    queue.claim_next()
+
+    # A long upload: no progress for hours, but its process is still beating
+    backdate(queue, "UPDATE jobs SET updated_at = ?", hours_ago(3))
+    backdate(queue, "UPDATE job_workers SET heartbeat_at = ? WHERE owner = ?", hours_ago(1), "host:2:dead")
+
+    assert queue.requeue_stale(300) == 2
+    assert queue.get(live_job)["status"] == JOB_RUNNING
+    assert queue.get(dead_job)["status"] == JOB_QUEUED
+    assert queue.get(legacy_job)["status"] == JOB_QUEUED
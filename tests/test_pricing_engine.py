@@ -0,0 +1,121 @@
+from decimal import Decimal
+
+from helpers.pricing_engine import (
+    compute_pricing_columns, decimal_column, discount_multipliers, ehc_fee_totals, net_prices, tier_coverage
+)
+from helpers.pricing_levels import (
+    PRICING_LEVEL_FIELDS, add_pricing_totals, build_price_rows, concat_level_values, discount_pricing,
+    parse_pricing_levels,
+)
+from werkzeug.datastructures import MultiDict
+
+
+def levels_form(*levels):
+    form = MultiDict()
+    for level in levels:
+        for name, value in level.items():
+            form.add(name, value)
+    return form
+
+
+def test_decimal_column_rejects_blank_and_non_finite():
+    assert decimal_column(["1.5", "", "abc", "inf", "NaN"]) == [Decimal("1.5"), None, None, None, None]
+
+
+def test_discount_multipliers_blank_means_no_discount():
+    assert discount_multipliers(["0.25", "", "x"]) == [Decimal("0.75"), Decimal(1), None]
+
+
+def test_net_prices_round_half_up():
+    # 10.00005 would round to 10.0000 with banker's rounding / binary floats
+    assert net_prices(["10.0001", "0.125"], ["0.5", ""], quantum=Decimal("0.0001")) == ["5.0001", "0.1250"]
+    assert net_prices(["0.125"], [""], quantum=Decimal("0.01")) == ["0.13"]
+
+
+def test_net_prices_too_large_is_none():
+    assert net_prices(["1e30", "abc", "10"], ["0.25", "0.25", "1e30"]) == [None, None, None]
+
+
+def test_net_prices_only_for_used_discount_levels():
+    levels = parse_pricing_levels(levels_form(
+        {"level_type[]": "Each", "level_currency[]": "CAD", "level_pricing_method[]": "net_cost",
+         "level_net_net_cost[]": "8", "level_db_base_price[]": "1e30", "level_db_discount_pct[]": "0.1"},
+        {"level_type[]": "Each", "level_currency[]": "CAD", "level_pricing_method[]": "discount_based",
+         "level_net_net_cost[]": "", "level_db_base_price[]": "20", "level_db_discount_pct[]": "0.25"},
+    ))
+
+    assert discount_pricing(levels) == {1: ("15.0000", Decimal("0.75"))}
+
+    rows, _ = build_price_rows(levels, "Grote Lighting", "SKU1")
+    assert [row["Pricing Amount"] for row in rows] == ["8", "15.0000"]
+    assert [row["Multiplier"] for row in rows] == ["", "0.75"]
+
+
+def ehc_values(n, **columns):
+    values = {name: [""] * n for name in PRICING_LEVEL_FIELDS}
+    values.update(columns)
+    return values
+
+
+def test_ehc_fee_totals_derive_missing_side_from_qty_case():
+    totals = ehc_fee_totals(ehc_values(
+        3,
+        **{
+            "level_ehc_qty_case[]": ["12", "12", ""],
+            "level_ehc_bc_each[]": ["0.35", "", "0.35"],
+            "level_ehc_ns_case[]": ["", "4.20", "4.20"],
+        }
+    ))
+
+    assert totals["EHC BC Each"] == [Decimal("0.35"), None, Decimal("0.35")]
+    assert totals["EHC BC Case"] == [Decimal("4.2000"), None, None]
+    assert totals["EHC NS Each"] == [None, Decimal("0.3500"), None]
+    assert totals["Each Total"] == [Decimal("0.35"), Decimal("0.3500"), Decimal("0.35")]
+    assert totals["Case Total"] == [Decimal("4.2000"), Decimal("4.20"), Decimal("4.20")]
+    assert totals["EHC YK Each"] == [None, None, None]
+
+
+def test_ehc_fee_totals_too_large_derived_fee_is_none():
+    totals = ehc_fee_totals(ehc_values(
+        1, **{"level_ehc_qty_case[]": ["1e20"], "level_ehc_bc_each[]": ["1e20"]}
+    ))
+    assert totals["EHC BC Case"] == [None]
+
+
+def test_tier_coverage_open_ended_and_inverted_tiers_are_none():
+    assert tier_coverage(["1", "10", "", "5"], ["9", "", "3", "2"]) == [Decimal(9), None, None, None]
+
+
+def test_build_price_rows_from_chunk_columns():
+    first = parse_pricing_levels(levels_form(
+        {"level_type[]": "Each", "level_currency[]": "CAD", "level_pricing_method[]": "discount_based",
+         "level_db_base_price[]": "20", "level_db_discount_pct[]": "0.25"},
+    ))
+    second = parse_pricing_levels(levels_form(
+        {"level_type[]": "Case", "level_currency[]": "CAD", "level_pricing_method[]": "ehc_based",
+         "level_ehc_base_price[]": "30", "level_ehc_qty_case[]": "12", "level_ehc_bc_each[]": "0.35"},
+    ))
+    columns = compute_pricing_columns(concat_level_values([first, second]))
+
+    rows, _ = build_price_rows(second, "Grote Lighting", "SKU2", columns, offset=first["count"])
+    assert rows[0]["EHC BC Each"] == "0.35"
+    assert rows[0]["EHC BC Case"] == "4.2000"
+    assert rows[0]["EHC NS Case"] == ""
+    assert build_price_rows(second, "Grote Lighting", "SKU2")[0] == rows
+
+    rows, _ = build_price_rows(first, "Grote Lighting", "SKU1", columns)
+    assert rows[0]["Pricing Amount"] == "15.0000"
+
+
+def test_add_pricing_totals_over_batch_rows():
+    rows = [
+        {"EHC BC Each": "0.35", "EHC BC Case": "4.2000", "EHC NS Each": "0.10",
+         "Tier Min Qty": "1", "Tier Max Qty": "99"},
+        {"Pricing Amount": "8", "Tier Min Qty": "100", "Tier Max Qty": ""},
+    ]
+
+    add_pricing_totals(rows)
+
+    assert [row["EHC Each Total"] for row in rows] == ["0.45", ""]
+    assert [row["EHC Case Total"] for row in rows] == ["4.2000", ""]
+    assert [row["Tier Coverage"] for row in rows] == ["99", ""]
@@ -0,0 +1,124 @@
+import os
+
+from openpyxl import Workbook
+
+from services.pricing_timeline import (
+    CONFLICT_DUPLICATE_EFFECTIVE,
+    CONFLICT_EFFECTIVE_IN_CONTRACT,
+    CONFLICT_WINDOW_OVERLAP,
+    KIND_BASE,
+    KIND_PROMO,
+    KIND_QUOTE,
+    KIND_TENDER,
+    SOURCE_APPROVED,
+    PriceTimeline,
+    approved_pricing_conflicts,
+    approved_timeline_path,
+    get_approved_timeline,
+    load_timeline,
+    save_timeline,
+    timeline_from_pricing_workbook,
+)
+
+KEY = ("CAD", "Each", "1")
+
+
+def test_active_prefers_overrides_by_priority_then_latest_base():
+    timeline = PriceTimeline()
+    timeline.add("SKU1", KIND_BASE, "2099-01-01", key=KEY, amount="10", ref="base 1")
+    timeline.add("SKU1", KIND_BASE, "2099-03-01", key=KEY, amount="11", ref="base 2")
+    timeline.add("SKU1", KIND_PROMO, "2099-02-01", "2099-02-28", key=KEY, ref="promo")
+    timeline.add("SKU1", KIND_TENDER, "2099-02-10", "2099-02-12", key=KEY, ref="tender")
+    timeline.add("SKU1", KIND_BASE, "2099-01-15", key=("USD", "Each", "1"), ref="usd")
+
+    assert timeline.active("SKU1", "2098-12-31") is None
+    assert timeline.active("SKU1", "2099-01-20")["ref"] == "usd"
+    assert timeline.active("SKU1", "2099-01-20", key=KEY)["ref"] == "base 1"
+    assert timeline.active("SKU1", "2099-02-05")["ref"] == "promo"
+    assert timeline.active("SKU1", "2099-02-11")["ref"] == "tender"
+    assert timeline.active("SKU1", "2099-03-01", key=KEY)["amount"] == "11"
+    assert timeline.active("SKU2", "2099-03-01") is None
+
+
+def test_conflicts():
+    timeline = PriceTimeline()
+    timeline.add("SKU1", KIND_PROMO, "2099-01-01", "2099-01-31", key=KEY, ref=1)
+    timeline.add("SKU1", KIND_PROMO, "2099-01-20", "2099-02-10", key=KEY, ref=2)
+    timeline.add("SKU1", KIND_PROMO, "2099-01-20", "2099-02-10", key=("CAD", "Each", "10"), ref=3)
+    timeline.add("SKU1", KIND_BASE, "2099-05-01", key=KEY, ref=4)
+    timeline.add("SKU1", KIND_BASE, "2099-05-01", key=KEY, ref=5)
+    timeline.add("SKU1", KIND_QUOTE, "2099-06-01", "2099-06-30", key=("CAD", "Each", "50"), ref=6)
+    timeline.add("SKU1", KIND_BASE, "2099-06-15", key=KEY, ref=7)
+
+    conflicts = sorted((c["kind"], c["ref"], c["other"]) for c in timeline.conflicts())
+
+    assert conflicts == [
+        (CONFLICT_DUPLICATE_EFFECTIVE, 5, 4),
+        (CONFLICT_EFFECTIVE_IN_CONTRACT, 7, 6),
+        (CONFLICT_WINDOW_OVERLAP, 2, 1),
+    ]
+
+
+def test_approved_conflicts_skip_unchanged_restatements():
+    approved = PriceTimeline(source=SOURCE_APPROVED)
+    approved.add("SKU1", KIND_BASE, "2099-01-01", key=KEY, amount="10", ref=2)
+    approved.add("SKU1", KIND_BASE, "2099-01-01", key=KEY, amount="10.5", ref=3)
+    approved.add("SKU1", KIND_BASE, "2099-02-01", key=KEY, amount="12", ref=4)
+
+    rows = [
+        {"Part Number": "SKU1", "Pricing Method": "Net Cost Provided", "Currency": "CAD",
+         "Pricing Type": "Each", "Tier Min Qty": "1", "Effective Date": "2099-02-01", "Pricing Amount": amount}
+        for amount in ("12", "13")
+    ]
+    conflicts = approved_pricing_conflicts(rows, ["row A", "row B"], approved)
+
+    assert [(c["ref"], c["other"], c["approved"]) for c in conflicts] == [("row B", 4, True)]
+    assert "approved pricing row 4" in conflicts[0]["message"]
+
+
+def test_price_keys_are_casefolded_like_tier_groups():
+    approved = PriceTimeline(source=SOURCE_APPROVED)
+    approved.add("SKU1", KIND_BASE, "2099-01-01", key=KEY, amount="10", ref=2)
+
+    rows = [{
+        "Part Number": "SKU1", "Pricing Method": "net cost provided", "Currency": " cad",
+        "Pricing Type": "EACH", "Tier Min Qty": "1", "Effective Date": "2099-01-01", "Pricing Amount": "11",
+    }]
+    conflicts = approved_pricing_conflicts(rows, ["row A"], approved)
+
+    assert [(c["kind"], c["ref"], c["other"]) for c in conflicts] == [(CONFLICT_DUPLICATE_EFFECTIVE, "row A", 2)]
+    assert approved.active("SKU1", "2099-06-01", key=("Cad", "each", "1"))["ref"] == 2
+
+
+def test_snapshot_round_trip_and_reload(tmp_path):
+    path = tmp_path / "pricing.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Pricing"
+    ws.append(("Part Number", "Pricing Method", "Currency", "Pricing Type", "Tier Min Qty",
+               "Effective Date", "Start Date", "End Date", "Pricing Amount"))
+    ws.append(("SKU1", "Net Cost Provided", "CAD", "Each", 1, "2099-01-01", None, None, 10))
+    ws.append(("SKU1", "Promo Pricing", "CAD", "Each", 1, None, "2099-02-01", "2099-02-28", 8))
+    ws.append(("SKU2", "Core Pricing", "CAD", "Each", 1, "2099-01-01", None, None, 5))
+    wb.save(path)
+
+    timeline = timeline_from_pricing_workbook(str(path))
+    assert len(timeline) == 2 and "SKU2" not in timeline
+
+    snapshot_path = approved_timeline_path(str(tmp_path), "Grote Lighting")
+    save_timeline(snapshot_path, timeline)
+    loaded = load_timeline(snapshot_path)
+    assert loaded.active("SKU1", "2099-02-10") == {
+        "start": "2099-02-01", "end": "2099-02-28", "kind": KIND_PROMO, "key": ("cad", "each", "1"),
+        "amount": "8", "ref": 3, "source": SOURCE_APPROVED,
+    }
+
+    cached = get_approved_timeline(str(tmp_path), "Grote Lighting")
+    assert get_approved_timeline(str(tmp_path), "Grote Lighting") is cached
+
+    timeline.add("SKU3", KIND_BASE, "2099-01-01", key=KEY)
+    save_timeline(snapshot_path, timeline)
+    mtime = os.path.getmtime(snapshot_path) + 1
+    os.utime(snapshot_path, (mtime, mtime))
+    assert "SKU3" in get_approved_timeline(str(tmp_path), "Grote Lighting")
+    assert get_approved_timeline(str(tmp_path), "Nobody") is None
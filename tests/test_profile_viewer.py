@@ -0,0 +1,27 @@
+import pytest
+
+
+@pytest.fixture
+def profiling(portal_app, monkeypatch):
+    def configure(token="", sample_rate=0.0):
+        monkeypatch.setattr(portal_app, "PROFILE_TOKEN", token)
+        monkeypatch.setattr("services.profiling.PROFILE_TOKEN", token)
+        monkeypatch.setattr("services.profiling.PROFILE_SAMPLE_RATE", sample_rate)
+    return configure
+
+
+def test_viewer_is_not_found_without_a_token_even_when_sampling(client, profiling):
+    profiling(sample_rate=0.5)
+
+    assert client.get("/profiles").status_code == 404
+    assert client.get("/profiles/some-profile").status_code == 404
+
+
+def test_viewer_requires_the_token(client, profiling):
+    profiling(token="s3cret")
+
+    assert client.get("/profiles").status_code == 403
+    assert client.get("/profiles", headers={"X-Profile": "wrong"}).status_code == 403
+    response = client.get("/profiles", headers={"X-Profile": "s3cret"})
+    assert response.status_code == 200
+    assert "profiles" in response.get_json()
@@ -0,0 +1,45 @@
+from services import azure_service, submission_service
+from services.submission_index import get_submission_index
+
+
+def publish(tmp_path, monkeypatch, timestamp, fingerprints):
+    """
+    Publish a Non-OptiCat submission with the Azure calls replaced; returns
+    the manifest handed to the blob layer and the blob uploads requested.
+    """
+    written, uploads = [], []
+    monkeypatch.setattr(submission_service, "run_uploads_parallel", uploads.extend)
+    monkeypatch.setattr(azure_service, "upload_manifest_and_marker", lambda *args: None)
+
+    def write_manifest(manifest, *args):
+        written.append(manifest)
+        return azure_service.write_bronze_manifest(manifest, *args)
+
+    monkeypatch.setattr(submission_service, "write_bronze_manifest", write_manifest)
+
+    manifest_blob_path = submission_service.publish_bronze_submission(
+        "Grote Lighting", timestamp,
+        {"azure_unified_blob": f"bronze/raw/vendor=Grote Lighting/unified/{timestamp}_unified.xlsx"},
+        "non_opticat", (f"raw/notifymarker/{timestamp}.json", {}), None, "bronze", str(tmp_path),
+        validation={"errors": 0}, fingerprints={"azure_unified_blob": fingerprints},
+        files={"azure_unified_blob": {"sha256": "abc", "size": 3}},
+    )
+    return manifest_blob_path, written[0], uploads
+
+
+def test_publish_writes_deltas_and_records_the_manifest(tmp_path, monkeypatch):
+    first = {"Items": {"SKU1": "a", "SKU2": "b"}}
+    second = {"Items": {"SKU1": "a", "SKU2": "changed", "SKU3": "c"}}
+    publish(tmp_path, monkeypatch, "2099-01-01_00-00-00", first)
+
+    manifest_blob_path, manifest, uploads = publish(tmp_path, monkeypatch, "2099-01-02_00-00-00", second)
+
+    delta = manifest["deltas"]["azure_unified_blob"]
+    assert (delta["full"], delta["previous_timestamp"]) == (False, "2099-01-01_00-00-00")
+    assert (delta["added"], delta["modified"], delta["deleted"]) == (1, 1, 0)
+    assert len(uploads) == 2  # delta + fingerprints next to the data blob
+    assert manifest["notify_marker"] == "raw/notifymarker/2099-01-02_00-00-00.json"
+    assert manifest["files"] == {"azure_unified_blob": {"sha256": "abc", "size": 3}}
+
+    latest = get_submission_index(str(tmp_path)).latest("Grote Lighting")
+    assert latest["manifest_blob"] == manifest_blob_path
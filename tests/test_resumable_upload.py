@@ -0,0 +1,106 @@
+import json
+import os
+
+import pytest
+
+from services import azure_service
+from services.azure_service import (
+    asset_block_id,
+    committed_block_hashes,
+    file_block_hashes,
+    make_block_id,
+    upload_file_resumable,
+)
+from tests.fake_blob_storage import FakeContainerClient
+
+BLOCK_SIZE = 4
+BLOB_PATH = "raw/vendor=Grote Lighting/assets/assets.zip"
+
+
+@pytest.fixture
+def container(monkeypatch):
+    container = FakeContainerClient()
+    monkeypatch.setattr(azure_service, "get_container_client", lambda connection_string, name: container)
+    return container
+
+
+@pytest.fixture
+def local_file(tmp_path):
+    path = tmp_path / "assets.zip"
+    path.write_bytes(b"0123456789abcdefghijklmnopqrstuv")  # 8 blocks of 4 bytes
+    return str(path)
+
+
+def upload(local_file, **kwargs):
+    return upload_file_resumable(
+        local_file, BLOB_PATH, "UseDevelopmentStorage=true", "bronze",
+        block_size=BLOCK_SIZE, max_concurrency=1, **kwargs,
+    )
+
+
+def test_interrupted_upload_resumes_with_missing_blocks_only(container, local_file):
+    journal_path = f"{local_file}.upload.json"
+    all_block_ids = [make_block_id(i) for i in range(8)]
+
+    container.fail_stage_after = 3
+    with pytest.raises(ConnectionError):
+        upload(local_file)
+
+    with open(journal_path) as f:
+        assert json.load(f)["staged_blocks"] == [0, 1, 2]
+    assert BLOB_PATH not in container.blobs
+
+    container.fail_stage_after = None
+    container.calls.clear()
+    assert upload(local_file) == f"bronze/{BLOB_PATH}"
+
+    # Blocks 0-2 are still staged in Azure, so only 3-7 are uploaded again
+    assert container.staged_block_ids() == all_block_ids[3:]
+    assert container.calls[-1] == ("commit_block_list", BLOB_PATH, all_block_ids)
+    assert container.blobs[BLOB_PATH].data == b"0123456789abcdefghijklmnopqrstuv"
+    assert not os.path.exists(journal_path)
+
+
+def test_journal_blocks_missing_in_azure_are_staged_again(container, local_file):
+    container.fail_stage_after = 3
+    with pytest.raises(ConnectionError):
+        upload(local_file)
+
+    # Azure discards uncommitted blocks after a week
+    container.uncommitted[BLOB_PATH].pop(make_block_id(1))
+    container.fail_stage_after = None
+    container.calls.clear()
+    upload(local_file)
+
+    assert container.staged_block_ids() == [make_block_id(i) for i in (1, 3, 4, 5, 6, 7)]
+    assert container.blobs[BLOB_PATH].data == b"0123456789abcdefghijklmnopqrstuv"
+
+
+def test_changed_file_ignores_old_journal(container, local_file):
+    container.fail_stage_after = 3
+    with pytest.raises(ConnectionError):
+        upload(local_file)
+
+    mtime_ns = os.stat(local_file).st_mtime_ns
+    with open(local_file, "wb") as f:
+        f.write(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ012345")
+    os.utime(local_file, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+    container.fail_stage_after = None
+    container.calls.clear()
+    upload(local_file)
+
+    assert container.staged_block_ids() == [make_block_id(i) for i in range(8)]
+    assert container.blobs[BLOB_PATH].data == b"ABCDEFGHIJKLMNOPQRSTUVWXYZ012345"
+
+
+def test_block_hash_ids_can_be_read_back_from_the_committed_blob(container, local_file):
+    container.fail_stage_after = 3
+    with pytest.raises(ConnectionError):
+        upload(local_file, block_hash_ids=True)
+    container.fail_stage_after = None
+    container.calls.clear()
+    upload(local_file, block_hash_ids=True)
+
+    block_hashes = file_block_hashes(local_file, BLOCK_SIZE)
+    assert container.staged_block_ids() == [asset_block_id(i, h) for i, h in enumerate(block_hashes)][3:]
+    assert committed_block_hashes(container, BLOB_PATH) == (BLOCK_SIZE, block_hashes)
@@ -0,0 +1,40 @@
+from tests.conftest import flashed_messages
+
+
+def discount_form(base_price, discount="0.25", sku="DISC-1"):
+    return {
+        "action": "add",
+        "vendor_name": "Grote Lighting",
+        "sku": sku,
+        "level_type[]": "Each",
+        "level_currency[]": "CAD",
+        "level_pricing_method[]": "discount_based",
+        "level_db_base_price[]": base_price,
+        "level_db_discount_pct[]": discount,
+        "level_db_effective_date[]": "2099-01-01",
+    }
+
+
+def test_huge_discount_base_price_is_a_validation_error(client):
+    response = client.post("/single-product", data=discount_form("1e30"))
+
+    assert response.status_code == 302
+    assert ("danger", "Pricing Level 1 (Discount): Base Price must not exceed 1,000,000,000,000.") \
+        in flashed_messages(client)
+
+
+def test_non_finite_discount_base_price_is_not_numeric(client):
+    response = client.post("/single-product", data=discount_form("inf"))
+
+    assert response.status_code == 302
+    assert ("danger", "Pricing Level 1 (Discount): Base Price must be numeric.") in flashed_messages(client)
+
+
+def test_discount_level_added_with_net_price(client, portal_app):
+    response = client.post("/single-product", data=discount_form("20", sku="DISC-OK"))
+
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        batch_id = session["batch_id"]
+    rows = portal_app.batch_store.get(batch_id, "batch_price_rows")
+    assert [(row["Part Number"], row["Pricing Amount"]) for row in rows] == [("DISC-OK", "15.0000")]
@@ -0,0 +1,90 @@
+import io
+import os
+
+import pytest
+from openpyxl import Workbook
+
+from services import submission_service
+from services.submission_service import process_streamed_submission, removing_job_folder
+from validators.unified_workbook_validator import WorkbookValidationError
+from tests.test_submission_uploads import drain_jobs
+
+
+@pytest.fixture
+def streaming(portal_app, monkeypatch):
+    """
+    STREAM_UPLOADS=1 with STREAM_KEEP_ARCHIVE=0; upload_stream only writes
+    the local copy it is asked for.
+    """
+    monkeypatch.setattr(portal_app, "STREAM_UPLOADS", True)
+    monkeypatch.setattr(portal_app, "STREAM_KEEP_ARCHIVE", False)
+
+    def upload_stream(stream, blob_path, connection_string, container_name, archive_path=None, on_chunk=None):
+        data = stream.read()
+        if archive_path:
+            with open(archive_path, "wb") as f:
+                f.write(data)
+        return {"blob": f"bronze/{blob_path}", "sha256": "0" * 64, "size": len(data), "archive_path": archive_path}
+
+    monkeypatch.setattr(portal_app, "upload_stream", upload_stream)
+    drain_jobs(portal_app.job_queue)
+    return portal_app
+
+
+@pytest.fixture
+def deleted_blobs(monkeypatch):
+    """
+    'container/blob' paths delete_streamed_blobs removes.
+    """
+    deleted = []
+    monkeypatch.setattr(submission_service, "get_container_client", lambda connection_string, name: name)
+    monkeypatch.setattr(
+        submission_service, "delete_blobs_batched",
+        lambda container, names: deleted.extend(f"{container}/{name}" for name in names),
+    )
+    return deleted
+
+
+def workbook_bytes():
+    wb = Workbook()
+    wb.active.title = "Not_The_Template"
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def test_streamed_unified_workbook_is_validated_without_an_archive(client, streaming, tmp_path, deleted_blobs):
+    response = client.post("/upload", data={
+        "vendor_name": "Grote Lighting",
+        "vendor_type": "non-opticat",
+        "non_opticat_file": (io.BytesIO(workbook_bytes()), "unified.xlsx"),
+    })
+    assert response.status_code == 302
+
+    (job,) = drain_jobs(streaming.job_queue)
+    payload = job["payload"]
+    copy = payload["archives"]["azure_unified_blob"]
+    assert os.path.dirname(copy) == payload["job_folder"]
+
+    handler = removing_job_folder(
+        lambda payload, report_progress: process_streamed_submission(payload, report_progress, None, str(tmp_path))
+    )
+    with pytest.raises(WorkbookValidationError):
+        handler(payload, print)
+    assert not os.path.exists(payload["job_folder"])
+    # The rejected workbook was committed while it streamed
+    assert deleted_blobs == [payload["blobs"]["azure_unified_blob"]]
+
+
+def test_streamed_submission_without_the_checked_copy_is_withheld(tmp_path, monkeypatch, deleted_blobs):
+    published = []
+    monkeypatch.setattr(submission_service, "publish_bronze_submission", lambda *a, **k: published.append(a))
+
+    with pytest.raises(ValueError, match="No local copy"):
+        process_streamed_submission({
+            "vendor_name": "Grote Lighting", "vendor_type": "non-opticat", "timestamp": "t",
+            "blob_timestamp": "t", "container_name": "bronze", "uploaded_files": ["unified.xlsx"],
+            "blobs": {"azure_unified_blob": "bronze/raw/x.xlsx"}, "archives": {"azure_unified_blob": None},
+        }, print, None, str(tmp_path))
+    assert published == []
+    assert deleted_blobs == ["bronze/raw/x.xlsx"]
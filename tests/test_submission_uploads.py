@@ -0,0 +1,57 @@
+import io
+import os
+
+import pytest
+
+from services.submission_service import removing_job_folder
+
+
+def drain_jobs(job_queue):
+    jobs = []
+    while (job := job_queue.claim_next()) is not None:
+        jobs.append(job)
+    return jobs
+
+
+def post_unified(client, content):
+    return client.post("/upload", data={
+        "vendor_name": "Grote Lighting",
+        "vendor_type": "non-opticat",
+        "non_opticat_file": (io.BytesIO(content), "unified.xlsx"),
+    })
+
+
+def test_queued_uploads_with_same_filename_do_not_overwrite(client, portal_app):
+    drain_jobs(portal_app.job_queue)
+
+    assert post_unified(client, b"first").status_code == 302
+    assert post_unified(client, b"second").status_code == 302
+
+    first, second = drain_jobs(portal_app.job_queue)
+    assert first["payload"]["unified_path"] != second["payload"]["unified_path"]
+    for job, content in ((first, b"first"), (second, b"second")):
+        payload = job["payload"]
+        assert os.path.dirname(payload["unified_path"]) == payload["job_folder"]
+        assert os.path.basename(payload["job_folder"]) == job["id"]
+        with open(payload["unified_path"], "rb") as f:
+            assert f.read() == content
+
+
+def test_job_folder_removed_when_handler_finishes(tmp_path):
+    ok_folder = tmp_path / "ok"
+    failed_folder = tmp_path / "failed"
+    for folder in (ok_folder, failed_folder):
+        folder.mkdir()
+        (folder / "unified.xlsx").write_bytes(b"x")
+
+    def fail(payload, report_progress):
+        raise RuntimeError("upload failed")
+
+    assert removing_job_folder(lambda payload, report_progress: {"ok": True})(
+        {"job_folder": str(ok_folder)}, print
+    ) == {"ok": True}
+    with pytest.raises(RuntimeError):
+        removing_job_folder(fail)({"job_folder": str(failed_folder)}, print)
+
+    assert not ok_folder.exists()
+    assert not failed_folder.exists()
@@ -0,0 +1,121 @@
+import pytest
+from openpyxl import Workbook
+from werkzeug.datastructures import MultiDict
+
+from helpers.pricing_levels import parse_pricing_levels
+from services import submission_service
+from validators.tier_validator import (
+    TIER_GAP,
+    TIER_MIN_GT_MAX,
+    TIER_OVERLAP,
+    PricingTierError,
+    find_tier_conflicts,
+    validate_pricing_tiers,
+    validate_pricing_workbook_tiers,
+)
+
+
+def net_cost_level(tier_min, tier_max, effective="2099-01-01", method="net_cost"):
+    level = {
+        "level_type[]": "Each",
+        "level_currency[]": "CAD",
+        "level_pricing_method[]": method,
+        "level_tier_min_qty[]": tier_min,
+        "level_tier_max_qty[]": tier_max,
+    }
+    if method == "net_cost":
+        level.update({"level_net_list_price[]": "10", "level_net_net_cost[]": "8",
+                      "level_net_effective_date[]": effective})
+    else:
+        level.update({"level_pl_list_price[]": "10", "level_pl_jobber_price[]": "9",
+                      "level_pl_net_cost[]": "8", "level_pl_effective_date[]": effective})
+    return level
+
+
+def parse(*levels):
+    form = MultiDict()
+    for level in levels:
+        for name, value in level.items():
+            form.add(name, value)
+    return parse_pricing_levels(form)
+
+
+def test_find_tier_conflicts_kinds():
+    conflicts = find_tier_conflicts([
+        ("g", 1, 10, "a"),
+        ("g", 5, 20, "b"),    # overlaps a
+        ("g", 25, None, "c"),  # gap 21-24 after b
+        ("g", 9, 3, "d"),      # min > max
+        ("h", 1, 10, "e"),     # other group
+    ])
+
+    assert [(c["kind"], c["ref"], c["other"]) for c in conflicts] == [
+        (TIER_OVERLAP, "b", "a"),
+        (TIER_MIN_GT_MAX, "d", None),
+        (TIER_GAP, "c", "b"),
+    ]
+
+
+def test_same_breaks_on_different_effective_dates_are_separate_ladders():
+    levels = parse(
+        net_cost_level("1", "10", "2099-01-01"), net_cost_level("11", "", "2099-01-01"),
+        net_cost_level("1", "10", "2099-02-01"), net_cost_level("11", "", "2099-02-01"),
+    )
+    assert validate_pricing_tiers(levels) == []
+
+
+def test_same_breaks_on_different_methods_are_separate_ladders():
+    levels = parse(net_cost_level("1", "10"), net_cost_level("1", "10", method="price_levels"))
+    assert validate_pricing_tiers(levels) == []
+
+
+def test_overlap_within_one_ladder_is_reported():
+    levels = parse(net_cost_level("1", "10"), net_cost_level("5", "20"))
+    assert validate_pricing_tiers(levels) == ["Pricing Level 2: Tier 5-20 overlaps Pricing Level 1 (1-10)."]
+
+
+def pricing_workbook(path, rows, header=("Part Number", "Pricing Method", "Currency", "Pricing Type",
+                                         "Tier Min Qty", "Tier Max Qty", "Effective Date")):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Pricing"
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return str(path)
+
+
+def test_workbook_tiers(tmp_path):
+    path = pricing_workbook(tmp_path / "pricing.xlsx", [
+        ("SKU1", "Net Cost Provided", "CAD", "Each", 1, 10, "2099-01-01"),
+        ("SKU1", "Net Cost Provided", "CAD", "Each", 11, None, "2099-01-01"),
+        ("SKU1", "Net Cost Provided", "CAD", "Each", 1, 10, "2099-02-01"),
+        ("SKU1", "Net Cost Provided", "CAD", "Each", 8, 12, "2099-02-01"),
+        ("SKU1", "Promo Pricing", "CAD", "Each", 1, 10, "2099-01-01"),
+        ("SKU2", "Net Cost Provided", "CAD", "Each", 1, 10, "2099-01-01"),
+    ])
+
+    assert validate_pricing_workbook_tiers(path) == ["Pricing row 5: Tier 8-12 overlaps row 4 (1-10)."]
+
+
+def test_workbook_without_tier_columns_is_not_checked(tmp_path):
+    path = pricing_workbook(tmp_path / "pricing.xlsx", [("SKU1", 10)], header=("Part Number", "Price"))
+    assert validate_pricing_workbook_tiers(path) == []
+
+
+def test_pricing_review_with_conflicting_tiers_is_not_uploaded(tmp_path, monkeypatch):
+    uploads = []
+    monkeypatch.setattr(submission_service, "upload_blob", lambda **kwargs: uploads.append(kwargs))
+    path = pricing_workbook(tmp_path / "approved.xlsx", [
+        ("SKU1", "Net Cost Provided", "CAD", "Each", 1, 10, "2099-01-01"),
+        ("SKU1", "Net Cost Provided", "CAD", "Each", 15, None, "2099-01-01"),
+    ])
+
+    with pytest.raises(PricingTierError, match="uncovered"):
+        submission_service.process_pricing_review(
+            {"vendor_name": "Grote Lighting", "timestamp": "2099-01-01_00-00-00",
+             "local_path": path, "uploaded_file": "approved.xlsx"},
+            lambda progress: None, connection_string=None, upload_folder=str(tmp_path),
+        )
+    assert uploads == []
@@ -0,0 +1,218 @@
+"""
+Validation of OptiCat product XML (PIES-style) submissions in FGI Vendor Portal
+
+The XML is parsed incrementally with XMLPullParser: data can be fed in chunks
+(e.g. straight from an upload stream) and every <Item> is dropped from the
+tree once checked, so memory does not grow with the size of the catalog.
+"""
+from functools import lru_cache
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+
+# Element names are matched without their namespace
+OPTICAT_ITEM_ELEMENT = "Item"
+OPTICAT_SKU_ELEMENT = "PartNumber"
+OPTICAT_REQUIRED_ITEM_ELEMENTS = ("PartNumber",)
+OPTICAT_ITEM_COUNT_ELEMENT = "ItemCount"  # PIES <Trailer><ItemCount>
+
+# Errors kept in the summary; all errors are still counted
+MAX_REPORTED_ERRORS = 50
+
+XML_READ_CHUNK_SIZE = 1024 * 1024
+
+
+class XmlValidationError(Exception):
+    """
+    Raised when an uploaded product XML fails validation.
+
+    Attributes:
+        summary (dict): Summary from OpticatXmlValidator.close()
+    """
+
+    def __init__(self, summary, shown=5):
+        self.summary = summary
+        details = "; ".join(summary["errors"][:shown])
+        super().__init__(
+            f"Product XML failed validation with {summary['error_count']} error(s): {details}"
+        )
+
+
+@lru_cache(maxsize=1024)
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1] if tag.startswith("{") else tag
+
+
+class OpticatXmlValidator:
+    """
+    Streaming validator for an OptiCat product XML.
+
+    Checks well-formedness, that every <Item> has the required child
+    elements, that PartNumbers are unique and, if the file has a trailer
+    <ItemCount>, that it matches the number of items.
+
+    on_item, if given, is called as on_item(sku, element) for every item
+    with a PartNumber, before the element is discarded.
+
+    Usage:
+        validator = OpticatXmlValidator()
+        for chunk in chunks:
+            validator.feed(chunk)
+        summary = validator.close()
+    """
+
+    def __init__(self, required_elements=OPTICAT_REQUIRED_ITEM_ELEMENTS,
+                 max_errors=MAX_REPORTED_ERRORS, on_item=None):
+        self.required_elements = tuple(required_elements)
+        self.max_errors = max_errors
+        self.on_item = on_item
+
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._stack = []
+        self._skus = set()
+        self._closed = False
+
+        self.summary = {
+            "valid": False,
+            "well_formed": True,
+            "root_element": None,
+            "bytes": 0,
+            "item_count": 0,
+            "unique_skus": 0,
+            "duplicate_skus": 0,
+            "missing_elements": {name: 0 for name in self.required_elements},
+            "declared_item_count": None,
+            "error_count": 0,
+            "errors": [],
+        }
+
+    def _error(self, message):
+        self.summary["error_count"] += 1
+        if len(self.summary["errors"]) < self.max_errors:
+            self.summary["errors"].append(message)
+
+    def _malformed(self, error):
+        self.summary["well_formed"] = False
+        self._error(f"XML is not well-formed: {error}")
+
+    def _check_item(self, item):
+        self.summary["item_count"] += 1
+        position = self.summary["item_count"]
+
+        children = {}
+        for child in item:
+            children.setdefault(_local_name(child.tag), child)
+
+        for name in self.required_elements:
+            child = children.get(name)
+            if child is None or not (child.text or "").strip():
+                self.summary["missing_elements"][name] += 1
+                self._error(f"Item {position}: <{name}> is missing or empty.")
+
+        sku_element = children.get(OPTICAT_SKU_ELEMENT)
+        sku = (sku_element.text or "").strip() if sku_element is not None else ""
+        if sku:
+            if sku in self._skus:
+                self.summary["duplicate_skus"] += 1
+                self._error(f"Item {position}: duplicate {OPTICAT_SKU_ELEMENT} '{sku}'.")
+            else:
+                self._skus.add(sku)
+            if self.on_item:
+                self.on_item(sku, item)
+
+    def _drain(self):
+        stack = self._stack
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self.summary["root_element"] is None:
+                    self.summary["root_element"] = _local_name(element.tag)
+                stack.append(element)
+                continue
+
+            stack.pop()
+            name = _local_name(element.tag)
+
+            if name == OPTICAT_ITEM_ELEMENT:
+                self._check_item(element)
+                # Drop the checked item so the tree never holds the catalog
+                if stack:
+                    stack[-1].remove(element)
+                element.clear()
+
+            elif name == OPTICAT_ITEM_COUNT_ELEMENT:
+                try:
+                    self.summary["declared_item_count"] = int((element.text or "").strip())
+                except ValueError:
+                    self._error(f"<{OPTICAT_ITEM_COUNT_ELEMENT}> is not a number.")
+
+    def feed(self, chunk):
+        """
+        Parse the next chunk of XML bytes.
+
+        Args:
+            chunk (bytes): Next part of the document
+        """
+        if self._closed or not self.summary["well_formed"]:
+            return
+
+        self.summary["bytes"] += len(chunk)
+        try:
+            self._parser.feed(chunk)
+            self._drain()
+        except ParseError as e:
+            self._malformed(e)
+
+    def close(self):
+        """
+        Finish parsing and return the summary.
+
+        Returns:
+            dict: valid, well_formed, root_element, bytes, item_count,
+                unique_skus, duplicate_skus, missing_elements,
+                declared_item_count, error_count, errors
+        """
+        if self._closed:
+            return self.summary
+        self._closed = True
+
+        if self.summary["well_formed"]:
+            try:
+                self._parser.close()
+                self._drain()
+            except ParseError as e:
+                self._malformed(e)
+
+        if self.summary["well_formed"]:
+            if self.summary["item_count"] == 0:
+                self._error(f"No <{OPTICAT_ITEM_ELEMENT}> elements found.")
+
+            declared = self.summary["declared_item_count"]
+            if declared is not None and declared != self.summary["item_count"]:
+                self._error(
+                    f"<{OPTICAT_ITEM_COUNT_ELEMENT}> says {declared} item(s) "
+                    f"but the file contains {self.summary['item_count']}."
+                )
+
+        self.summary["unique_skus"] = len(self._skus)
+        self.summary["valid"] = self.summary["error_count"] == 0
+        self._skus = set()
+        self._stack = []
+        return self.summary
+
+
+def validate_opticat_xml(path, chunk_size=XML_READ_CHUNK_SIZE, on_item=None):
+    """
+    Validate an OptiCat product XML file on disk.
+
+    Args:
+        path (str): Local path of the XML file
+        chunk_size (int): Bytes read per chunk
+        on_item (callable, optional): See OpticatXmlValidator
+
+    Returns:
+        dict: Summary from OpticatXmlValidator.close()
+    """
+    validator = OpticatXmlValidator(on_item=on_item)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            validator.feed(chunk)
+    return validator.close()
@@ -0,0 +1,277 @@
+"""
+Tier quantity checks for pricing levels in FGI Vendor Portal
+
+Tiers (Tier Min Qty / Tier Max Qty) of one price ladder must line up: no
+tier with min > max, no two tiers covering the same quantity and no
+quantities left between two tiers. A ladder is the tiers of one SKU,
+currency, level type and pricing method taking effect on the same date, so
+a new net cost ladder effective next month may reuse this month's breaks.
+Each ladder's tiers are sorted once and swept in order, so a ladder of n
+tiers costs O(n log n) and every conflict is reported in the same pass.
+
+Promo, quote and tender levels run over a date window on top of the base
+pricing and core levels carry no tiered price, so they are not checked here.
+
+The same checks run on single product levels (validate_pricing_tiers) and
+on the Pricing sheet of uploaded workbooks (validate_pricing_workbook_tiers).
+"""
+from openpyxl import load_workbook
+
+from helpers.lookups import PRICING_METHODS, PRICING_METHOD_RULES
+from services.excel_service import cell_text
+from services.pricing_timeline import APPROVED_PRICING_SHEET, LEVEL_DATE_FIELDS, timeline_date
+
+
+# Pricing methods whose levels are not part of the tier ladder
+UNTIERED_METHODS = frozenset(
+    [method for method, rule in PRICING_METHOD_RULES.items() if rule.get("date_window")]
+    + ["core_pricing"]
+)
+
+TIER_OVERLAP = "overlap"
+TIER_GAP = "gap"
+TIER_MIN_GT_MAX = "min_gt_max"
+
+# Tiers are inclusive ranges of whole quantities: 1-10 is followed by 11
+TIER_STEP = 1
+
+# Pricing Method cell (label or key, casefolded) -> method key
+METHOD_BY_LABEL = {}
+for _method, _label in PRICING_METHODS.items():
+    METHOD_BY_LABEL[_method] = METHOD_BY_LABEL[_label.casefold()] = _method
+METHOD_BY_LABEL["discount based pricing"] = "discount_based"
+
+# Pricing sheet columns of a tier: ladder columns, then min / max
+PRICING_TIER_GROUP_COLUMNS = ("Part Number", "Currency", "Pricing Type", "Pricing Method")
+PRICING_TIER_DATE_COLUMNS = ("Effective Date", "Start Date")
+PRICING_TIER_COLUMNS = ("Tier Min Qty", "Tier Max Qty")
+
+
+class PricingTierError(Exception):
+    """
+    Raised when the tiers of an uploaded pricing workbook conflict.
+
+    Attributes:
+        errors (list[str]): All conflict messages
+    """
+
+    def __init__(self, errors, shown=5):
+        self.errors = errors
+        super().__init__(
+            f"Pricing tiers failed validation with {len(errors)} error(s): {'; '.join(errors[:shown])}"
+        )
+
+
+def format_tier(tier_min, tier_max):
+    """
+    Format a tier for messages, e.g. "1-10" or "50+" when open-ended.
+    """
+    if tier_max is None:
+        return f"{tier_min:g}+"
+    return f"{tier_min:g}-{tier_max:g}"
+
+
+def find_tier_conflicts(tiers, describe=str):
+    """
+    Find overlapping, gapped and inverted tiers.
+
+    Args:
+        tiers (iterable): (group, tier_min, tier_max, ref) per tier; group is
+            any hashable key (e.g. (sku, currency, level type)), tier_max None
+            means open-ended and ref identifies the tier for the caller
+            (level index, row number)
+        describe (callable): Turns a ref into text for messages about the
+            other tier of a conflict
+
+    Returns:
+        list: Conflict dicts with kind (TIER_OVERLAP, TIER_GAP or
+            TIER_MIN_GT_MAX), group, ref, other (ref of the tier it conflicts
+            with, None for min > max) and message; ordered by group, then by
+            tier
+    """
+    groups = {}
+    for group, tier_min, tier_max, ref in tiers:
+        groups.setdefault(group, []).append((tier_min, tier_max, ref))
+
+    conflicts = []
+    for group, group_tiers in groups.items():
+        group_tiers.sort(key=lambda tier: (tier[0], float("inf") if tier[1] is None else tier[1]))
+
+        # Furthest quantity covered so far and the tier covering it
+        reach = reach_tier = None
+
+        for tier_min, tier_max, ref in group_tiers:
+            if tier_max is not None and tier_min > tier_max:
+                conflicts.append({
+                    "kind": TIER_MIN_GT_MAX, "group": group, "ref": ref, "other": None,
+                    "message": f"Tier Min Qty {tier_min:g} is greater than Tier Max Qty {tier_max:g}.",
+                })
+                continue
+
+            tier = format_tier(tier_min, tier_max)
+            if reach_tier is not None:
+                other_min, other_max, other_ref = reach_tier
+                other = f"{describe(other_ref)} ({format_tier(other_min, other_max)})"
+                if reach is None or tier_min <= reach:
+                    conflicts.append({
+                        "kind": TIER_OVERLAP, "group": group, "ref": ref, "other": other_ref,
+                        "message": f"Tier {tier} overlaps {other}.",
+                    })
+                elif tier_min > reach + TIER_STEP:
+                    conflicts.append({
+                        "kind": TIER_GAP, "group": group, "ref": ref, "other": other_ref,
+                        "message": (
+                            f"Tier {tier} leaves quantities {reach + TIER_STEP:g}-"
+                            f"{tier_min - TIER_STEP:g} uncovered after {other}."
+                        ),
+                    })
+
+            if reach_tier is None or (reach is not None and (tier_max is None or tier_max > reach)):
+                reach, reach_tier = tier_max, (tier_min, tier_max, ref)
+
+    return conflicts
+
+
+def pricing_level_tiers(levels):
+    """
+    Yield the tiers of one product's parsed pricing levels.
+
+    Levels that are unused, untiered (see UNTIERED_METHODS) or have no
+    numeric Tier Min Qty (or a non-numeric Tier Max Qty) are skipped.
+
+    Args:
+        levels (dict): Parsed levels from parse_pricing_levels
+
+    Yields:
+        tuple: ((currency, level type, pricing method, effective date),
+            tier_min, tier_max, level index)
+    """
+    values = levels["values"]
+    tier_mins = levels["numbers"]["level_tier_min_qty[]"]
+    tier_maxes = levels["numbers"]["level_tier_max_qty[]"]
+
+    for i in range(levels["count"]):
+        if not levels["used"][i] or tier_mins[i] is None:
+            continue
+        if tier_maxes[i] is None and values["level_tier_max_qty[]"][i]:
+            continue  # non-numeric max, reported by the level checks
+        method = values["level_pricing_method[]"][i]
+        if method in UNTIERED_METHODS:
+            continue
+        date_fields = LEVEL_DATE_FIELDS.get(method)
+        effective = values[date_fields[1]][i] if date_fields else ""
+        group = (values["level_currency[]"][i], values["level_type[]"][i], method, effective)
+        yield group, tier_mins[i], tier_maxes[i], i
+
+
+def validate_pricing_tiers(levels):
+    """
+    Check the tiers of one product's pricing levels.
+
+    Args:
+        levels (dict): Parsed levels from parse_pricing_levels
+
+    Returns:
+        list[str]: Error messages, "Pricing Level N: ..." (empty if valid)
+    """
+    conflicts = find_tier_conflicts(
+        pricing_level_tiers(levels), describe=lambda i: f"Pricing Level {i + 1}"
+    )
+    return [f"Pricing Level {conflict['ref'] + 1}: {conflict['message']}" for conflict in conflicts]
+
+
+def _tier_number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return float(cell_text(value))
+    except ValueError:
+        return None
+
+
+def pricing_row_tier(row, ref):
+    """
+    Return the tier of a Pricing sheet row.
+
+    Args:
+        row (dict): Column name -> cell value (at least the
+            PRICING_TIER_GROUP_COLUMNS and PRICING_TIER_COLUMNS)
+        ref: Identifies the row in messages (row number)
+
+    Returns:
+        tuple or None: ((sku, currency, pricing type, pricing method,
+            effective date), tier_min, tier_max, ref); None if the tier is
+            blank or not numeric or the row uses an untiered method
+    """
+    min_text = cell_text(row.get("Tier Min Qty"))
+    tier_min = _tier_number(min_text) if min_text else None
+    if tier_min is None:
+        return None
+
+    method_text = cell_text(row.get("Pricing Method")).casefold()
+    method = METHOD_BY_LABEL.get(method_text, method_text)
+    if method in UNTIERED_METHODS:
+        return None
+
+    max_text = cell_text(row.get("Tier Max Qty"))
+    tier_max = _tier_number(max_text) if max_text else None
+    if tier_max is None and max_text:
+        return None
+
+    dates = [row.get(column) for column in PRICING_TIER_DATE_COLUMNS]
+    effective = next((timeline_date(value) or cell_text(value) for value in dates if cell_text(value)), "")
+    group = (
+        cell_text(row.get("Part Number")),
+        cell_text(row.get("Currency")).casefold(),
+        cell_text(row.get("Pricing Type")).casefold(),
+        method,
+        effective,
+    )
+    return group, tier_min, tier_max, ref
+
+
+def validate_pricing_workbook_tiers(path, sheet=APPROVED_PRICING_SHEET):
+    """
+    Check the tiers of the Pricing sheet of an uploaded workbook (OptiCat
+    pricing XLSX, approved pricing review).
+
+    The first sheet is read if there is no Pricing sheet; a sheet without
+    the tier columns is not checked.
+
+    Args:
+        path (str): Local path of the XLSX
+        sheet (str): Sheet holding the pricing rows
+
+    Returns:
+        list[str]: Error messages, "Pricing row N: ..." (empty if valid)
+    """
+    required = PRICING_TIER_GROUP_COLUMNS + PRICING_TIER_COLUMNS
+    tiers = []
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet in wb.sheetnames else wb.worksheets[0]
+        title = ws.title
+        rows = ws.iter_rows(values_only=True)
+        header = [cell_text(name) for name in next(rows, ())]
+        positions = {name: index for index, name in enumerate(header) if name}
+        if not all(column in positions for column in required):
+            return []
+
+        tier_positions = [
+            (column, positions[column])
+            for column in required + PRICING_TIER_DATE_COLUMNS if column in positions
+        ]
+        for row_number, values in enumerate(rows, start=2):
+            n_values = len(values)
+            tier = pricing_row_tier(
+                {column: values[index] for column, index in tier_positions if index < n_values},
+                row_number,
+            )
+            if tier:
+                tiers.append(tier)
+    finally:
+        wb.close()
+
+    conflicts = find_tier_conflicts(tiers, describe=lambda row: f"row {row}")
+    return [f"{title} row {conflict['ref']}: {conflict['message']}" for conflict in conflicts]
@@ -0,0 +1,300 @@
+"""
+Validation of Non-OptiCat unified XLSX submissions in FGI Vendor Portal
+
+The workbook is streamed with openpyxl in read-only mode, so memory stays flat
+whatever the row count. Sheets and headers are checked against
+data/templates/standard_template.xlsx, cell values against the template
+vocabularies in helpers.lookups.
+"""
+import os
+from datetime import date, datetime
+from functools import lru_cache
+
+from openpyxl import load_workbook
+
+from helpers.lookups import (
+    TEMPLATE_VOCABULARIES, TEMPLATE_NUMERIC_COLUMNS, TEMPLATE_NUMERIC_RANGES,
+    TEMPLATE_DATE_COLUMNS,
+)
+from services.excel_service import cell_text
+from services.pricing_timeline import PriceTimeline
+from validators.tier_validator import (
+    PRICING_TIER_COLUMNS,
+    PRICING_TIER_DATE_COLUMNS,
+    PRICING_TIER_GROUP_COLUMNS,
+    find_tier_conflicts,
+    pricing_row_tier,
+)
+
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STANDARD_TEMPLATE_PATH = os.path.join(PROJECT_ROOT, "data", "templates", "standard_template.xlsx")
+
+# Template sheets that carry instructions / reference data, not vendor rows
+TEMPLATE_REFERENCE_SHEETS = {"README", "CountryCodes"}
+
+# Errors kept in the report; all errors are still counted
+MAX_REPORTED_ERRORS = 200
+
+# Sheet whose rows are tier checked (see validators.tier_validator)
+PRICING_TIER_SHEET = "Pricing"
+
+# Pricing sheet columns read into the price timeline (see PriceTimeline.add_price_row)
+PRICING_TIMELINE_COLUMNS = (
+    "Part Number", "Pricing Method", "Currency", "Pricing Type", "Tier Min Qty",
+    "Pricing Amount", "Effective Date", "Start Date", "End Date",
+)
+
+
+class WorkbookValidationError(Exception):
+    """
+    Raised when an uploaded workbook fails validation.
+
+    Attributes:
+        report (dict): Report from validate_unified_workbook
+    """
+
+    def __init__(self, report, shown=5):
+        self.report = report
+        details = "; ".join(format_workbook_error(e) for e in report["errors"][:shown])
+        super().__init__(
+            f"Unified workbook failed validation with {report['error_count']} error(s): {details}"
+        )
+
+
+def format_workbook_error(error):
+    """
+    Format one validation error for display, e.g. "Pricing row 7, Currency: ...".
+    """
+    location = error["sheet"]
+    if error.get("row"):
+        location += f" row {error['row']}"
+    if error.get("column"):
+        location += f", {error['column']}"
+    return f"{location}: {error['message']}"
+
+
+@lru_cache(maxsize=None)
+def load_template_schema(template_path=STANDARD_TEMPLATE_PATH):
+    """
+    Read the sheet names and headers of the standard template.
+
+    Args:
+        template_path (str): Path of standard_template.xlsx
+
+    Returns:
+        dict: Sheet title -> tuple of header names (stripped), in template order
+    """
+    wb = load_workbook(template_path, read_only=True)
+    try:
+        schema = {}
+        for ws in wb.worksheets:
+            if ws.title in TEMPLATE_REFERENCE_SHEETS:
+                continue
+            header = next(ws.iter_rows(max_row=1, values_only=True), ())
+            schema[ws.title] = tuple(cell_text(name) for name in header if cell_text(name))
+        return schema
+    finally:
+        wb.close()
+
+
+def _column_checks(sheet, positions):
+    """
+    Compile the per-cell checks of a sheet.
+
+    Args:
+        sheet (str): Sheet title
+        positions (dict): Header name -> column index in the uploaded sheet
+
+    Returns:
+        list: (index, column, allowed casefolded set or None, numeric,
+            (min, max) or None, is_date)
+    """
+    vocabularies = TEMPLATE_VOCABULARIES.get(sheet, {})
+    numeric_columns = set(TEMPLATE_NUMERIC_COLUMNS.get(sheet, ()))
+    ranges = TEMPLATE_NUMERIC_RANGES.get(sheet, {})
+    date_columns = set(TEMPLATE_DATE_COLUMNS.get(sheet, ()))
+
+    checks = []
+    for column, index in positions.items():
+        allowed = vocabularies.get(column)
+        numeric = column in numeric_columns
+        is_date = column in date_columns
+        if allowed is None and not numeric and not is_date:
+            continue
+        checks.append((
+            index,
+            column,
+            frozenset(value.casefold() for value in allowed) if allowed else None,
+            numeric,
+            ranges.get(column),
+            is_date,
+        ))
+    return checks
+
+
+def _is_date(value):
+    if isinstance(value, (datetime, date)):
+        return True
+    try:
+        datetime.strptime(cell_text(value), "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+
+def _number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return float(cell_text(value))
+    except ValueError:
+        return None
+
+
+def validate_unified_workbook(path, template_path=STANDARD_TEMPLATE_PATH,
+                              max_errors=MAX_REPORTED_ERRORS, approved_timeline=None):
+    """
+    Validate a Non-OptiCat unified workbook against the standard template.
+
+    Checks, sheet by sheet and row by row:
+      - every template sheet and header is present (renamed ones count as missing)
+      - the key column (Part Number / SKU) is filled in on every data row
+      - dropdown columns only use the template vocabularies
+      - numeric and date columns hold numbers / dates
+      - Pricing tiers of a SKU, currency, pricing type, pricing method and
+        effective date neither overlap, leave gaps nor have min > max
+      - Pricing effective dates and promo / quote / tender windows of a SKU
+        do not collide; collisions with the vendor's last approved pricing
+        are reported as warnings
+
+    Args:
+        path (str): Local path of the uploaded XLSX
+        template_path (str): Path of standard_template.xlsx
+        max_errors (int): Maximum number of errors kept in the report
+        approved_timeline (PriceTimeline, optional): Vendor's last approved
+            pricing (see get_approved_timeline)
+
+    Returns:
+        dict: valid (bool), error_count (int), errors (list of dicts with
+            sheet, row, column, message), warnings (list of str),
+            rows (dict: sheet -> data rows checked)
+    """
+    report = {"valid": True, "error_count": 0, "errors": [], "warnings": [], "rows": {}}
+
+    def add_error(sheet, row, column, message):
+        report["error_count"] += 1
+        if len(report["errors"]) < max_errors:
+            report["errors"].append({"sheet": sheet, "row": row, "column": column, "message": message})
+
+    schema = load_template_schema(template_path)
+
+    try:
+        wb = load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        add_error("", None, None, f"File is not a readable XLSX workbook: {e}")
+        report["valid"] = False
+        return report
+
+    try:
+        for title in wb.sheetnames:
+            if title not in schema and title not in TEMPLATE_REFERENCE_SHEETS:
+                report["warnings"].append(f"Sheet '{title}' is not part of the template and was not checked.")
+
+        for sheet, template_header in schema.items():
+            if sheet not in wb.sheetnames:
+                add_error(sheet, None, None, "Sheet is missing.")
+                continue
+
+            rows = wb[sheet].iter_rows(values_only=True)
+            header = [cell_text(name) for name in next(rows, ())]
+            positions = {name: index for index, name in enumerate(header) if name}
+
+            for column in template_header:
+                if column not in positions:
+                    add_error(sheet, 1, column, "Column is missing.")
+            for column in positions:
+                if column not in template_header:
+                    report["warnings"].append(f"{sheet}: column '{column}' is not part of the template.")
+
+            key_column = template_header[0]
+            key_index = positions.get(key_column)
+            checks = _column_checks(sheet, {c: i for c, i in positions.items() if c in template_header})
+
+            tier_positions = timeline = None
+            tiers = []
+            if sheet == PRICING_TIER_SHEET:
+                tier_columns = PRICING_TIER_GROUP_COLUMNS + PRICING_TIER_COLUMNS
+                if all(column in positions for column in tier_columns):
+                    tier_positions = [
+                        (column, positions[column])
+                        for column in tier_columns + PRICING_TIER_DATE_COLUMNS if column in positions
+                    ]
+                timeline = PriceTimeline()
+                timeline_positions = [
+                    (column, positions[column]) for column in PRICING_TIMELINE_COLUMNS if column in positions
+                ]
+
+            checked = 0
+            for row_number, values in enumerate(rows, start=2):
+                if all(value is None or value == "" for value in values):
+                    continue
+                checked += 1
+                n_values = len(values)
+
+                if key_index is not None and (key_index >= n_values or not cell_text(values[key_index])):
+                    add_error(sheet, row_number, key_column, f"{key_column} is required.")
+
+                for index, column, allowed, numeric, value_range, is_date in checks:
+                    if index >= n_values:
+                        continue
+                    value = values[index]
+                    if value is None or value == "":
+                        continue
+
+                    if allowed is not None and cell_text(value).casefold() not in allowed:
+                        add_error(sheet, row_number, column, f"'{cell_text(value)}' is not an allowed value.")
+                    elif numeric:
+                        number = _number(value)
+                        if number is None:
+                            add_error(sheet, row_number, column, "Must be numeric.")
+                        elif value_range and not (value_range[0] <= number <= value_range[1]):
+                            add_error(
+                                sheet, row_number, column,
+                                f"Must be between {value_range[0]} and {value_range[1]}."
+                            )
+                    elif is_date and not _is_date(value):
+                        add_error(sheet, row_number, column, "Must be a date (YYYY-MM-DD).")
+
+                if tier_positions:
+                    tier = pricing_row_tier(
+                        {column: values[index] for column, index in tier_positions if index < n_values},
+                        row_number,
+                    )
+                    if tier:
+                        tiers.append(tier)
+
+                if timeline is not None:
+                    timeline.add_price_row(
+                        {column: values[index] for column, index in timeline_positions if index < n_values},
+                        ref=row_number,
+                    )
+
+            for conflict in find_tier_conflicts(tiers, describe=lambda row: f"row {row}"):
+                add_error(sheet, conflict["ref"], PRICING_TIER_COLUMNS[0], conflict["message"])
+
+            if timeline is not None:
+                for conflict in timeline.conflicts(approved=approved_timeline, describe=lambda row: f"row {row}"):
+                    if conflict["approved"]:
+                        report["warnings"].append(
+                            f"{sheet} row {conflict['ref']} ({conflict['sku']}): {conflict['message']}"
+                        )
+                    else:
+                        add_error(sheet, conflict["ref"], None, f"{conflict['sku']}: {conflict['message']}")
+
+            report["rows"][sheet] = checked
+    finally:
+        wb.close()
+
+    report["valid"] = report["error_count"] == 0
+    return report